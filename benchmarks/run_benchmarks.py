@@ -0,0 +1,204 @@
+# benchmarks/run_benchmarks.py
+"""
+Бенчмарки конвеєра на синтетичних книгах різного розміру.
+
+    python -m benchmarks.run_benchmarks --tiers small medium --repeat 5
+    python -m benchmarks.run_benchmarks --compare benchmarks/results/<попередній>.json
+
+Для кожного рівня розміру вимірюються load_factors_data, ingest_workbook,
+кожна функція create_sheet_*, process_workbook (обидва бекенди) та повний
+шлях POST /process-excel/ (HTTP + пул процесів). Результати (час і пік пам'яті)
+зберігаються в JSON, щоб порівнювати їх між комітами.
+"""
+import os
+
+# Кеш результатів і вибіркове трасування пам'яті спотворили б вимірювання
+os.environ["RESULT_CACHE_MAX_BYTES"] = "0"
+os.environ["RESULT_CACHE_DIR"] = ""
+os.environ["PIPELINE_MEMORY_SAMPLE_RATE"] = "0"
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from io import BytesIO
+from pathlib import Path
+
+import numpy
+import openpyxl
+from openpyxl import load_workbook
+
+from benchmarks.workbook_generator import generate_workbook
+from main import app, build_params
+from pipeline.process import WORKBOOK_STAGES, process_workbook
+from pipeline.stages import StageGraph
+from sheets.factors_loader import load_factors_data
+from sheets.ingest import ingest_workbook
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+TIERS = {
+    "small": {"n_series": 4, "n_months": 36, "n_factors": 2},
+    "medium": {"n_series": 50, "n_months": 60, "n_factors": 10},
+    "large": {"n_series": 200, "n_months": 120, "n_factors": 40},
+}
+
+# Функція побудови аркуша → етап графа, який її викликає
+SHEET_BUILDERS = {
+    "create_sheet_start_parameters": "sheet_start_parameters",
+    "create_sheet_smoothed_data": "sheet_smoothed",
+    "create_sheet_seasonality": "sheet_seasonality",
+    "create_sheet_forecast": "sheet_trend",
+    "create_sheet_final_forecast": "sheet_final",
+    "create_visualization_sheets": "sheet_visualization",
+}
+
+
+def measure(fn, repeat: int) -> dict:
+    """
+    Час виконання (repeat запусків) і пік виділеної пам'яті.
+    Пік вимірюється окремим запуском під tracemalloc, щоб не спотворювати час.
+    """
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    try:
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "repeat": repeat,
+        "min": min(times),
+        "median": statistics.median(times),
+        "mean": statistics.fmean(times),
+        "peak_bytes": peak,
+    }
+
+
+def bench_tier(tier: str, spec: dict, repeat: int, client=None) -> list[dict]:
+    buffer = BytesIO()
+    # Рушій фіксований, щоб мітки backend у результатах відповідали виміряному шляху
+    form = {**generate_workbook(buffer, **spec), "output_backend": "openpyxl"}
+    content = buffer.getvalue()
+    params = build_params(form, "benchmark.xlsx")
+    results = []
+
+    def record(name, fn, backend=None):
+        entry = {"tier": tier, "name": name, "backend": backend, **measure(fn, repeat)}
+        results.append(entry)
+        print(f"  {name:<45} {backend or '':<10} median={entry['median'] * 1000:9.1f} мс  "
+              f"peak={entry['peak_bytes'] / 1024 ** 2:7.1f} МБ", flush=True)
+
+    print(f"[{tier}] {spec}, {len(content) / 1024:.0f} КБ", flush=True)
+
+    # Читання
+    factor_book = load_workbook(BytesIO(content), read_only=True, data_only=True)
+    try:
+        record("load_factors_data", lambda: load_factors_data(factor_book, params))
+    finally:
+        factor_book.close()
+    record("ingest_workbook", lambda: ingest_workbook(BytesIO(content), params))
+
+    # Аркуші: розрахунок і книга готуються один раз, вимірюється лише побудова аркуша
+    # Етап render тут не виконується, тому книга нікуди не зберігається
+    graph = StageGraph(WORKBOOK_STAGES, {"content": content, "params": params,
+                                         "n_forecast": params["season_length"], "output": os.devnull})
+    graph.run("final", "book")
+    for name, stage in SHEET_BUILDERS.items():
+        record(name, lambda stage=stage: graph.stages[stage].fn(graph), "openpyxl")
+
+    # Повний конвеєр в одному процесі
+    for backend in ("openpyxl", "xlsxwriter"):
+        backend_params = build_params({**form, "output_backend": backend}, "benchmark.xlsx")
+        record("process_workbook", lambda p=backend_params: process_workbook(content, p), backend)
+
+    # Повний шлях через HTTP і пул процесів (пам'ять воркера тут не видно — див. process_workbook)
+    if client is not None:
+        def post():
+            response = client.post("/process-excel/", files={"file": ("benchmark.xlsx", content)}, data=form)
+            response.raise_for_status()
+        record("process_excel", post, "openpyxl")
+
+    return results
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=Path(__file__).parent).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: dict, baseline_path: str):
+    """Відношення медіан поточного запуску до попереднього (>1 — повільніше)"""
+    baseline = json.loads(Path(baseline_path).read_text(encoding="utf-8"))
+    previous = {(r["tier"], r["name"], r["backend"]): r for r in baseline["results"]}
+    print(f"\nПорівняння з {baseline_path} (коміт {baseline.get('commit')}):")
+    for r in current["results"]:
+        old = previous.get((r["tier"], r["name"], r["backend"]))
+        if old is None:
+            continue
+        ratio = r["median"] / old["median"] if old["median"] else float("inf")
+        print(f"  {r['tier']:<7} {r['name']:<45} {r['backend'] or '':<10} "
+              f"{old['median'] * 1000:9.1f} → {r['median'] * 1000:9.1f} мс  ×{ratio:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарки конвеєра прогнозування")
+    parser.add_argument("--tiers", nargs="+", choices=list(TIERS), default=list(TIERS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-http", action="store_true", help="не вимірювати POST /process-excel/")
+    parser.add_argument("--output", help="файл результатів (за замовчуванням benchmarks/results/<час>-<коміт>.json)")
+    parser.add_argument("--compare", help="попередній файл результатів для порівняння")
+    args = parser.parse_args()
+
+    results = []
+    if args.no_http:
+        for tier in args.tiers:
+            results += bench_tier(tier, TIERS[tier], args.repeat)
+    else:
+        from fastapi.testclient import TestClient
+
+        with TestClient(app) as client:
+            for tier in args.tiers:
+                results += bench_tier(tier, TIERS[tier], args.repeat, client)
+
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "environment": {
+            "python": sys.version.split()[0],
+            "numpy": numpy.__version__,
+            "openpyxl": openpyxl.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "tiers": {tier: TIERS[tier] for tier in args.tiers},
+        "results": results,
+    }
+
+    output = Path(args.output) if args.output else \
+        RESULTS_DIR / f"{datetime.now():%Y%m%d-%H%M%S}-{commit or 'nogit'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"\nРезультати збережено: {output}")
+
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
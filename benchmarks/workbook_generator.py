@@ -0,0 +1,126 @@
+# benchmarks/workbook_generator.py
+import argparse
+import math
+import random
+
+from openpyxl import Workbook
+from openpyxl.utils import get_column_letter
+
+# Розмітка, на яку розраховані значення ExcelProcessParams за замовчуванням
+STAT_YEAR_COL = 2       # B
+STAT_MONTH_COL = 4      # D
+STAT_FIRST_COL = 7      # G
+STAT_TITLE_ROW = 3
+FACTOR_YEAR_COL = 2     # B
+FACTOR_MONTH_COL = 3    # C
+FACTOR_FIRST_COL = 5    # E
+FACTOR_DESC_ROW = 3
+FACTOR_TYPE_ROW = 4
+FACTOR_TITLE_ROW = 5
+FACTOR_FIRST_ROW = 6
+
+
+def _row(values: dict, width: int) -> list:
+    """{номер колонки: значення} → рядок для write_only-аркуша"""
+    row = [None] * width
+    for col, value in values.items():
+        row[col - 1] = value
+    return row
+
+
+def generate_workbook(output, n_series: int = 4, n_months: int = 36, n_factors: int = 2,
+                      missing_rate: float = 0.05, start_year: int = 2020, seed: int = 1) -> dict:
+    """
+    Синтетична книга з аркушами "Статистичні дані" та "Фактори впливу"
+    у розмітці ExcelProcessParams: тренд + річна сезонність + шум, частина
+    значень пропущена з імовірністю missing_rate. Фактори прив'язані до перших
+    n_factors рядів і заповнюють 12 місяців року прогнозу.
+    output — шлях або файловий об'єкт. Повертає параметри форми для цієї книги.
+    """
+    rng = random.Random(seed)
+    wb = Workbook(write_only=True)
+
+    # ------------------------------------------------ Статистичні дані
+    ws = wb.create_sheet("Статистичні дані")
+    headers = [f"Підрозділ {s + 1}" for s in range(n_series)]
+    width = STAT_FIRST_COL + n_series - 1
+
+    for _ in range(STAT_TITLE_ROW - 1):
+        ws.append([])
+    ws.append(_row({STAT_YEAR_COL: "Рік", STAT_MONTH_COL: "Місяць",
+                    **{STAT_FIRST_COL + s: h for s, h in enumerate(headers)}}, width))
+
+    levels = [rng.uniform(50, 5000) for _ in range(n_series)]
+    growth = [rng.uniform(-0.002, 0.01) for _ in range(n_series)]
+    amplitude = [rng.uniform(0.05, 0.3) for _ in range(n_series)]
+    phase = [rng.uniform(0, 2 * math.pi) for _ in range(n_series)]
+
+    for i in range(n_months):
+        row = {STAT_YEAR_COL: start_year + i // 12, STAT_MONTH_COL: i % 12 + 1}
+        for s in range(n_series):
+            if rng.random() < missing_rate:
+                continue
+            season = 1 + amplitude[s] * math.sin(2 * math.pi * (i % 12) / 12 + phase[s])
+            value = levels[s] * (1 + growth[s] * i) * season * rng.uniform(0.95, 1.05)
+            row[STAT_FIRST_COL + s] = round(value, 1)
+        ws.append(_row(row, width))
+
+    # ------------------------------------------------ Фактори впливу
+    wf = wb.create_sheet("Фактори впливу")
+    n_factors = max(1, min(n_factors, n_series))
+    width = FACTOR_FIRST_COL + n_factors - 1
+    types = ["коефіцієнт" if f % 2 == 0 else "одиниці" for f in range(n_factors)]
+
+    for _ in range(FACTOR_DESC_ROW - 1):
+        wf.append([])
+    wf.append(_row({FACTOR_FIRST_COL + f: f"Фактор {f + 1}" for f in range(n_factors)}, width))
+    wf.append(_row({FACTOR_FIRST_COL + f: types[f] for f in range(n_factors)}, width))
+    wf.append(_row({FACTOR_FIRST_COL + f: headers[f] for f in range(n_factors)}, width))
+
+    model_year = start_year + (n_months - 1) // 12 + 1
+    for m in range(12):
+        row = {FACTOR_YEAR_COL: model_year, FACTOR_MONTH_COL: m + 1}
+        for f in range(n_factors):
+            if rng.random() < missing_rate:
+                continue
+            if types[f] == "коефіцієнт":
+                row[FACTOR_FIRST_COL + f] = round(rng.uniform(0.9, 1.1), 2)
+            else:
+                row[FACTOR_FIRST_COL + f] = round(rng.uniform(-0.05, 0.1) * levels[f], 1)
+        wf.append(_row(row, width))
+
+    wb.save(output)
+
+    return {
+        "column_year": get_column_letter(STAT_YEAR_COL),
+        "column_month": get_column_letter(STAT_MONTH_COL),
+        "range_data": f"{get_column_letter(STAT_FIRST_COL)}-{get_column_letter(STAT_FIRST_COL + max(n_series, 2) - 1)}",
+        "row_title": STAT_TITLE_ROW,
+        "row_first_data": STAT_TITLE_ROW + 1,
+        "row_last_data": STAT_TITLE_ROW + n_months,
+        "factor_column_year": get_column_letter(FACTOR_YEAR_COL),
+        "factor_column_month": get_column_letter(FACTOR_MONTH_COL),
+        "factor_row_range_data": f"{get_column_letter(FACTOR_FIRST_COL)}-{get_column_letter(FACTOR_FIRST_COL + max(n_factors, 2) - 1)}",
+        "factor_row_description": FACTOR_DESC_ROW,
+        "factor_row_type": FACTOR_TYPE_ROW,
+        "factor_row_title": FACTOR_TITLE_ROW,
+        "factor_row_first_data": FACTOR_FIRST_ROW,
+        "factor_row_last_data": FACTOR_FIRST_ROW + 11,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Генератор синтетичних книг для бенчмарків")
+    parser.add_argument("output", help="шлях до .xlsx")
+    parser.add_argument("--series", type=int, default=4)
+    parser.add_argument("--months", type=int, default=36)
+    parser.add_argument("--factors", type=int, default=2)
+    parser.add_argument("--missing", type=float, default=0.05, help="частка пропущених значень")
+    parser.add_argument("--start-year", type=int, default=2020)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    form = generate_workbook(args.output, args.series, args.months, args.factors,
+                             args.missing, args.start_year, args.seed)
+    for key, value in form.items():
+        print(f"{key}={value}")
@@ -0,0 +1,144 @@
+# engine/backtest.py
+"""
+Бектест моделі з ковзною точкою відліку (rolling origin).
+
+Для кожної точки відліку T — кінця повного сезону історії — модель
+згладжування → сезонність → тренд → сезонний прогноз будується лише за першими
+T періодами, а прогноз порівнюється з фактом тих самих (рік, період).
+
+Робота спільна для всіх точок відліку:
+- згладжування: періоди i < T - k мають те саме вікно, що й у повній історії,
+  тому беруться з одного smooth(); для кожної точки перераховуються лише k періодів
+  біля краю — з тих самих префіксних сум;
+- моменти по періодах сезону (як у forecast_state): накопичувальні суми по періодах,
+  згрупованих за сезоном, дають моменти будь-якого префікса історії однією вибіркою;
+- усі точки відліку рахуються разом — окрема вісь у тих самих пакетних операціях.
+
+Тренд, як і в інкрементному оновленні, рахується з неокруглених десезоналізованих
+значень, тому від повного перерахунку може відрізнятися на соті частки (округлення).
+Фактори впливу не застосовуються: оцінюється сама модель (сезонний прогноз).
+"""
+import numpy as np
+
+from engine.forecast_engine import SEASON_LENGTH, ForecastEngine, round_half_up, season_index, smooth, smoothing_windows
+from engine.forecast_state import MOMENTS, moments_forecast
+
+
+def backtest_origins(months, season_length: int, min_history: int) -> np.ndarray:
+    """Довжини історії для точок відліку: кінець кожного повного сезону, для якого є хоча б один факт"""
+    months = np.asarray(months, dtype=int)
+    origins = np.flatnonzero(months == season_length) + 1
+    return origins[(origins >= max(min_history, 2)) & (origins < len(months))]
+
+
+def _prefix_moments(contributions: dict, season: np.ndarray, season_length: int,
+                    lengths: np.ndarray) -> dict[str, np.ndarray]:
+    """
+    Моменти (сезон × префікси × ряди) для префіксів історії довжини lengths.
+    Періоди впорядковуються за сезоном (стабільно — за часом усередині сезону),
+    тому сума періодів сезону в префіксі — різниця двох накопичувальних сум.
+    """
+    order = np.argsort(season, kind="stable")
+    start = np.searchsorted(season[order], np.arange(season_length))
+
+    seen = np.zeros((len(season) + 1, season_length), dtype=int)
+    np.cumsum(np.eye(season_length, dtype=int)[season], axis=0, out=seen[1:])
+    index = start + seen[lengths]
+
+    moments = {}
+    for name, values in contributions.items():
+        cumulative = np.zeros((len(season) + 1, values.shape[1]))
+        np.cumsum(values[order], axis=0, out=cumulative[1:])
+        moments[name] = (cumulative[index] - cumulative[start]).transpose(1, 0, 2)
+    return moments
+
+
+def _contributions(smoothed: np.ndarray, x: np.ndarray) -> dict[str, np.ndarray]:
+    """Внесок згладжених періодів у моменти (NaN не враховуються)"""
+    mask = ~np.isnan(smoothed)
+    filled = np.where(mask, smoothed, 0.0)
+    return dict(zip(MOMENTS, (mask * 1.0, filled, mask * x, mask * x * x, filled * x)))
+
+
+def _error_metrics(error: np.ndarray, actual: np.ndarray, axis) -> dict[str, np.ndarray]:
+    """Кількість пар, MAE, MAPE (%, без нульових фактів) і зміщення (прогноз − факт) уздовж axis"""
+    present = ~np.isnan(error)
+    count = present.sum(axis=axis)
+    relative = present & (actual != 0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mae = np.where(present, np.abs(error), 0.0).sum(axis=axis) / count
+        bias = np.where(present, error, 0.0).sum(axis=axis) / count
+        ape = np.where(relative, np.abs(error) / np.abs(np.where(relative, actual, 1.0)), 0.0)
+        mape = 100.0 * ape.sum(axis=axis) / relative.sum(axis=axis)
+    return {
+        "count": count,
+        "mae": round_half_up(mae, 4),
+        "mape": round_half_up(mape, 4),
+        "bias": round_half_up(bias, 4),
+    }
+
+
+def backtest(values: np.ndarray, years, months, k: int, season_length: int = SEASON_LENGTH,
+             horizon: int = 0, min_history: int = 0) -> dict:
+    """
+    Бектест для всіх рядів (періоди × ряди) одночасно.
+    horizon — кроки прогнозу (0 — один сезон), min_history — найкоротша історія
+    для точки відліку (0 — два сезони).
+    Повертає точки відліку, прогнози й факти (точки × кроки × ряди) та метрики:
+    by_horizon — по кроках і рядах, by_series — по рядах, overall — по кроках для всіх рядів.
+    """
+    values = np.asarray(values, dtype=float)
+    n = values.shape[0]
+    engine = ForecastEngine(k=k, n_forecast=horizon, season_length=season_length)
+    season = season_index(months, season_length)
+    origins = backtest_origins(months, season_length, min_history or 2 * season_length)
+    if not len(origins):
+        raise ValueError("Замало історії для бектесту: потрібен кінець повного сезону не раніше "
+                         "мінімальної історії, після якого є фактичні дані")
+
+    # Усталені періоди кожної точки відліку — зі згладжування повної історії
+    x = np.arange(1, n + 1, dtype=float)[:, None]
+    moments = _prefix_moments(_contributions(smooth(values, k), x), season, season_length,
+                              np.maximum(origins - k, 0))
+
+    # Край: k періодів перед точкою відліку з вікнами, обрізаними по її довжині історії
+    edge = origins[:, None] - k + np.arange(k)
+    inside = edge >= 0
+    edge = np.maximum(edge, 0)
+    start, end = smoothing_windows(origins[:, None], k, edge)
+
+    observed = ~np.isnan(values)
+    prefix_sum = np.zeros((n + 1, values.shape[1]))
+    prefix_cnt = np.zeros((n + 1, values.shape[1]))
+    np.cumsum(np.where(observed, values, 0.0), axis=0, out=prefix_sum[1:])
+    np.cumsum(observed, axis=0, out=prefix_cnt[1:])
+    window_cnt = prefix_cnt[end] - prefix_cnt[start]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        edge_smoothed = round_half_up((prefix_sum[end] - prefix_sum[start]) / window_cnt, 2)
+    edge_smoothed = np.where(observed[edge] & inside[..., None] & (window_cnt > 0), edge_smoothed, np.nan)
+
+    position = (season[edge], np.arange(len(origins))[:, None])
+    for name, contribution in _contributions(edge_smoothed, (edge + 1.0)[..., None]).items():
+        np.add.at(moments[name], position, contribution)
+
+    forecast = moments_forecast(moments, origins.astype(float), engine.forecast_months())
+    predicted = forecast["seasonal_forecast"].transpose(1, 0, 2)
+
+    # Факт для кожного кроку — рядок історії з тим самим (рік, період)
+    rows = {(int(y), int(m)): i for i, (y, m) in enumerate(zip(years, months))}
+    model_years = np.asarray(years, dtype=int)[origins - 1] + 1
+    offsets, periods = engine.forecast_periods(0)
+    index = np.array([[rows.get((int(year + dy), int(m)), -1) for dy, m in zip(offsets, periods)]
+                      for year in model_years], dtype=int).reshape(len(origins), -1)
+    actual = np.where((index >= 0)[..., None], values[index], np.nan)
+
+    error = predicted - actual
+    return {
+        "origins": origins,
+        "model_years": model_years,
+        "forecast": predicted,
+        "actual": actual,
+        "by_horizon": _error_metrics(error, actual, axis=0),
+        "by_series": _error_metrics(error, actual, axis=(0, 1)),
+        "overall": _error_metrics(error, actual, axis=(0, 2)),
+    }
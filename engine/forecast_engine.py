@@ -0,0 +1,330 @@
+# engine/forecast_engine.py
+from dataclasses import dataclass, field, fields
+
+import numpy as np
+
+# Довжина сезону за замовчуванням: 12 — місяці, 4 — квартали, 52 — тижні
+SEASON_LENGTH = 12
+
+
+@dataclass
+class ForecastResult:
+    """
+    Результати розрахунку для всіх рядів одночасно.
+    Усі матриці мають форму (періоди × ряди), пропуски — NaN.
+    Поля етапів, які не виконувались, лишаються None.
+    """
+    values: np.ndarray | None = None              # сирі дані
+    smoothed: np.ndarray | None = None            # згладжені дані
+    unnormalized: np.ndarray | None = None        # ненормовані сезонні коефіцієнти (сезон × ряди)
+    seasonal: np.ndarray | None = None            # нормовані сезонні коефіцієнти (сезон × ряди)
+    deseasoned: np.ndarray | None = None          # десезоналізовані дані
+    intercept: np.ndarray | None = None           # A для кожного ряду
+    slope: np.ndarray | None = None               # B для кожного ряду
+    trend_hist: np.ndarray | None = None          # тренд на історичних періодах
+    trend_forecast: np.ndarray | None = None      # тренд на горизонті прогнозу
+    seasonal_forecast: np.ndarray | None = None   # тренд × сезонний коефіцієнт
+    final: np.ndarray | None = None               # фінальний прогноз з факторами
+    factors: list = field(default_factory=list)   # фактори, зіставлені з кожним рядом
+
+    def select(self, columns: slice | list[int]) -> "ForecastResult":
+        """
+        Результати лише для частини рядів: зріз колонок (матриці — без копіювання)
+        або список номерів рядів у потрібному порядку.
+        """
+        selected = {}
+        for f in fields(self):
+            value = getattr(self, f.name)
+            if value is None:
+                selected[f.name] = None
+            elif f.name == "factors":
+                selected[f.name] = value[columns] if isinstance(columns, slice) else [value[i] for i in columns]
+            else:
+                selected[f.name] = value[columns] if value.ndim == 1 else value[:, columns]
+        return ForecastResult(**selected)
+
+
+def to_cells(values) -> list:
+    """Рядок масиву → список значень для клітинок (NaN → None)"""
+    return [None if v != v else v for v in np.asarray(values, dtype=float).tolist()]
+
+
+def round_half_up(values, decimals: int) -> np.ndarray:
+    """
+    Округлення з половиною від нуля (як ROUND в Excel).
+    Допуск у 1e-9 відносної похибки робить результат незалежним
+    від порядку підсумовування (префіксні суми, пакетні операції).
+    """
+    values = np.asarray(values, dtype=float)
+    scale = 10.0 ** decimals
+    scaled = np.abs(values) * scale
+    rounded = np.floor(scaled + 0.5 + 1e-9 * np.maximum(scaled, 1.0))
+    return np.copysign(rounded / scale, values)
+
+
+def smoothing_windows(n, k: int, i: np.ndarray | None = None) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Межі вікна [start, end) для кожного періоду.
+    На краях вікно симетрично звужується (i < k та i >= n - k).
+    i — номери періодів (за замовчуванням 0..n-1); n може бути масивом,
+    що транслюється з i, — вікна для кількох довжин історії одразу.
+    """
+    i = np.arange(n) if i is None else i
+    start = np.where(i < k, 0, np.where(i >= n - k, np.maximum(0, 2 * i - n + 1), i - k))
+    end = np.where(i < k, np.minimum(2 * i + 1, n), np.where(i >= n - k, n, i + k + 1))
+    return start, end
+
+
+def smooth(values: np.ndarray, k: int) -> np.ndarray:
+    """
+    Центроване ковзне середнє з вікном 2k+1 для всіх рядів одночасно.
+    Суми вікон беруться з префіксних сум і префіксних лічильників,
+    тому час роботи не залежить від k. Пропуски (NaN) не враховуються.
+    """
+    n = values.shape[0]
+    mask = ~np.isnan(values)
+    filled = np.where(mask, values, 0.0)
+
+    prefix_sum = np.zeros((n + 1, values.shape[1]))
+    prefix_cnt = np.zeros((n + 1, values.shape[1]), dtype=np.int64)
+    np.cumsum(filled, axis=0, out=prefix_sum[1:])
+    np.cumsum(mask, axis=0, out=prefix_cnt[1:])
+
+    start, end = smoothing_windows(n, k)
+    window_sum = prefix_sum[end] - prefix_sum[start]
+    window_cnt = prefix_cnt[end] - prefix_cnt[start]
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        out = np.where(mask & (window_cnt > 0), window_sum / np.maximum(window_cnt, 1), np.nan)
+    return round_half_up(out, 2)
+
+
+def season_index(months, season_length: int = SEASON_LENGTH) -> np.ndarray:
+    """Номери періодів сезону (1..season_length) → індекси 0..season_length-1"""
+    index = np.asarray(months, dtype=int) - 1
+    if index.size and (index.min() < 0 or index.max() >= season_length):
+        raise ValueError(f"Номер періоду сезону має бути в діапазоні 1–{season_length}")
+    return index
+
+
+def seasonal_coefficients(smoothed: np.ndarray, months,
+                          season_length: int = SEASON_LENGTH) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Сезонні коефіцієнти по періодах сезону: (ненормовані, нормовані).
+    Суми й кількості по періодах для всіх рядів — групова редукція одним
+    множенням на матрицю належності (період сезону × період історії),
+    без циклу по періодах сезону.
+    Нормовані коефіцієнти в сумі дають season_length для кожного ряду.
+    """
+    index = season_index(months, season_length)
+    mask = ~np.isnan(smoothed)
+    filled = np.where(mask, smoothed, 0.0)
+
+    membership = np.zeros((season_length, len(index)))
+    membership[index, np.arange(len(index))] = 1.0
+    sums = membership @ filled
+    counts = membership @ mask
+
+    return seasonal_from_sums(sums, counts, filled.sum(axis=0), mask.sum(axis=0))
+
+
+def seasonal_from_sums(sums: np.ndarray, counts: np.ndarray, total_sum: np.ndarray,
+                       total_count: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Сезонні коефіцієнти з накопичених сум і кількостей (сезон × ряди):
+    середнє періоду / загальне середнє, нормоване до суми season_length.
+    """
+    season_length = sums.shape[0]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        overall_avg = np.where(total_count > 0, total_sum / np.maximum(total_count, 1), np.nan)
+        valid = (counts > 0) & ~np.isnan(overall_avg) & (overall_avg != 0)
+        unnormalized = np.where(valid, sums / np.maximum(counts, 1) / overall_avg, 1.0)
+
+    # Нормалізація: сума за сезон = season_length
+    S = unnormalized.sum(axis=0)
+    N = np.where(S != 0, season_length / np.where(S != 0, S, 1.0), 1.0)
+    normalized = round_half_up(unnormalized * N, 4)
+
+    return unnormalized, normalized
+
+
+def deseasonalize(smoothed: np.ndarray, seasonal: np.ndarray, months) -> np.ndarray:
+    """Ділить згладжені дані на сезонний коефіцієнт відповідного періоду сезону"""
+    coeffs = seasonal[season_index(months, seasonal.shape[0])]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        out = np.where(coeffs != 0, smoothed / np.where(coeffs != 0, coeffs, 1.0), np.nan)
+    return round_half_up(out, 2)
+
+
+def fit_trend(deseasoned: np.ndarray, n_forecast: int) -> tuple[np.ndarray, ...]:
+    """
+    Лінійний тренд A + B·t для всіх рядів одночасно (МНК у замкненій формі).
+    t — справжній номер періоду: пропуски (NaN) виключаються маскою,
+    а не стисканням ряду, тому періоди після пропуску не зсуваються.
+    Ряди, де менше двох значень, отримують A = B = 0.
+    Повертає (A, B, тренд на історії, тренд на горизонті прогнозу).
+    """
+    n_hist = deseasoned.shape[0]
+    x_hist = np.arange(1, n_hist + 1, dtype=float)
+    x_forecast = np.arange(n_hist + 1, n_hist + n_forecast + 1, dtype=float)
+
+    mask = ~np.isnan(deseasoned)
+    counts = mask.sum(axis=0)
+    fitted = counts >= 2
+    n = np.maximum(counts, 1)
+
+    # Центрування за середніми кожного ряду — стійкіше за суми Σx², Σxy
+    x_mean = (mask * x_hist[:, None]).sum(axis=0) / n
+    y_mean = np.where(mask, deseasoned, 0.0).sum(axis=0) / n
+    dx = np.where(mask, x_hist[:, None] - x_mean, 0.0)
+    dy = np.where(mask, deseasoned - y_mean, 0.0)
+    sxx = (dx * dx).sum(axis=0)
+    sxy = (dx * dy).sum(axis=0)
+
+    slope = np.where(fitted & (sxx > 0), sxy / np.where(sxx > 0, sxx, 1.0), 0.0)
+    intercept = np.where(fitted, y_mean - slope * x_mean, 0.0)
+
+    trend_hist = round_half_up(intercept + np.outer(x_hist, slope), 2)
+    trend_forecast = round_half_up(intercept + np.outer(x_forecast, slope), 2)
+    return intercept, slope, trend_hist, trend_forecast
+
+
+def _period_key(year, month) -> tuple[int, int] | None:
+    """(рік, період) як ключ з'єднання; None — рядок без коректного року чи періоду"""
+    try:
+        return int(year), int(month)
+    except (TypeError, ValueError):
+        return None
+
+
+def _join_rows(years, months, periods, n_forecast: int) -> np.ndarray:
+    """
+    Хеш-з'єднання таблиці факторів з горизонтом прогнозу за (рік, період):
+    номер рядка таблиці для кожного періоду горизонту, -1 — періоду в таблиці немає.
+    Без років/періодів у таблиці (або без periods) рядки йдуть позиційно з першого періоду.
+    """
+    positional = np.arange(n_forecast)
+    if periods is None or not years or not months:
+        return positional
+
+    rows = {}
+    for i, key in enumerate(map(_period_key, years, months)):
+        if key is not None:
+            rows[key] = i
+    if not rows:
+        return positional
+    return np.array([rows.get(key, -1) for key in zip(*(p.tolist() for p in periods))], dtype=int)
+
+
+def match_factors(headers: list[str], factors_data: list[dict], n_forecast: int,
+                  periods: tuple[np.ndarray, np.ndarray] | None = None) -> list[list[dict]]:
+    """
+    Зіставляє фактори впливу з рядами за нормалізованою назвою заголовка.
+    periods — (роки, періоди) горизонту прогнозу: значення факторів вибираються
+    за роком і періодом рядка таблиці (хеш-з'єднання, лінійний час); без них або
+    без років/періодів у факторі — позиційно. Відсутні значення — NaN.
+    """
+    index = {h.strip().lower().replace(" ", ""): s for s, h in enumerate(headers)}
+    matched = [[] for _ in headers]
+    selected = [(index[key], f) for f in factors_data or []
+                if (key := f["header"].strip().lower().replace(" ", "")) in index]
+    if not selected:
+        return matched
+
+    # Таблиця (рядки × фактори); останній рядок — NaN, на нього вказує -1 з'єднання
+    n_rows = max(len(f["data"]) for _, f in selected)
+    table = np.full((max(n_rows, n_forecast) + 1, len(selected)), np.nan)
+    for j, (_, f) in enumerate(selected):
+        table[:len(f["data"]), j] = np.array(f["data"], dtype=float)
+
+    # Фактори з одного аркуша мають однакові роки/періоди — з'єднання рахується раз на таблицю
+    joins = {}
+    rows = np.empty((n_forecast, len(selected)), dtype=int)
+    for j, (_, f) in enumerate(selected):
+        key = (tuple(f.get("years") or ()), tuple(f.get("months") or ()))
+        if key not in joins:
+            joins[key] = _join_rows(f.get("years"), f.get("months"), periods, n_forecast)
+        rows[:, j] = joins[key]
+    values = table[rows, np.arange(len(selected))]
+
+    for j, (s, f) in enumerate(selected):
+        matched[s].append({
+            "desc": f["description"],
+            "type": f["type"],
+            "values": values[:, j],
+        })
+    return matched
+
+
+def apply_factors(seasonal_forecast: np.ndarray, factors: list[list[dict]]) -> np.ndarray:
+    """
+    Застосовує фактори до всіх рядів одразу: "коефіцієнт" — множення, "одиниці" — додавання
+    (прогноз × добуток коефіцієнтів ряду + сума одиниць); пропуски не змінюють прогноз.
+    Округлення до 0.01 — один раз, після всіх факторів.
+    """
+    flat = [(s, f) for s, series_factors in enumerate(factors) for f in series_factors]
+    if not flat:
+        return seasonal_forecast.copy()
+
+    values = np.column_stack([f["values"] for _, f in flat])
+    series = np.array([s for s, _ in flat])
+    coefficient = np.array([f["type"] == "коефіцієнт" for _, f in flat])
+
+    # ufunc.at накопичує кілька факторів одного ряду (індекси рядів повторюються)
+    scale = np.ones_like(seasonal_forecast)
+    shift = np.zeros_like(seasonal_forecast)
+    np.multiply.at(scale.T, series[coefficient], np.nan_to_num(values[:, coefficient], nan=1.0).T)
+    np.add.at(shift.T, series[~coefficient], np.nan_to_num(values[:, ~coefficient], nan=0.0).T)
+    return round_half_up(seasonal_forecast * scale + shift, 2)
+
+
+class ForecastEngine:
+    """
+    Обчислювальне ядро прогнозу без залежності від openpyxl:
+    згладжування → сезонність → тренд → фактори → фінальний прогноз.
+    """
+
+    def __init__(self, k: int = 2, n_forecast: int | None = None, season_length: int = SEASON_LENGTH):
+        self.k = k
+        self.season_length = season_length
+        # Горизонт за замовчуванням — один повний сезон
+        self.n_forecast = n_forecast or season_length
+
+    def forecast_months(self) -> np.ndarray:
+        """Номери періодів сезону на горизонті прогнозу (прогноз починається з першого періоду)"""
+        return np.arange(self.n_forecast) % self.season_length + 1
+
+    def forecast_periods(self, model_year: int) -> tuple[np.ndarray, np.ndarray]:
+        """(роки, періоди) горизонту прогнозу, що починається з першого періоду model_year"""
+        return model_year + np.arange(self.n_forecast) // self.season_length, self.forecast_months()
+
+    def run(self, values: np.ndarray, months, headers: list[str] | None = None,
+            factors_data: list[dict] | None = None, model_year: int | None = None) -> ForecastResult:
+        values = np.asarray(values, dtype=float)
+        headers = headers or []
+
+        smoothed = smooth(values, self.k)
+        unnormalized, seasonal = seasonal_coefficients(smoothed, months, self.season_length)
+        deseasoned = deseasonalize(smoothed, seasonal, months)
+        intercept, slope, trend_hist, trend_forecast = fit_trend(deseasoned, self.n_forecast)
+
+        seasonal_forecast = round_half_up(trend_forecast * seasonal[self.forecast_months() - 1], 2)
+        periods = self.forecast_periods(model_year) if model_year is not None else None
+        factors = (match_factors(headers, factors_data, self.n_forecast, periods) if headers
+                   else [[] for _ in range(values.shape[1])])
+        final = apply_factors(seasonal_forecast, factors)
+
+        return ForecastResult(
+            values=values,
+            smoothed=smoothed,
+            unnormalized=unnormalized,
+            seasonal=seasonal,
+            deseasoned=deseasoned,
+            intercept=intercept,
+            slope=slope,
+            trend_hist=trend_hist,
+            trend_forecast=trend_forecast,
+            seasonal_forecast=seasonal_forecast,
+            final=final,
+            factors=factors,
+        )
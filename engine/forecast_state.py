@@ -0,0 +1,206 @@
+# engine/forecast_state.py
+"""
+Інкрементне оновлення прогнозу за збереженим станом.
+
+Стан — компактний JSON з достатніми статистиками історії:
+- хвіст сирих даних (останні 2k періодів) — лише він потрібен, щоб
+  перерахувати згладжування біля краю, де вікно змінюється з новими даними;
+- моменти по періодах сезону (сезон × ряди) для "усталених" періодів,
+  чиє згладжене значення вже не зміниться: кількість, Σs, Σx, Σx², Σx·s
+  (s — згладжене значення, x — номер періоду). З них виходять і сезонні
+  коефіцієнти (Σs / кількість), і моменти регресії тренду для десезоналізованих
+  даних (s / c — сезонний коефіцієнт спільний для всього періоду сезону).
+
+Оновлення обробляє лише нові періоди та хвіст, тому час не залежить від довжини історії.
+Тренд рахується з неокруглених десезоналізованих значень, тож від повного
+перерахунку може відрізнятися в межах округлення до 0.01.
+"""
+import numpy as np
+
+from engine.forecast_engine import (
+    SEASON_LENGTH, ForecastEngine, ForecastResult, apply_factors, match_factors,
+    round_half_up, season_index, seasonal_from_sums, smooth, to_cells,
+)
+
+STATE_VERSION = 1
+MOMENTS = ("count", "sum", "sum_x", "sum_xx", "sum_xs")
+
+
+def empty_state(headers: list[str], k: int, season_length: int = SEASON_LENGTH) -> dict:
+    """Стан без історії: з нього update_state будує стан за повними даними"""
+    return {
+        "version": STATE_VERSION,
+        "k": k,
+        "season_length": season_length,
+        "headers": list(headers),
+        "n_periods": 0,
+        "n_settled": 0,
+        "last_year": None,
+        "last_month": None,
+        "tail": {"years": [], "months": [], "values": []},
+        "moments": {name: np.zeros((season_length, len(headers))).tolist() for name in MOMENTS},
+    }
+
+
+def _moments(state: dict) -> dict[str, np.ndarray]:
+    return {name: np.array(state["moments"][name], dtype=float) for name in MOMENTS}
+
+
+def _tail(state: dict) -> np.ndarray:
+    return np.array(state["tail"]["values"], dtype=float).reshape(-1, len(state["headers"]))
+
+
+def _accumulate(moments: dict, smoothed: np.ndarray, x: np.ndarray, index: np.ndarray):
+    """Додає згладжені періоди до моментів їхніх періодів сезону"""
+    mask = ~np.isnan(smoothed)
+    filled = np.where(mask, smoothed, 0.0)
+    x = x[:, None]
+
+    membership = np.zeros((moments["count"].shape[0], len(index)))
+    membership[index, np.arange(len(index))] = 1.0
+    moments["count"] += membership @ mask
+    moments["sum"] += membership @ filled
+    moments["sum_x"] += membership @ (mask * x)
+    moments["sum_xx"] += membership @ (mask * x * x)
+    moments["sum_xs"] += membership @ (filled * x)
+
+
+def _check_continuity(state: dict, years: list[int], months: list[int]):
+    """Нові періоди мають іти одразу за останнім періодом стану"""
+    if state["last_month"] is None:
+        return
+    expected_month = state["last_month"] % state["season_length"] + 1
+    expected_year = state["last_year"] + (expected_month == 1)
+    if (int(years[0]), int(months[0])) != (expected_year, expected_month):
+        raise ValueError(f"Нові дані мають починатися з періоду {expected_year}-{expected_month:02d}, "
+                         f"отримано {int(years[0])}-{int(months[0]):02d}")
+
+
+def update_state(state: dict, years: list[int], months: list[int], values: np.ndarray) -> dict:
+    """
+    Додає нові періоди до стану й повертає новий стан.
+    Згладжування перераховується лише для хвоста й нових періодів; періоди,
+    чиє вікно вже не зміниться, переходять до моментів.
+    """
+    k = state["k"]
+    season_length = state["season_length"]
+    values = np.asarray(values, dtype=float).reshape(len(years), len(state["headers"]))
+    season_index(months, season_length)
+    _check_continuity(state, years, months)
+
+    tail = _tail(state)
+    window = np.vstack([tail, values])
+    window_years = state["tail"]["years"] + [int(y) for y in years]
+    window_months = state["tail"]["months"] + [int(m) for m in months]
+
+    # Хвіст містить k періодів перед неусталеними (або всю історію),
+    # тому згладжування вікна для них збігається з повним
+    n_old = state["n_periods"]
+    n_new = n_old + len(years)
+    n_settled = max(n_new - k, 0)
+    first = len(tail) - (n_old - state["n_settled"])
+    last = len(window) - (n_new - n_settled)
+    offset = n_old - len(tail)
+
+    moments = _moments(state)
+    if last > first:
+        smoothed = smooth(window, k)[first:last]
+        _accumulate(moments, smoothed, offset + np.arange(first, last) + 1.0,
+                    season_index(window_months[first:last], season_length))
+
+    keep = len(window) - min(n_new, 2 * k)
+    return {
+        **state,
+        "n_periods": n_new,
+        "n_settled": n_settled,
+        "last_year": int(years[-1]),
+        "last_month": int(months[-1]),
+        "tail": {
+            "years": window_years[keep:],
+            "months": window_months[keep:],
+            "values": [to_cells(row) for row in window[keep:]],
+        },
+        "moments": {name: moments[name].tolist() for name in MOMENTS},
+    }
+
+
+def build_state(headers: list[str], years: list[int], months: list[int], values: np.ndarray,
+                k: int, season_length: int = SEASON_LENGTH) -> dict:
+    """Стан за повною історією"""
+    return update_state(empty_state(headers, k, season_length), years, months, values)
+
+
+def edge_smoothed(state: dict) -> tuple[list[dict], np.ndarray]:
+    """Періоди біля краю, чиє згладжування ще зміниться, та їхні згладжені значення"""
+    n_unsettled = state["n_periods"] - state["n_settled"]
+    tail = _tail(state)
+    first = len(tail) - n_unsettled
+    periods = [{"year": y, "month": m}
+               for y, m in zip(state["tail"]["years"][first:], state["tail"]["months"][first:])]
+    return periods, smooth(tail, state["k"])[first:]
+
+
+def moments_forecast(moments: dict, n_hist, forecast_months: np.ndarray) -> dict[str, np.ndarray]:
+    """
+    Сезонні коефіцієнти, тренд і сезонний прогноз з моментів (сезон × ...).
+    Перша вісь моментів — період сезону, решта — довільні (ряди або точки відліку × ряди);
+    n_hist — довжина історії, скаляр або масив для другої осі.
+    """
+    counts, sums = moments["count"], moments["sum"]
+    unnormalized, seasonal = seasonal_from_sums(sums, counts, sums.sum(axis=0), counts.sum(axis=0))
+
+    # Моменти регресії для десезоналізованих s / c; періоди з c = 0 виключаються (як NaN у повному розрахунку)
+    valid = seasonal != 0
+    inverse = np.where(valid, 1.0 / np.where(valid, seasonal, 1.0), 0.0)
+    n = (counts * valid).sum(axis=0)
+    sx = (moments["sum_x"] * valid).sum(axis=0)
+    sxx = (moments["sum_xx"] * valid).sum(axis=0)
+    sy = (sums * inverse).sum(axis=0)
+    sxy = (moments["sum_xs"] * inverse).sum(axis=0)
+
+    fitted = n >= 2
+    x_mean = sx / np.maximum(n, 1)
+    y_mean = sy / np.maximum(n, 1)
+    vxx = sxx - sx * x_mean
+    vxy = sxy - sx * y_mean
+    slope = np.where(fitted & (vxx > 0), vxy / np.where(vxx > 0, vxx, 1.0), 0.0)
+    intercept = np.where(fitted, y_mean - slope * x_mean, 0.0)
+
+    x_forecast = np.add.outer(np.arange(1, len(forecast_months) + 1, dtype=float), n_hist)
+    trend_forecast = round_half_up(intercept + x_forecast[..., None] * slope, 2)
+    return {
+        "unnormalized": unnormalized,
+        "seasonal": seasonal,
+        "intercept": intercept,
+        "slope": slope,
+        "trend_forecast": trend_forecast,
+        "seasonal_forecast": round_half_up(trend_forecast * seasonal[forecast_months - 1], 2),
+    }
+
+
+def state_result(state: dict, n_forecast: int | None = None,
+                 factors_data: list[dict] | None = None) -> ForecastResult:
+    """
+    Прогноз зі стану: моменти усталених періодів + внесок неусталеного хвоста.
+    Заповнює сезонні коефіцієнти, тренд (A, B, горизонт), сезонний і фінальний прогноз.
+    """
+    season_length = state["season_length"]
+    engine = ForecastEngine(k=state["k"], n_forecast=n_forecast, season_length=season_length)
+    n_hist = state["n_periods"]
+
+    moments = _moments(state)
+    periods, smoothed = edge_smoothed(state)
+    if periods:
+        _accumulate(moments, smoothed, n_hist - len(periods) + np.arange(len(periods)) + 1.0,
+                    season_index([p["month"] for p in periods], season_length))
+
+    forecast = moments_forecast(moments, float(n_hist), engine.forecast_months())
+
+    headers = state["headers"]
+    periods = engine.forecast_periods(state["last_year"] + 1) if state["last_year"] is not None else None
+    factors = match_factors(headers, factors_data, engine.n_forecast, periods)
+    return ForecastResult(
+        **forecast,
+        final=apply_factors(forecast["seasonal_forecast"], factors),
+        factors=factors,
+    )
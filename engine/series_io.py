@@ -0,0 +1,207 @@
+# engine/series_io.py
+import csv
+import io
+
+import numpy as np
+
+from engine.backtest import backtest
+from engine.forecast_engine import ForecastEngine, ForecastResult, to_cells
+from engine.forecast_state import build_state, edge_smoothed, state_result, update_state
+
+
+def _to_number(value: str):
+    value = value.strip().replace("\u00a0", "").replace(" ", "")
+    if value == "":
+        return None
+    return float(value.replace(",", "."))
+
+
+def parse_series_csv(text: str) -> dict:
+    """
+    CSV з історією → поля ForecastRequest.
+    Перший рядок — заголовки: рік, місяць, далі назви рядів.
+    Роздільник (кома або крапка з комою) визначається автоматично;
+    десяткова кома допускається, порожня клітинка — пропуск.
+    """
+    try:
+        dialect = csv.Sniffer().sniff(text[:4096], delimiters=",;\t")
+    except csv.Error:
+        dialect = csv.excel
+
+    rows = [row for row in csv.reader(io.StringIO(text), dialect) if any(cell.strip() for cell in row)]
+    if len(rows) < 2 or len(rows[0]) < 3:
+        raise ValueError("CSV має містити рядок заголовків (рік, місяць, ряди) і хоча б один рядок даних")
+
+    headers = [h.strip() for h in rows[0][2:]]
+    years, months = [], []
+    series = {h: [] for h in headers}
+
+    for line, row in enumerate(rows[1:], start=2):
+        row = row + [""] * (len(rows[0]) - len(row))
+        try:
+            years.append(int(_to_number(row[0])))
+            months.append(int(_to_number(row[1])))
+            for h, cell in zip(headers, row[2:]):
+                series[h].append(_to_number(cell))
+        except (TypeError, ValueError):
+            raise ValueError(f"Рядок {line}: некоректне число")
+
+    return {"years": years, "months": months, "series": series}
+
+
+def run_forecast(request) -> tuple[ForecastResult, int]:
+    """
+    Розрахунок для провалідованого ForecastRequest без участі openpyxl.
+    Повертає (ForecastResult, рік прогнозу).
+    """
+    headers = list(request.series)
+    values = np.array([request.series[h] for h in headers], dtype=float).T
+    factors_data = [f.model_dump() for f in request.factors]
+
+    model_year = request.years[-1] + 1
+    engine = ForecastEngine(k=request.k, n_forecast=request.horizon, season_length=request.season_length)
+    result = engine.run(values, request.months, headers, factors_data, model_year)
+    return result, model_year
+
+
+def forecast_payload(request, result: ForecastResult, model_year: int) -> dict:
+    """ForecastResult → JSON-відповідь (по кожному ряду; пропуски → null)"""
+    season_length = result.seasonal.shape[0]
+    months = ForecastEngine(n_forecast=result.trend_forecast.shape[0], season_length=season_length).forecast_months()
+    forecast_periods = [
+        {"year": model_year + i // season_length, "month": int(m)} for i, m in enumerate(months)
+    ]
+
+    series = {}
+    for s, header in enumerate(request.series):
+        series[header] = {
+            "smoothed": to_cells(result.smoothed[:, s]),
+            "seasonal_unnormalized": to_cells(result.unnormalized[:, s]),
+            "seasonal": to_cells(result.seasonal[:, s]),
+            "deseasoned": to_cells(result.deseasoned[:, s]),
+            "trend": {
+                "intercept": float(result.intercept[s]),
+                "slope": float(result.slope[s]),
+                "history": to_cells(result.trend_hist[:, s]),
+                "forecast": to_cells(result.trend_forecast[:, s]),
+            },
+            "seasonal_forecast": to_cells(result.seasonal_forecast[:, s]),
+            "factors": [
+                {"description": f["desc"], "type": f["type"], "values": to_cells(f["values"])}
+                for f in result.factors[s]
+            ],
+            "final": to_cells(result.final[:, s]),
+        }
+
+    return {
+        "k": request.k,
+        "season_length": season_length,
+        "model_year": model_year,
+        "periods": [{"year": y, "month": m} for y, m in zip(request.years, request.months)],
+        "forecast_periods": forecast_periods,
+        "series": series,
+    }
+
+
+def _series_matrix(request, headers: list[str]) -> np.ndarray:
+    return np.array([request.series[h] for h in headers], dtype=float).T
+
+
+def forecast_state(request) -> dict:
+    """Стан для інкрементних оновлень за повною історією ForecastRequest"""
+    headers = list(request.series)
+    return build_state(headers, request.years, request.months, _series_matrix(request, headers),
+                       request.k, request.season_length)
+
+
+def run_update(request) -> tuple[ForecastResult, dict]:
+    """
+    ForecastUpdateRequest: нові періоди + стан → (прогноз, новий стан).
+    Історія не перераховується — лише хвіст згладжування й нові періоди.
+    """
+    state = request.state.model_dump()
+    state = update_state(state, request.years, request.months, _series_matrix(request, state["headers"]))
+    factors_data = [f.model_dump() for f in request.factors]
+    return state_result(state, n_forecast=request.horizon, factors_data=factors_data), state
+
+
+def update_payload(state: dict, result: ForecastResult) -> dict:
+    """Відповідь /forecast/update: прогноз, перераховане згладжування біля краю та новий стан"""
+    season_length = state["season_length"]
+    model_year = state["last_year"] + 1
+    months = ForecastEngine(n_forecast=result.final.shape[0], season_length=season_length).forecast_months()
+    edge_periods, edge_values = edge_smoothed(state)
+
+    series = {}
+    for s, header in enumerate(state["headers"]):
+        series[header] = {
+            "edge_smoothed": to_cells(edge_values[:, s]),
+            "seasonal_unnormalized": to_cells(result.unnormalized[:, s]),
+            "seasonal": to_cells(result.seasonal[:, s]),
+            "trend": {
+                "intercept": float(result.intercept[s]),
+                "slope": float(result.slope[s]),
+                "forecast": to_cells(result.trend_forecast[:, s]),
+            },
+            "seasonal_forecast": to_cells(result.seasonal_forecast[:, s]),
+            "factors": [
+                {"description": f["desc"], "type": f["type"], "values": to_cells(f["values"])}
+                for f in result.factors[s]
+            ],
+            "final": to_cells(result.final[:, s]),
+        }
+
+    return {
+        "k": state["k"],
+        "season_length": season_length,
+        "model_year": model_year,
+        "edge_periods": edge_periods,
+        "forecast_periods": [
+            {"year": model_year + i // season_length, "month": int(m)} for i, m in enumerate(months)
+        ],
+        "series": series,
+        "state": state,
+    }
+
+
+def run_backtest(request) -> dict:
+    """Бектест для провалідованого BacktestRequest (див. engine/backtest.py)"""
+    headers = list(request.series)
+    return backtest(_series_matrix(request, headers), request.years, request.months, request.k,
+                    request.season_length, request.horizon, request.min_history)
+
+
+def _metric_cells(metrics: dict, index=()) -> dict:
+    """Метрики бектесту для вибраного index → числа або списки (NaN → null)"""
+    cells = {}
+    for name, values in metrics.items():
+        value = np.asarray(values)[index]
+        if name == "count":
+            cells[name] = value.tolist()
+        else:
+            cells[name] = to_cells(value) if np.ndim(value) else to_cells([value])[0]
+    return cells
+
+
+def backtest_payload(request, result: dict) -> dict:
+    """Результат бектесту → JSON: точки відліку та метрики по рядах і кроках горизонту"""
+    series = {}
+    for s, header in enumerate(request.series):
+        series[header] = {
+            "overall": _metric_cells(result["by_series"], s),
+            "by_horizon": _metric_cells(result["by_horizon"], (slice(None), s)),
+        }
+
+    season_length = request.season_length
+    last = result["origins"] - 1
+    return {
+        "k": request.k,
+        "season_length": season_length,
+        "horizon": int(result["forecast"].shape[1]),
+        "origins": [
+            {"year": request.years[i], "month": request.months[i], "model_year": int(y)}
+            for i, y in zip(last.tolist(), result["model_years"])
+        ],
+        "overall": _metric_cells(result["overall"]),
+        "series": series,
+    }
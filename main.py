@@ -1,25 +1,67 @@
 # main.py
-from fastapi import FastAPI, File, UploadFile, Form, HTTPException
-from fastapi.responses import StreamingResponse
-from openpyxl import load_workbook
-from openpyxl.utils import column_index_from_string, get_column_letter
-from io import BytesIO
-
-from models.excel_params import ExcelProcessParams
-from sheets.start_parameters import create_sheet_start_parameters
-from sheets.smoothed_data import create_sheet_smoothed_data
-from sheets.seasonality import create_sheet_seasonality
-from sheets.forecast import create_sheet_forecast
-from sheets.factors_loader import load_factors_data
-from sheets.final_forecast import create_sheet_final_forecast
-from sheets.visualization import create_combined_visualization_from_columns
-
-app = FastAPI(title="Прогноз продажів")
+import asyncio
+import json
+import os
+import re
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import Depends, FastAPI, File, UploadFile, Form, Header, HTTPException, Request
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
+
+from engine.series_io import (
+    backtest_payload, forecast_payload, forecast_state, parse_series_csv, run_backtest, run_forecast,
+    run_update, update_payload,
+)
+from models.excel_params import OUTPUT_SHEETS, ExcelProcessParams, parse_column_ranges
+from models.forecast_request import BacktestRequest, ForecastRequest, ForecastUpdateRequest
+from pipeline.batch import expand_uploads, stream_batch
+from pipeline.cache import result_cache, result_cache_key
+from pipeline.executor import pipeline_executor
+from pipeline.jobs import job_store
+from pipeline.metrics import measure, server_timing, size_bucket, stage_metrics
+from pipeline.process import process_workbook, result_path
+from pipeline.uploads import UploadLimitMiddleware, UploadRoute, spool_upload
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    job_store.start()
+    sweeper = asyncio.create_task(job_store.sweep())
+    yield
+    sweeper.cancel()
+    pipeline_executor.shutdown()
+
+
+ENTITY_TAG = re.compile(r'(?:W/)?("[^"]*")')
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+app = FastAPI(title="Прогноз продажів", lifespan=lifespan)
+app.add_middleware(UploadLimitMiddleware)
+app.router.route_class = UploadRoute
+
+
+@app.get("/pipeline/status")
+async def pipeline_status():
+    """Глибина черги допуску та кількість задач у роботі"""
+    return pipeline_executor.stats()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Метрики у текстовому форматі Prometheus: гістограми етапів і стан пулу"""
+    stats = pipeline_executor.stats()
+    return stage_metrics.render({
+        "pipeline_workers": ("Кількість процесів у пулі", stats["workers"]),
+        "pipeline_queue_limit": ("Ліміт черги допуску", stats["queue_limit"]),
+        "pipeline_queue_depth": ("Задачі, що чекають на вільний процес", stats["queue_depth"]),
+        "pipeline_in_flight": ("Задачі, що зараз виконуються", stats["in_flight"]),
+    })
 
-@app.post("/process-excel/")
-async def process_excel(
-    file: UploadFile = File(...),
 
+def excel_form(
     # Статистичні дані
     column_year: str = Form("B"),
     column_month: str = Form("D"),
@@ -28,6 +70,8 @@ async def process_excel(
     row_first_data: int = Form(4),
     row_last_data: int = Form(38),
     k: int = Form(2),
+    season_length: int = Form(12),
+    horizon: int = Form(0),
 
     # Аркуші
     sheet_stat: str = Form("Статистичні дані"),
@@ -42,152 +86,283 @@ async def process_excel(
     factor_row_title: int = Form(5),
     factor_row_first_data: int = Form(6),
     factor_row_last_data: int = Form(17),
-):
+
+    # Вихідний файл: openpyxl (зберігає форматування вхідних аркушів),
+    # xlsxwriter (constant_memory, менше пам'яті для великих книг)
+    # або auto — xlsxwriter, якщо рядів більше, ніж уміщується на одному аркуші
+    output_backend: str = Form("auto"),
+    # Рівень стиснення .xlsx: 0 — швидше, але більший файл; 9 — менший файл ціною CPU
+    compression_level: int = Form(6),
+
+    # Аркуші результату через кому: start_parameters, smoothed, seasonality, trend, final,
+    # visualization (за замовчуванням — усі). Непотрібні етапи не виконуються
+    sheets: str = Form(",".join(OUTPUT_SHEETS)),
+
+    # Тисячі рядів: скільки рядів на одному аркуші (0 — автоматично)
+    series_per_sheet: int = Form(0),
+
+    # Візуалізація: скільки рядів отримують графік (0 — усі), як їх відбирати
+    # (volume — за обсягом історії, change — за зміною першого сезону прогнозу
+    # проти останнього сезону історії) і скільки графіків на аркуші
+    chart_budget: int = Form(0),
+    chart_rank: str = Form("volume"),
+    charts_per_sheet: int = Form(0),
+) -> dict:
+    """Параметри обробки з форми (спільні для одиночного та пакетного запиту)"""
+    return locals()
+
+
+def build_params(form: dict, filename: str) -> dict:
+    """
+    Перевірка файлу та ПОВНА ВАЛІДАЦІЯ ВСІХ ПАРАМЕТРІВ.
+    Повертає params_dict для конвеєра: ExcelProcessParams + номери колонок даних + назва файлу.
+    """
     # Перевірка формату файлу
-    if not file.filename.lower().endswith('.xlsx'):
+    if not filename.lower().endswith('.xlsx'):
         raise HTTPException(400, "Підтримуються тільки файли .xlsx")
 
-    content = await file.read()
-    workbook = load_workbook(filename=BytesIO(content))
-
-    # ПОВНА ВАЛІДАЦІЯ ВСІХ ПАРАМЕТРІВ 
     try:
-        params = ExcelProcessParams(
-            column_year=column_year,
-            column_month=column_month,
-            range_data=range_data,
-            row_title=row_title,
-            row_first_data=row_first_data,
-            row_last_data=row_last_data,
-            k=k,
-
-            sheet_stat=sheet_stat,
-            sheet_factor=sheet_factor,
-
-            factor_column_year=factor_column_year,
-            factor_column_month=factor_column_month,
-            factor_row_range_data=factor_row_range_data,
-            factor_row_description=factor_row_description,
-            factor_row_type=factor_row_type,
-            factor_row_title=factor_row_title,
-            factor_row_first_data=factor_row_first_data,
-            factor_row_last_data=factor_row_last_data,
-        )
+        params = ExcelProcessParams(**form)
     except ValueError as e:
         raise HTTPException(422, f"Помилка валідації: {e}")
 
     params_dict = params.model_dump()
 
-    #  Розрахунок колонок
-    col_start = column_index_from_string(params.range_data.split("-")[0])
-    col_end = column_index_from_string(params.range_data.split("-")[1])
+    #  Розрахунок колонок (діапазонів може бути кілька)
+    params_dict.update({
+        "data_columns": parse_column_ranges(params.range_data),
+        "filename": filename,
+    })
+    return params_dict
 
-    # Читаємо заголовки з аркуша sheet_stat 
-    try:
-        stat_sheet = workbook[params_dict["sheet_stat"]]
-    except KeyError:
-        raise HTTPException(400, f"Аркуш '{params_dict['sheet_stat']}' не знайдено у файлі")
 
-    correct_headers = []
-    for c in range(col_start, col_end + 1):
-        val = stat_sheet.cell(row=params.row_title, column=c).value
-        header = str(val).strip() if val else f"Колонка {get_column_letter(c)}"
-        correct_headers.append(header)
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    If-None-Match за RFC 9110: "*" або список тегів через кому;
+    порівняння слабке — префікс W/ не враховується.
+    """
+    if if_none_match.strip() == "*":
+        return True
+    return etag.removeprefix("W/") in ENTITY_TAG.findall(if_none_match)
 
-    params_dict.update({
-        "workbook": workbook,
-        "active_sheet": stat_sheet,           
-        "range_start_col": col_start,
-        "range_end_col": col_end,
-        "input_headers": correct_headers,
-        "filename": file.filename,
-    })
 
-    # розрахунок року прогнозу
-    # Беремо останній рік зі статистичних даних і додаємо +1
-    last_year = None
-    year_col_idx = column_index_from_string(params.column_year)
-
-    for row in stat_sheet.iter_rows(
-            min_row=params.row_first_data,
-            max_row=params.row_last_data,
-            min_col=year_col_idx,
-            max_col=year_col_idx,
-            values_only=True
-    ):
-        val = row[0]
-        if val is not None:
-            try:
-                last_year = int(val)
-            except (ValueError, TypeError):
-                continue
-
-    if last_year is None:
-        raise HTTPException(400, "Не знайдено жодного року у колонці з роками")
-
-    model_year = last_year + 1
-    params_dict["model_year"] = model_year
-
-    # 1. Аркуш з параметрами 
-    create_sheet_start_parameters(workbook, params_dict)
-
-    # 2. Згладжені дані
-    smoothed_result = create_sheet_smoothed_data(workbook, params_dict)
-
-    # 3. Підготовка до сезонності 
-    final_params = {
-        **params_dict,
-        "years": smoothed_result["years"],
-        "months": smoothed_result["months"],
+@app.post("/process-excel/")
+async def process_excel(
+    file: UploadFile = File(...),
+    form: dict = Depends(excel_form),
+
+    # Умовний запит: повторне завантаження з тим самим ETag → 304
+    if_none_match: str | None = Header(None),
+):
+    params_dict = build_params(form, file.filename)
+    # Великий файл лишається на диску: у пул процесів передається шлях, а не копія байтів
+    upload = await spool_upload(file)
+    started = time.perf_counter()
+
+    try:
+        # Кеш за вмістом: ті самі байти + ті самі параметри → той самий результат
+        cache_key = result_cache_key(upload, params_dict)
+        etag = f'"{cache_key}"'
+        headers = {
+            "Content-Disposition": f"attachment; filename=processed_{file.filename}",
+            "ETag": etag,
+        }
+
+        # Дисковий рівень кешу читається в пулі потоків, а не в циклі подій
+        if if_none_match and etag_matches(if_none_match, etag):
+            if await run_in_threadpool(result_cache.contains, cache_key):
+                return Response(status_code=304, headers={"ETag": etag})
+
+        output = await run_in_threadpool(result_cache.get, cache_key)
+        if output is not None:
+            headers["Server-Timing"] = f'cache;desc="hit", total;dur={(time.perf_counter() - started) * 1000:.1f}'
+            return Response(output, media_type=XLSX_MEDIA_TYPE, headers=headers)
+
+        # Важкий розрахунок виконується у пулі процесів, а не в циклі подій;
+        # книга пишеться у тимчасовий файл, який віддається з диска і видаляється після відповіді
+        path = result_path()
+        try:
+            _, stats = await pipeline_executor.submit(process_workbook, upload.source, params_dict, None, path)
+            await run_in_threadpool(result_cache.put_file, cache_key, path)
+        except BaseException:
+            os.unlink(path)
+            raise
+        stage_metrics.observe(stats, size_bucket(upload.size))
+        headers["Server-Timing"] = server_timing(stats, time.perf_counter() - started)
+    finally:
+        upload.close()
+
+    # FileResponse віддає файл частинами з Content-Length
+    return FileResponse(path, media_type=XLSX_MEDIA_TYPE, headers=headers,
+                        background=BackgroundTask(os.unlink, path))
+
+
+@app.post("/jobs/", status_code=202)
+async def create_job(
+    file: UploadFile = File(...),
+    form: dict = Depends(excel_form),
+):
+    """
+    Фонова обробка великої книги: id задачі повертається одразу,
+    стан — GET /jobs/{id}, готовий файл — GET /jobs/{id}/result.
+    """
+    params_dict = build_params(form, file.filename)
+    job_id = await job_store.submit(await spool_upload(file), params_dict)
+    return {
+        "job_id": job_id,
+        "status_url": f"/jobs/{job_id}",
+        "result_url": f"/jobs/{job_id}/result",
     }
 
-    # 4. Виключення сезонності 
-    create_sheet_seasonality(workbook, final_params, smoothed_result["smoothed_data"])
-    seasonality_result = create_sheet_seasonality(workbook, final_params, smoothed_result["smoothed_data"])
-    final_params.update({
-        "deseasoned_data": seasonality_result["deseasoned_data"],
-        "seasonal_coeffs": seasonality_result["seasonal_coeffs"],
-    })
 
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    """Стан задачі: queued / running (поточний етап і прогрес 0–1) / done / failed"""
+    return job_store.status(job_id)
 
-    # 5. Тренд
-    create_sheet_forecast(workbook, final_params, seasonality_result["deseasoned_data"])
 
-    # 6. Завантаження факторів впливу
-    try:
-        factors_data = load_factors_data(workbook, params_dict)
-        final_params["factors_data"] = factors_data
-    except Exception as e:
-        raise HTTPException(500, f"Помилка читання факторів впливу: {e}")
-
-    # 7. Фінальний прогноз 
-    forecast_result = create_sheet_forecast(workbook, final_params, seasonality_result["deseasoned_data"])
-    final_params["trend_forecasts"] = forecast_result["trend_forecasts"]
-
-    final_result = create_sheet_final_forecast(workbook, final_params)
-    final_forecast_by_col = final_result["final_forecast_by_col"]
-
-    # 8. Візуалізація — один аркуш з усіма регіонами 
-    create_combined_visualization_from_columns(
-        workbook=workbook,
-        years=smoothed_result["years"],
-        months=smoothed_result["months"],
-        raw_data_dict=smoothed_result["raw_data"],
-        smoothed_dict=smoothed_result["smoothed_data"],
-        deseasoned_dict=seasonality_result["deseasoned_data"],
-        forecast_dict=final_forecast_by_col,
-        column_headers=correct_headers,
-        model_year=model_year
+@app.get("/jobs/{job_id}/result")
+async def job_result(job_id: str):
+    """Готовий .xlsx зі спулу (409 — задача ще виконується)"""
+    path, filename = job_store.result(job_id)
+    return FileResponse(
+        path,
+        media_type=XLSX_MEDIA_TYPE,
+        filename=f"processed_{filename}",
     )
 
 
-    # Повертаємо готовий файл
-    output = BytesIO()
-    workbook.save(output)
-    output.seek(0)
+@app.post("/process-excel/batch/")
+async def process_excel_batch(
+    files: list[UploadFile] = File(...),
+    form: dict = Depends(excel_form),
+
+    # Індивідуальні параметри: JSON {"назва.xlsx": {"range_data": "G-K", ...}, ...}
+    overrides: str = Form("{}"),
+):
+    """
+    Пакетна обробка: кілька .xlsx та/або .zip-архівів з книгами.
+    Відповідь — zip з processed_*.xlsx (у порядку готовності) і manifest.json.
+    """
+    try:
+        overrides = json.loads(overrides or "{}")
+    except json.JSONDecodeError as e:
+        raise HTTPException(422, f"Помилка валідації: overrides не є коректним JSON ({e})")
+    if not isinstance(overrides, dict) or not all(isinstance(v, dict) for v in overrides.values()):
+        raise HTTPException(422, "Помилка валідації: overrides має бути об'єктом {назва файлу: {параметр: значення}}")
+
+    entries = expand_uploads([(file.filename, await file.read()) for file in files])
+    # Пакет проходить ту саму чергу допуску, що й одиночний запит: 503 до початку потокової відповіді
+    pipeline_executor.admit()
+
+    items = []
+    for filename, content in entries:
+        try:
+            params_dict = build_params({**form, **overrides.get(filename, {})}, filename)
+        except HTTPException as e:
+            # Помилка одного файлу потрапляє в маніфест і не зупиняє решту
+            params_dict = e
+        items.append((filename, content, params_dict))
 
     return StreamingResponse(
-        output,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={"Content-Disposition": f"attachment; filename=processed_{file.filename}"}
+        stream_batch(items),
+        media_type="application/zip",
+        headers={"Content-Disposition": "attachment; filename=processed_batch.zip"},
     )
+
+
+def request_size(request: Request) -> int:
+    """Розмір тіла запиту для мітки size у метриках (0, якщо Content-Length невідомий)"""
+    length = request.headers.get("content-length", "")
+    return int(length) if length.isdigit() else 0
+
+
+# Параметри розрахунку для CSV-запитів: поля форми або query (значення за замовчуванням — як у моделях)
+CSV_FIELDS = {"k": 2, "season_length": 12, "horizon": 0, "return_state": False, "min_history": 0}
+
+
+async def forecast_fields(request: Request) -> dict:
+    """
+    Поля запиту /forecast та /forecast/backtest: JSON як є або CSV —
+    тілом text/csv (параметри в query) чи файлом у multipart/form-data
+    (параметри — поля форми, factors — JSON-список факторів).
+    """
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        upload = form.get("file")
+        if upload is None or isinstance(upload, str):
+            raise HTTPException(400, "Не передано CSV-файл (поле file)")
+        fields = parse_series_csv((await upload.read()).decode("utf-8-sig"))
+        fields.update({name: form.get(name, default) for name, default in CSV_FIELDS.items()})
+        fields["factors"] = json.loads(form.get("factors") or "[]")
+        return fields
+    if content_type.startswith("text/csv"):
+        fields = parse_series_csv((await request.body()).decode("utf-8-sig"))
+        fields.update({name: request.query_params.get(name, default) for name, default in CSV_FIELDS.items()})
+        return fields
+    return await request.json()
+
+
+@app.post("/forecast")
+async def forecast(request: Request):
+    """
+    Прогноз без Excel: ряди як JSON (ForecastRequest) або CSV.
+    CSV — тілом text/csv (k, season_length і horizon у query) чи файлом у multipart/form-data
+    (поля k, season_length, horizon та factors — JSON-список факторів).
+    Повертає згладжені дані, сезонні коефіцієнти, тренд і фінальний прогноз у JSON.
+    """
+    try:
+        forecast_request = ForecastRequest.model_validate(await forecast_fields(request))
+    except ValueError as e:
+        raise HTTPException(422, f"Помилка валідації: {e}")
+
+    # Розрахунок займає мілісекунди — пул процесів тут лише додав би накладні витрати
+    started = time.perf_counter()
+    (result, model_year), stats = await run_in_threadpool(measure, "forecast", run_forecast, forecast_request)
+    payload = forecast_payload(forecast_request, result, model_year)
+    if forecast_request.return_state:
+        payload["state"] = forecast_state(forecast_request)
+    stage_metrics.observe(stats, size_bucket(request_size(request)))
+    return JSONResponse(payload, headers={"Server-Timing": server_timing(stats, time.perf_counter() - started)})
+
+
+@app.post("/forecast/backtest")
+async def forecast_backtest(request: Request):
+    """
+    Бектест моделі з ковзною точкою відліку; тіло — як у /forecast (+ min_history).
+    Модель будується за історією до кінця кожного повного сезону й порівнюється з фактом:
+    MAE, MAPE і зміщення по рядах і кроках горизонту.
+    """
+    try:
+        backtest_request = BacktestRequest.model_validate(await forecast_fields(request))
+    except ValueError as e:
+        raise HTTPException(422, f"Помилка валідації: {e}")
+
+    started = time.perf_counter()
+    try:
+        result, stats = await run_in_threadpool(measure, "backtest", run_backtest, backtest_request)
+    except ValueError as e:
+        raise HTTPException(422, f"Помилка валідації: {e}")
+
+    stage_metrics.observe(stats, size_bucket(request_size(request)))
+    return JSONResponse(backtest_payload(backtest_request, result),
+                        headers={"Server-Timing": server_timing(stats, time.perf_counter() - started)})
+
+
+@app.post("/forecast/update")
+async def forecast_update(update: ForecastUpdateRequest, request: Request):
+    """
+    Інкрементне оновлення: лише нові періоди + стан з попередньої відповіді
+    (/forecast з return_state=true або /forecast/update).
+    Повертає оновлений прогноз і новий стан; історія повторно не обробляється.
+    """
+    started = time.perf_counter()
+    try:
+        (result, state), stats = await run_in_threadpool(measure, "update", run_update, update)
+    except ValueError as e:
+        raise HTTPException(422, f"Помилка валідації: {e}")
+
+    stage_metrics.observe(stats, size_bucket(request_size(request)))
+    payload = update_payload(state, result)
+    return JSONResponse(payload, headers={"Server-Timing": server_timing(stats, time.perf_counter() - started)})
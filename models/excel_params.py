@@ -1,15 +1,41 @@
 # models/excel_params.py
+from openpyxl.utils import column_index_from_string
 from pydantic import BaseModel, Field, field_validator, model_validator
 
+
+def parse_column_ranges(range_str: str) -> list[int]:
+    """
+    Діапазони колонок через кому → номери колонок у заданому порядку без повторів:
+    "G-J,L,N-P" → [7, 8, 9, 10, 12, 14, 15, 16]
+    """
+    columns = []
+    for part in range_str.upper().split(","):
+        start, _, end = part.strip().partition("-")
+        first = column_index_from_string(start)
+        last = column_index_from_string(end) if end else first
+        columns.extend(range(first, last + 1))
+    return list(dict.fromkeys(columns))
+
+
+# Аркуші результату, які можна замовити параметром sheets (у порядку аркушів у книзі);
+# visualization включає і "Зведення рядів"
+OUTPUT_SHEETS = ("start_parameters", "smoothed", "seasonality", "trend", "final", "visualization")
+
+
 class ExcelProcessParams(BaseModel):
     #Основні дані
     column_year: str = Field(default="B", pattern=r"^[A-Z]+$")
     column_month: str = Field(default="D", pattern=r"^[A-Z]+$")
-    range_data: str = Field(default="G-J", pattern=r"^[A-Z]+-[A-Z]+$")
+    # Один або кілька діапазонів через кому: "G-J" або "G-J,L,N-P"
+    range_data: str = Field(default="G-J", pattern=r"^[A-Z]+(-[A-Z]+)?(,[A-Z]+(-[A-Z]+)?)*$")
     row_title: int = Field(default=3, ge=1, le=100)
     row_first_data: int = Field(default=4, ge=2, le=1000)
     row_last_data: int = Field(default=38, ge=5, le=5000)
     k: int = Field(default=2, ge=0, le=10)
+    # Періодів у сезоні: 12 — місяці, 4 — квартали, 52 — тижні
+    season_length: int = Field(default=12, ge=2, le=366)
+    # Горизонт прогнозу в періодах (0 — один сезон; 36 — три роки помісячно)
+    horizon: int = Field(default=0, ge=0, le=600)
 
     #Аркуші
     sheet_stat: str = Field(default="Статистичні дані", min_length=1)
@@ -25,15 +51,50 @@ class ExcelProcessParams(BaseModel):
     factor_row_first_data: int = Field(default=6, ge=2, le=1000)
     factor_row_last_data: int = Field(default=17, ge=6, le=5000)
 
+    #Вихідний файл: auto — xlsxwriter для книг із великою кількістю рядів, інакше openpyxl
+    output_backend: str = Field(default="auto", pattern=r"^(auto|openpyxl|xlsxwriter)$")
+    # Рівень стиснення zip-архіву: 0 — без стиснення (менше CPU), 9 — найменший файл
+    compression_level: int = Field(default=6, ge=0, le=9)
+    #Які аркуші будувати (через кому): розраховуються лише етапи, від яких вони залежать
+    sheets: str = Field(default=",".join(OUTPUT_SHEETS))
+
+    #Велика кількість рядів: скільки рядів на одному аркуші (0 — автоматично)
+    series_per_sheet: int = Field(default=0, ge=0, le=5000)
+
+    #Візуалізація: графіки лише для chart_budget рядів (0 — для всіх),
+    #відібраних за обсягом історії або за зміною першого сезону прогнозу (season_length
+    #періодів) проти останнього сезону історії; решта — у зведеній таблиці
+    chart_budget: int = Field(default=0, ge=0, le=5000)
+    chart_rank: str = Field(default="volume", pattern=r"^(volume|change)$")
+    charts_per_sheet: int = Field(default=0, ge=0, le=5000)
+
     # Крос-перевірки через field_validator
     @field_validator("range_data", "factor_row_range_data")
     @classmethod
-    def range_start_before_end(cls, v: str) -> str:
-        start, end = v.upper().split("-")
-        if start >= end:
-            raise ValueError(f"Початкова колонка ({start}) має бути лівіше за кінцеву ({end})")
+    def range_start_before_end(cls, v: str, info) -> str:
+        parts = v.upper().split(",")
+        for part in parts:
+            start, _, end = part.partition("-")
+            # Окрема колонка допустима лише серед кількох діапазонів даних
+            if not end and info.field_name == "range_data" and len(parts) > 1:
+                continue
+            # Порівнюються номери колонок, а не рядки: "G" має бути лівіше за "AA"
+            if not end or column_index_from_string(start) >= column_index_from_string(end):
+                raise ValueError(f"Початкова колонка ({start}) має бути лівіше за кінцеву ({end})")
         return v.upper()
 
+    @field_validator("sheets")
+    @classmethod
+    def known_sheets(cls, v: str) -> str:
+        names = {name.strip().lower() for name in v.split(",") if name.strip()}
+        unknown = names - set(OUTPUT_SHEETS)
+        if unknown:
+            raise ValueError(f"Невідомі аркуші: {', '.join(sorted(unknown))} (доступні: {', '.join(OUTPUT_SHEETS)})")
+        if not names:
+            raise ValueError("sheets: потрібно вибрати хоча б один аркуш")
+        # Канонічний порядок — однаковий ключ кешу для "final,trend" і "trend,final"
+        return ",".join(name for name in OUTPUT_SHEETS if name in names)
+
     @field_validator("row_first_data")
     @classmethod
     def first_data_after_title(cls, v: int, info) -> int:
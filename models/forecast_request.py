@@ -0,0 +1,116 @@
+# models/forecast_request.py
+from pydantic import BaseModel, Field, model_validator
+
+from engine.forecast_state import STATE_VERSION
+
+
+def check_periods(years: list[int], months: list[int], series: dict, season_length: int):
+    """
+    Місяці в межах сезону, однакова довжина років, місяців і кожного ряду;
+    періоди йдуть підряд без пропусків (модель нумерує їх за позицією)
+    """
+    if any(m < 1 or m > season_length for m in months):
+        raise ValueError(f"Місяць (період сезону) має бути в діапазоні 1–{season_length}")
+    n = len(years)
+    if len(months) != n:
+        raise ValueError(f"Кількість місяців ({len(months)}) не збігається з кількістю років ({n})")
+    for i in range(1, n):
+        expected_month = months[i - 1] % season_length + 1
+        expected_year = years[i - 1] + (expected_month == 1)
+        if (years[i], months[i]) != (expected_year, expected_month):
+            raise ValueError(f"Періоди мають іти підряд: після {years[i - 1]}-{months[i - 1]:02d} "
+                             f"очікується {expected_year}-{expected_month:02d}, отримано {years[i]}-{months[i]:02d}")
+    for header, values in series.items():
+        if len(values) != n:
+            raise ValueError(f"Ряд '{header}': {len(values)} значень замість {n}")
+
+
+class FactorInput(BaseModel):
+    """Фактор впливу з тією ж семантикою, що й у load_factors_data"""
+    description: str = ""
+    type: str = Field(pattern=r"^(коефіцієнт|одиниці)$")
+    header: str = Field(min_length=1)
+    data: list[float | None]
+    # Рік і період кожного значення: з ними значення зіставляються з горизонтом
+    # прогнозу за датою, без них — позиційно з першого періоду року прогнозу
+    years: list[int] | None = None
+    months: list[int] | None = None
+
+    @model_validator(mode="before")
+    @classmethod
+    def lowercase_type(cls, data: dict):
+        if isinstance(data, dict) and isinstance(data.get("type"), str):
+            data["type"] = data["type"].strip().lower()
+        return data
+
+
+class ForecastRequest(BaseModel):
+    #Періоди: рік і місяць (період сезону) кожного рядка історії
+    years: list[int] = Field(min_length=1)
+    months: list[int] = Field(min_length=1)
+
+    #Ряди: заголовок → значення по періодах (null — пропуск)
+    series: dict[str, list[float | None]] = Field(min_length=1)
+
+    k: int = Field(default=2, ge=0, le=10)
+    season_length: int = Field(default=12, ge=2, le=366)
+    #Горизонт прогнозу в періодах (0 — один сезон)
+    horizon: int = Field(default=0, ge=0, le=600)
+    factors: list[FactorInput] = Field(default_factory=list)
+
+    #Повернути стан для подальших інкрементних оновлень (POST /forecast/update)
+    return_state: bool = False
+
+    @model_validator(mode="after")
+    def lengths_match(self):
+        check_periods(self.years, self.months, self.series, self.season_length)
+        return self
+
+
+class BacktestRequest(ForecastRequest):
+    """Історія для бектесту (POST /forecast/backtest); фактори та return_state не використовуються"""
+
+    #Найкоротша історія для точки відліку в періодах (0 — два сезони)
+    min_history: int = Field(default=0, ge=0)
+
+
+class ForecastStateTail(BaseModel):
+    years: list[int]
+    months: list[int]
+    values: list[list[float | None]]
+
+
+class ForecastState(BaseModel):
+    """Стан з engine/forecast_state.py: хвіст сирих даних і моменти по періодах сезону"""
+    version: int
+    k: int = Field(ge=0, le=10)
+    season_length: int = Field(ge=2, le=366)
+    headers: list[str] = Field(min_length=1)
+    n_periods: int = Field(ge=1)
+    n_settled: int = Field(ge=0)
+    last_year: int
+    last_month: int
+    tail: ForecastStateTail
+    moments: dict[str, list[list[float]]]
+
+
+class ForecastUpdateRequest(BaseModel):
+    #Стан з попередньої відповіді /forecast або /forecast/update
+    state: ForecastState
+
+    #Лише нові періоди; ряди — ті самі, що й у стані
+    years: list[int] = Field(min_length=1)
+    months: list[int] = Field(min_length=1)
+    series: dict[str, list[float | None]] = Field(min_length=1)
+    horizon: int = Field(default=0, ge=0, le=600)
+    factors: list[FactorInput] = Field(default_factory=list)
+
+    @model_validator(mode="after")
+    def matches_state(self):
+        state = self.state
+        if state.version != STATE_VERSION:
+            raise ValueError(f"Непідтримувана версія стану: {state.version}")
+        if set(self.series) != set(state.headers):
+            raise ValueError("Ряди оновлення мають збігатися з рядами стану")
+        check_periods(self.years, self.months, self.series, state.season_length)
+        return self
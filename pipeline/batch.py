@@ -0,0 +1,155 @@
+# pipeline/batch.py
+import asyncio
+import json
+import os
+import posixpath
+import time
+import zipfile
+from io import BytesIO
+
+from fastapi import HTTPException
+
+from pipeline.cache import result_cache, result_cache_key
+from pipeline.executor import pipeline_executor
+from pipeline.metrics import size_bucket, stage_metrics
+from pipeline.process import process_workbook
+
+# Налаштування через змінні оточення
+BATCH_MAX_FILES = int(os.environ.get("BATCH_MAX_FILES", 500))
+
+
+def expand_uploads(uploads: list[tuple[str, bytes]]) -> list[tuple[str, bytes]]:
+    """
+    Розгортає завантажені .zip-архіви у список (назва, вміст).
+    Службові записи архіву (каталоги, __MACOSX, приховані файли) пропускаються;
+    решта файлів лишається як є — невідповідний формат потрапить у маніфест як помилка.
+    """
+    entries = []
+    for name, content in uploads:
+        if not name.lower().endswith(".zip"):
+            entries.append((name, content))
+            continue
+
+        try:
+            archive = zipfile.ZipFile(BytesIO(content))
+        except zipfile.BadZipFile:
+            raise HTTPException(400, f"Пошкоджений архів: {name}")
+
+        with archive:
+            for info in archive.infolist():
+                base = posixpath.basename(info.filename)
+                if info.is_dir() or not base or base.startswith(".") or info.filename.startswith("__MACOSX/"):
+                    continue
+                entries.append((base, archive.read(info)))
+
+    if not entries:
+        raise HTTPException(400, "Не передано жодного файлу")
+    if len(entries) > BATCH_MAX_FILES:
+        raise HTTPException(413, f"Забагато файлів у пакеті: {len(entries)} (максимум {BATCH_MAX_FILES})")
+    return entries
+
+
+class ZipStream:
+    """
+    Файловий об'єкт лише для запису: zipfile пише в нього послідовно
+    (без seek), а накопичені байти забираються частинами через drain().
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _output_name(filename: str, used: set) -> str:
+    """processed_<назва>; однакові назви в архіві отримують суфікс _2, _3, ..."""
+    stem, ext = os.path.splitext(f"processed_{filename}")
+    name, n = stem + ext, 1
+    while name in used:
+        n += 1
+        name = f"{stem}_{n}{ext}"
+    used.add(name)
+    return name
+
+
+async def _process_one(index: int, filename: str, content: bytes, params, limit: asyncio.Semaphore):
+    """
+    Обробка однієї книги пакета. Будь-яка помилка лишається в записі маніфесту
+    і не зупиняє інші файли. params — params_dict або HTTPException валідації.
+    """
+    entry = {"filename": filename, "status": "ok", "status_code": 200}
+    started = time.perf_counter()
+    output = None
+    try:
+        if isinstance(params, HTTPException):
+            raise params
+
+        cache_key = result_cache_key(content, params)
+        output = await asyncio.to_thread(result_cache.get, cache_key)
+        entry["cached"] = output is not None
+        if output is None:
+            async with limit:
+                output, stats = await pipeline_executor.submit(process_workbook, content, params, queue=True)
+            await asyncio.to_thread(result_cache.put, cache_key, output)
+            stage_metrics.observe(stats, size_bucket(len(content)))
+            entry["stages"] = {stage: round(m["wall"], 4) for stage, m in stats.items()}
+    except HTTPException as e:
+        output = None
+        entry.update(status="error", status_code=e.status_code, detail=e.detail)
+    except Exception as e:
+        output = None
+        entry.update(status="error", status_code=500, detail=f"Помилка обробки: {e}")
+
+    entry["seconds"] = round(time.perf_counter() - started, 4)
+    return index, entry, output
+
+
+async def stream_batch(items: list[tuple]):
+    """
+    Паралельна обробка пакета книг з потоковою віддачею zip-архіву.
+    items — [(назва, вміст, params_dict | HTTPException)].
+    Кожен результат дописується в архів одразу після завершення (у порядку готовності),
+    останнім записується manifest.json зі статусом кожного файлу в порядку завантаження.
+    У черзі пулу одночасно стоїть не більше max_workers книг пакета, а не весь пакет
+    (сам пакет проходить pipeline_executor.admit() до початку відповіді).
+    """
+    limit = asyncio.Semaphore(pipeline_executor.max_workers)
+    sink = ZipStream()
+    archive = zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED)
+    tasks = [asyncio.create_task(_process_one(i, *item, limit)) for i, item in enumerate(items)]
+    manifest = [None] * len(items)
+    used = set()
+
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            index, entry, output = await next_done
+            if output is not None:
+                entry["output"] = _output_name(entry["filename"], used)
+                # .xlsx уже стиснутий — повторне стиснення лише витрачає CPU
+                archive.writestr(entry["output"], output, compress_type=zipfile.ZIP_STORED)
+            manifest[index] = entry
+            yield sink.drain()
+
+        archive.writestr("manifest.json", json.dumps({
+            "total": len(manifest),
+            "succeeded": sum(entry["status"] == "ok" for entry in manifest),
+            "failed": sum(entry["status"] != "ok" for entry in manifest),
+            "files": manifest,
+        }, ensure_ascii=False, indent=2))
+        archive.close()
+        yield sink.drain()
+    finally:
+        # Клієнт відключився — задачі, що ще чекають на процес, більше не потрібні;
+        # книга, що вже обробляється, тримає слот пулу до завершення
+        for task in tasks:
+            task.cancel()
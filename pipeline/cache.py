@@ -0,0 +1,152 @@
+# pipeline/cache.py
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from pipeline.uploads import SpooledUpload
+
+# Налаштування через змінні оточення
+RESULT_CACHE_MAX_BYTES = int(os.environ.get("RESULT_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+RESULT_CACHE_DIR = os.environ.get("RESULT_CACHE_DIR", "")        # порожньо — без дискового рівня
+RESULT_CACHE_TTL = int(os.environ.get("RESULT_CACHE_TTL", 24 * 60 * 60))
+
+
+def result_cache_key(content: bytes | SpooledUpload, params: dict) -> str:
+    """
+    Ключ за вмістом: sha256 від байтів файлу та нормалізованих параметрів
+    (ExcelProcessParams.model_dump() + ім'я файлу, яке потрапляє в результат).
+    Для SpooledUpload береться sha256, порахований під час завантаження.
+    """
+    digest = content.sha256.copy() if isinstance(content, SpooledUpload) else hashlib.sha256(content)
+    digest.update(json.dumps(params, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    Дворівневий кеш готових .xlsx:
+    - у пам'яті — LRU з обмеженням за сумарним розміром у байтах;
+    - на диску (необов'язково) — витіснені з пам'яті записи, що живуть ttl секунд.
+    Методи, що читають диск, можна викликати з пулу потоків (run_in_threadpool):
+    рівень у пам'яті захищений блокуванням.
+    """
+
+    def __init__(self, max_bytes: int, directory: str = "", ttl: int = 0):
+        self.max_bytes = max_bytes
+        self.directory = Path(directory) if directory else None
+        self.ttl = ttl
+        self._memory = OrderedDict()
+        self._size = 0
+        self._last_sweep = 0.0
+        self._lock = threading.RLock()
+        if self.directory:
+            self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.xlsx"
+
+    def _fresh(self, path: Path) -> bool:
+        """Запис дискового рівня існує й не старший за ttl (прострочений видаляється)"""
+        try:
+            if time.time() - path.stat().st_mtime <= self.ttl:
+                return True
+        except FileNotFoundError:
+            return False
+        path.unlink(missing_ok=True)
+        return False
+
+    def contains(self, key: str) -> bool:
+        """Чи є результат у кеші — без читання файлу (для умовних запитів)"""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return True
+        return bool(self.directory) and self._fresh(self._path(key))
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+
+        if self.directory:
+            path = self._path(key)
+            if not self._fresh(path):
+                return None
+            try:
+                data = path.read_bytes()
+            except FileNotFoundError:
+                return None
+            with self._lock:
+                self._store(key, data)
+            return data
+
+        return None
+
+    def put(self, key: str, data: bytes):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return
+            self._store(key, data)
+        self.evict_expired()
+
+    def put_file(self, key: str, path: str):
+        """Готовий файл з диска: у пам'ять лише якщо вміщується, інакше копія одразу на дисковий рівень"""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return
+        if os.path.getsize(path) <= self.max_bytes:
+            with open(path, "rb") as f:
+                data = f.read()
+            with self._lock:
+                self._store(key, data)
+        elif self.directory:
+            tmp = self._path(key).with_suffix(f".{threading.get_ident()}.tmp")
+            shutil.copyfile(path, tmp)
+            tmp.replace(self._path(key))
+        self.evict_expired()
+
+    def _store(self, key: str, data: bytes):
+        if len(data) > self.max_bytes:
+            self._spill(key, data)
+            return
+        self._memory[key] = data
+        self._size += len(data)
+        while self._size > self.max_bytes:
+            old_key, old_data = self._memory.popitem(last=False)
+            self._size -= len(old_data)
+            self._spill(old_key, old_data)
+
+    def _spill(self, key: str, data: bytes):
+        if not self.directory:
+            return
+        path = self._path(key)
+        if path.exists():
+            path.touch()
+            return
+        tmp = path.with_suffix(".tmp")
+        tmp.write_bytes(data)
+        tmp.replace(path)
+
+    def evict_expired(self, interval: int = 60):
+        """Видаляє з диска записи, старші за ttl (не частіше, ніж раз на interval секунд)"""
+        if not self.directory or time.time() - self._last_sweep < interval:
+            return
+        self._last_sweep = time.time()
+        deadline = time.time() - self.ttl
+        for path in self.directory.glob("*.xlsx"):
+            try:
+                if path.stat().st_mtime < deadline:
+                    path.unlink(missing_ok=True)
+            except FileNotFoundError:
+                continue
+
+
+result_cache = ResultCache(RESULT_CACHE_MAX_BYTES, RESULT_CACHE_DIR, RESULT_CACHE_TTL)
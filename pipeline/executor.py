@@ -0,0 +1,118 @@
+# pipeline/executor.py
+import asyncio
+import functools
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+
+# Налаштування через змінні оточення
+PIPELINE_WORKERS = int(os.environ.get("PIPELINE_WORKERS", os.cpu_count() or 1))
+PIPELINE_QUEUE_SIZE = int(os.environ.get("PIPELINE_QUEUE_SIZE", 2 * PIPELINE_WORKERS))
+PIPELINE_RETRY_AFTER = int(os.environ.get("PIPELINE_RETRY_AFTER", 5))
+
+
+class PipelineExecutor:
+    """
+    Пул процесів для CPU-важкого конвеєра з обмеженою чергою допуску.
+    Одночасно виконується не більше max_workers задач, ще max_queue чекають;
+    решта запитів одразу отримує 503 з Retry-After.
+    Якщо процес пулу аварійно завершився (наприклад, OOM), пул перестворюється
+    під час наступної задачі, а запит, що впав, отримує 503.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int, retry_after: int):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self.queue_depth = 0   # допущені задачі, що чекають на вільний процес
+        self.in_flight = 0     # задачі, що зараз виконуються
+        self._pool = None
+        self._slots = None
+
+    def _ensure_started(self):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers)
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers,
+                                             mp_context=multiprocessing.get_context("spawn"))
+
+    def _discard_pool(self, pool):
+        """Зламаний пул прибирається (якщо його ще не замінила інша задача)"""
+        if self._pool is pool:
+            self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def admit(self):
+        """503 з Retry-After, якщо всі процеси зайняті й черга допуску заповнена"""
+        self._ensure_started()
+        if self._slots.locked() and self.queue_depth >= self.max_queue:
+            raise HTTPException(503, "Сервер перевантажений, спробуйте пізніше",
+                                headers={"Retry-After": str(self.retry_after)})
+
+    def _release(self, slots, future):
+        self.in_flight -= 1
+        slots.release()
+        # Результат скасованого очікувача нікому не потрібен — лише забираємо виняток, щоб не було попередження
+        if not future.cancelled():
+            future.exception()
+
+    async def submit(self, fn, *args, queue: bool = False):
+        """
+        Виконує fn(*args) у пулі процесів.
+        queue=True — задача чекає на вільний процес без перевірки черги
+        (запит уже пройшов admit(), як пакетна обробка, або прийнятий у фон).
+        Слот звільняється, коли процес справді завершив задачу, навіть якщо
+        того, хто чекав на результат, уже скасовано.
+        """
+        if not queue:
+            self.admit()
+        self._ensure_started()
+
+        self.queue_depth += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.queue_depth -= 1
+
+        slots = self._slots
+        self.in_flight += 1
+        try:
+            self._ensure_started()
+            pool = self._pool
+            future = asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+        except BaseException:
+            self.in_flight -= 1
+            slots.release()
+            raise
+        future.add_done_callback(functools.partial(self._release, slots))
+
+        try:
+            return await asyncio.shield(future)
+        except BrokenProcessPool:
+            logger.error("Процес пулу аварійно завершився, пул буде перестворено")
+            self._discard_pool(pool)
+            raise HTTPException(503, "Процес обробки аварійно завершився, спробуйте пізніше",
+                                headers={"Retry-After": str(self.retry_after)})
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.max_workers,
+            "queue_limit": self.max_queue,
+            "queue_depth": self.queue_depth,
+            "in_flight": self.in_flight,
+        }
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+            self._slots = None
+
+
+pipeline_executor = PipelineExecutor(PIPELINE_WORKERS, PIPELINE_QUEUE_SIZE, PIPELINE_RETRY_AFTER)
@@ -0,0 +1,249 @@
+# pipeline/jobs.py
+import asyncio
+import functools
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+from fastapi import HTTPException
+
+from pipeline.cache import result_cache, result_cache_key
+from pipeline.executor import PIPELINE_RETRY_AFTER, pipeline_executor
+from pipeline.metrics import size_bucket, stage_metrics
+from pipeline.process import process_workbook
+from pipeline.uploads import SpooledUpload
+
+logger = logging.getLogger(__name__)
+
+# Налаштування через змінні оточення
+JOB_SPOOL_DIR = os.environ.get("JOB_SPOOL_DIR", os.path.join(tempfile.gettempdir(), "forecast_jobs"))
+JOB_RETENTION = int(os.environ.get("JOB_RETENTION", 60 * 60))       # секунд після завершення
+JOB_SWEEP_INTERVAL = int(os.environ.get("JOB_SWEEP_INTERVAL", 60))
+JOB_MAX_PENDING = int(os.environ.get("JOB_MAX_PENDING", 100))                          # задач у черзі/роботі
+JOB_MAX_PENDING_BYTES = int(os.environ.get("JOB_MAX_PENDING_BYTES", 2 * 1024 ** 3))    # вхідних файлів у спулі
+
+JOB_ID = re.compile(r"^[0-9a-f]{32}$")
+INPUT_FILE = "input.xlsx"
+RESULT_FILE = "result.xlsx"
+
+
+def _write_json(path: Path, data: dict):
+    """Атомарний запис: читач бачить або старий, або новий файл, але не половину"""
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    tmp.replace(path)
+
+
+def run_job(params_dict: dict, job_dir: str) -> dict:
+    """
+    Виконується у процесі пулу: читає input.xlsx з теки задачі, пише прогрес
+    у progress.json і результат одразу у спул (без передачі байтів між процесами).
+    Повертає метрики етапів.
+    """
+    directory = Path(job_dir)
+
+    def on_stage(name, completed, total):
+        _write_json(directory / "progress.json", {"stage": name, "completed": completed, "total": total})
+
+    tmp = directory / (RESULT_FILE + ".tmp")
+    _, stats = process_workbook(str(directory / INPUT_FILE), params_dict, on_stage=on_stage, output=str(tmp))
+    tmp.replace(directory / RESULT_FILE)
+    return stats
+
+
+class JobStore:
+    """
+    Фонові задачі обробки книг на локальному диску, без зовнішньої черги:
+    кожна задача — тека у спулі з job.json (стан), input.xlsx, progress.json
+    (поточний етап, пише процес пулу) і result.xlsx. Завершені задачі живуть retention секунд.
+    Незавершених задач — не більше max_pending і max_pending_bytes вхідних даних,
+    понад це submit відповідає 503 з Retry-After.
+    """
+
+    def __init__(self, directory: str, retention: int, max_pending: int = JOB_MAX_PENDING,
+                 max_pending_bytes: int = JOB_MAX_PENDING_BYTES, retry_after: int = PIPELINE_RETRY_AFTER):
+        self.directory = Path(directory)
+        self.retention = retention
+        self.max_pending = max_pending
+        self.max_pending_bytes = max_pending_bytes
+        self.retry_after = retry_after
+        self.pending = 0
+        self.pending_bytes = 0
+        self._tasks = set()
+
+    def start(self):
+        """Створює спул і позначає перервані задачі (викликається в lifespan застосунку)"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.recover()
+
+    def admit(self, size: int):
+        """503 з Retry-After, якщо незавершених задач чи їхніх вхідних даних уже забагато"""
+        if self.pending >= self.max_pending or self.pending_bytes + size > self.max_pending_bytes:
+            raise HTTPException(503, "Забагато задач у черзі, спробуйте пізніше",
+                                headers={"Retry-After": str(self.retry_after)})
+
+    def _dir(self, job_id: str) -> Path:
+        if not JOB_ID.match(job_id):
+            raise HTTPException(404, "Задачу не знайдено")
+        return self.directory / job_id
+
+    def _meta(self, job_id: str) -> dict:
+        try:
+            return json.loads((self._dir(job_id) / "job.json").read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            raise HTTPException(404, "Задачу не знайдено")
+
+    def _update(self, job_id: str, **fields):
+        meta = {**self._meta(job_id), **fields, "updated": time.time()}
+        _write_json(self._dir(job_id) / "job.json", meta)
+
+    async def submit(self, upload: SpooledUpload, params_dict: dict) -> str:
+        """
+        Створює задачу й запускає її у фоні; повертає id одразу.
+        upload переходить у власність задачі (і закривається, якщо задачу не прийнято).
+        """
+        size = upload.size
+        try:
+            self.admit(size)
+        except HTTPException:
+            upload.close()
+            raise
+
+        # Місце в черзі займається до запису на диск, щоб паралельні запити не обійшли ліміт
+        self.pending += 1
+        self.pending_bytes += size
+        job_id = uuid.uuid4().hex
+        directory = self.directory / job_id
+        try:
+            directory.mkdir()
+            cache_key = result_cache_key(upload, params_dict)
+            await asyncio.to_thread(upload.save, str(directory / INPUT_FILE))
+        except BaseException:
+            self._release(size)
+            upload.close()
+            shutil.rmtree(directory, ignore_errors=True)
+            raise
+        now = time.time()
+        _write_json(directory / "job.json", {
+            "id": job_id,
+            "filename": params_dict["filename"],
+            "status": "queued",
+            "created": now,
+            "updated": now,
+            "finished": None,
+            "error": None,
+        })
+
+        task = asyncio.create_task(self._run(job_id, params_dict, cache_key, size))
+        self._tasks.add(task)
+        task.add_done_callback(functools.partial(self._finished, size))
+        return job_id
+
+    def _release(self, size: int):
+        self.pending -= 1
+        self.pending_bytes -= size
+
+    def _finished(self, size: int, task: asyncio.Task):
+        self._tasks.discard(task)
+        self._release(size)
+
+    async def _run(self, job_id: str, params_dict: dict, cache_key: str, size: int):
+        directory = self.directory / job_id
+        started = time.perf_counter()
+        try:
+            # Той самий файл з тими самими параметрами вже оброблявся — результат з кешу
+            # Кеш і спул — на диску, тому читання й запис ідуть у пулі потоків
+            cached = await asyncio.to_thread(result_cache.get, cache_key)
+            if cached is not None:
+                await asyncio.to_thread((directory / RESULT_FILE).write_bytes, cached)
+            else:
+                self._update(job_id, status="running")
+                stats = await pipeline_executor.submit(run_job, params_dict, str(directory), queue=True)
+                stage_metrics.observe(stats, size_bucket(size))
+                await asyncio.to_thread(result_cache.put_file, cache_key, str(directory / RESULT_FILE))
+            self._update(job_id, status="done", finished=time.time(),
+                         duration=round(time.perf_counter() - started, 3))
+        except HTTPException as e:
+            self._update(job_id, status="failed", finished=time.time(),
+                         error={"status_code": e.status_code, "detail": e.detail})
+        except Exception as e:
+            logger.exception("Задача %s завершилась з помилкою", job_id)
+            self._update(job_id, status="failed", finished=time.time(),
+                         error={"status_code": 500, "detail": f"Помилка обробки: {e}"})
+
+    def status(self, job_id: str) -> dict:
+        """Стан задачі: queued → running (етап і прогрес) → done / failed"""
+        meta = self._meta(job_id)
+        progress = {"stage": None, "completed": 0, "total": None}
+        try:
+            progress = json.loads((self._dir(job_id) / "progress.json").read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            pass
+
+        if meta["status"] == "done":
+            fraction = 1.0
+        elif progress["total"]:
+            fraction = round(progress["completed"] / progress["total"], 3)
+        else:
+            fraction = 0.0
+
+        return {
+            "id": job_id,
+            "filename": meta["filename"],
+            "status": meta["status"],
+            "stage": progress["stage"] if meta["status"] == "running" else None,
+            "progress": fraction,
+            "created": meta["created"],
+            "finished": meta["finished"],
+            "expires": meta["finished"] + self.retention if meta["finished"] else None,
+            "error": meta["error"],
+        }
+
+    def result(self, job_id: str) -> tuple[Path, str]:
+        """Шлях до готового файлу та ім'я файлу; помилка, якщо задача ще не завершена"""
+        meta = self._meta(job_id)
+        if meta["status"] == "failed":
+            raise HTTPException(meta["error"]["status_code"], meta["error"]["detail"])
+        if meta["status"] != "done":
+            raise HTTPException(409, "Задача ще виконується", headers={"Retry-After": "5"})
+        return self._dir(job_id) / RESULT_FILE, meta["filename"]
+
+    def cleanup(self):
+        """Видаляє завершені задачі, старші за retention, і недописані теки без job.json"""
+        deadline = time.time() - self.retention
+        for directory in self.directory.iterdir():
+            if not directory.is_dir() or not JOB_ID.match(directory.name):
+                continue
+            try:
+                meta = json.loads((directory / "job.json").read_text(encoding="utf-8"))
+                expired = meta["finished"] is not None and meta["finished"] < deadline
+            except (FileNotFoundError, json.JSONDecodeError):
+                expired = directory.stat().st_mtime < deadline
+            if expired:
+                shutil.rmtree(directory, ignore_errors=True)
+
+    def recover(self):
+        """Задачі, перервані перезапуском сервера, позначаються як невдалі (і згодом прибираються)"""
+        for path in self.directory.glob("*/job.json"):
+            try:
+                meta = json.loads(path.read_text(encoding="utf-8"))
+            except (FileNotFoundError, json.JSONDecodeError):
+                continue
+            if meta["finished"] is None:
+                self._update(meta["id"], status="failed", finished=time.time(),
+                             error={"status_code": 500, "detail": "Задачу перервано перезапуском сервера"})
+
+    async def sweep(self, interval: int = JOB_SWEEP_INTERVAL):
+        """Фонове прибирання спулу (запускається в lifespan застосунку)"""
+        while True:
+            await asyncio.to_thread(self.cleanup)
+            await asyncio.sleep(interval)
+
+
+job_store = JobStore(JOB_SPOOL_DIR, JOB_RETENTION)
@@ -0,0 +1,124 @@
+# pipeline/metrics.py
+import bisect
+import math
+import os
+import time
+
+# Налаштування через змінні оточення
+# Частка запитів, для яких вимірюється пік пам'яті (tracemalloc сповільнює
+# обробку в кілька разів, тому за замовчуванням вимірюється ~1% запитів)
+PIPELINE_MEMORY_SAMPLE_RATE = float(os.environ.get("PIPELINE_MEMORY_SAMPLE_RATE", 0.01))
+
+# Розмір вхідної книги → мітка size
+SIZE_BUCKETS = (
+    (100 * 1024, "lt_100kb"),
+    (1024 ** 2, "lt_1mb"),
+    (10 * 1024 ** 2, "lt_10mb"),
+    (math.inf, "ge_10mb"),
+)
+
+TIME_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+BYTES_BUCKETS = tuple(2 ** p for p in range(16, 32, 2))   # 64 КБ … 512 МБ
+
+
+def size_bucket(n_bytes: int) -> str:
+    for limit, label in SIZE_BUCKETS:
+        if n_bytes < limit:
+            return label
+    return SIZE_BUCKETS[-1][1]
+
+
+def _format_value(value) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Гістограма у форматі Prometheus з мітками stage та size"""
+
+    def __init__(self, name: str, help_text: str, buckets, labels=("stage", "size")):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self.labels = labels
+        self._series = {}   # значення міток → [лічильники кошиків..., сума, кількість]
+
+    def observe(self, label_values: tuple, value: float):
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for label_values, series in sorted(self._series.items()):
+            labels = ",".join(f'{k}="{v}"' for k, v in zip(self.labels, label_values))
+            cumulative = 0
+            for le, count in zip(self.buckets + (math.inf,), series):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{labels},le="{_format_value(le)}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{labels}}} {_format_value(series[-2])}")
+            lines.append(f"{self.name}_count{{{labels}}} {series[-1]}")
+        return lines
+
+
+class StageMetrics:
+    """
+    Накопичення метрик етапів конвеєра (у процесі веб-сервера).
+    Воркери повертають метрики разом із результатом, тут вони лише агрегуються;
+    розрахунки /forecast, /forecast/backtest і /forecast/update потрапляють сюди
+    як етапи forecast, backtest і update (див. measure).
+    """
+
+    def __init__(self):
+        self.wall = Histogram("pipeline_stage_wall_seconds",
+                              "Час виконання етапу конвеєра", TIME_BUCKETS)
+        self.cpu = Histogram("pipeline_stage_cpu_seconds",
+                             "Процесорний час етапу конвеєра", TIME_BUCKETS)
+        self.peak = Histogram("pipeline_stage_peak_alloc_bytes",
+                              "Пік виділеної пам'яті етапу конвеєра (вибірково)", BYTES_BUCKETS)
+
+    def observe(self, stats: dict, size: str):
+        for stage, m in stats.items():
+            self.wall.observe((stage, size), m["wall"])
+            self.cpu.observe((stage, size), m["cpu"])
+            if m.get("peak_bytes") is not None:
+                self.peak.observe((stage, size), m["peak_bytes"])
+
+    def render(self, gauges: dict | None = None) -> str:
+        lines = []
+        for name, (help_text, value) in (gauges or {}).items():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge", f"{name} {_format_value(value)}"]
+        for histogram in (self.wall, self.cpu, self.peak):
+            lines += histogram.render()
+        return "\n".join(lines) + "\n"
+
+
+def measure(stage: str, fn, *args):
+    """
+    fn(*args) з метриками у форматі етапів конвеєра: (результат, {stage: {wall, cpu}}).
+    Для розрахунків у пулі потоків веб-сервера (/forecast…): cpu — час саме цього потоку.
+    """
+    cpu_started = time.thread_time()
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, {stage: {"wall": time.perf_counter() - started, "cpu": time.thread_time() - cpu_started}}
+
+
+def server_timing(stats: dict, total: float | None = None) -> str:
+    """Метрики етапів → заголовок Server-Timing (тривалість у мілісекундах)"""
+    entries = []
+    for stage, m in stats.items():
+        desc = f"cpu={m['cpu'] * 1000:.1f}ms"
+        if m.get("peak_bytes") is not None:
+            desc += f" peak={m['peak_bytes'] / 1024 ** 2:.1f}MB"
+        entries.append(f'{stage};dur={m["wall"] * 1000:.1f};desc="{desc}"')
+    if total is not None:
+        entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
+
+
+stage_metrics = StageMetrics()
@@ -0,0 +1,260 @@
+# pipeline/process.py
+import logging
+import os
+import random
+import tempfile
+import tracemalloc
+from io import BytesIO
+
+from fastapi import HTTPException
+
+from engine.forecast_engine import (
+    ForecastEngine, ForecastResult, apply_factors, deseasonalize, fit_trend,
+    match_factors, round_half_up, seasonal_coefficients, smooth,
+)
+from models.excel_params import OUTPUT_SHEETS
+from pipeline.metrics import PIPELINE_MEMORY_SAMPLE_RATE
+from pipeline.stages import Stage, StageGraph
+from pipeline.uploads import UPLOAD_SPOOL_DIR
+from sheets.ingest import ingest_workbook
+from sheets.start_parameters import create_sheet_start_parameters
+from sheets.smoothed_data import create_sheet_smoothed_data
+from sheets.seasonality import create_sheet_seasonality
+from sheets.forecast import create_sheet_forecast
+from sheets.final_forecast import create_sheet_final_forecast
+from sheets.visualization import create_visualization_sheets
+from sheets.writer import open_output_book
+
+logger = logging.getLogger(__name__)
+
+# Скільки рядів уміщується на одному аркуші, коли series_per_sheet = 0 (автоматично);
+# з output_backend=auto книги з більшою кількістю рядів пишуться через xlsxwriter
+HIGH_CARDINALITY_SERIES = 250
+
+
+# ---------------------------------------------------------------- розрахунок
+
+def _source(g):
+    """Вхідна книга: шлях до файлу у спулі або байти в пам'яті"""
+    content = g.context["content"]
+    return content if isinstance(content, str) else BytesIO(content)
+
+
+def _ingest(g):
+    params = g.context["params"]
+    data = ingest_workbook(_source(g), params)
+    # Рік прогнозу: останній рік зі статистичних даних +1
+    data["model_year"] = data["last_year"] + 1
+    data["params"] = {
+        **params,
+        "input_headers": data["headers"],
+        "model_year": data["model_year"],
+        "years": data["years"],
+        "months": data["months"],
+    }
+    return data
+
+
+def _smooth(g):
+    return smooth(g["ingest"]["values"], g.context["params"]["k"])
+
+
+def _seasonality(g):
+    months = g["ingest"]["months"]
+    try:
+        unnormalized, seasonal = seasonal_coefficients(g["smooth"], months, g.context["params"]["season_length"])
+    except ValueError as e:
+        raise HTTPException(400, f"Колонка місяців: {e}")
+    return {
+        "unnormalized": unnormalized,
+        "seasonal": seasonal,
+        "deseasoned": deseasonalize(g["smooth"], seasonal, months),
+    }
+
+
+def _trend(g):
+    intercept, slope, trend_hist, trend_forecast = fit_trend(g["seasonality"]["deseasoned"], g.context["n_forecast"])
+    return {
+        "intercept": intercept,
+        "slope": slope,
+        "trend_hist": trend_hist,
+        "trend_forecast": trend_forecast,
+    }
+
+
+def _factors(g):
+    data = g["ingest"]
+    engine = ForecastEngine(n_forecast=g.context["n_forecast"], season_length=g.context["params"]["season_length"])
+    return match_factors(data["headers"], data["factors"], engine.n_forecast, engine.forecast_periods(data["model_year"]))
+
+
+def _final(g):
+    engine = ForecastEngine(n_forecast=g.context["n_forecast"], season_length=g.context["params"]["season_length"])
+    seasonal_forecast = round_half_up(
+        g["trend"]["trend_forecast"] * g["seasonality"]["seasonal"][engine.forecast_months() - 1], 2)
+    return {
+        "seasonal_forecast": seasonal_forecast,
+        "final": apply_factors(seasonal_forecast, g["factors"]),
+    }
+
+
+def collect_result(g) -> ForecastResult:
+    """ForecastResult з результатів етапів, які вже виконані у графі"""
+    fields = {"values": g.results["ingest"]["values"]}
+    if "smooth" in g.results:
+        fields["smoothed"] = g.results["smooth"]
+    for name in ("seasonality", "trend", "final"):
+        fields.update(g.results.get(name, {}))
+    if "factors" in g.results:
+        fields["factors"] = g.results["factors"]
+    return ForecastResult(**fields)
+
+
+# ----------------------------------------------------------------- аркуші
+
+def _chunks(g):
+    """
+    Розбиття рядів на частини для аркушів: [(суфікс назви, зріз колонок)].
+    Кожна частина пишеться на окремі пронумеровані аркуші, тому рядки, які
+    будують аркуші, мають довжину не більше розміру частини.
+    Розбивається лише запис аркушів: етапи розрахунку працюють з повними
+    масивами (періоди × ряди), а пам'ять на комірки тримає сталою xlsxwriter.
+    """
+    n_series = len(g["ingest"]["headers"])
+    size = g.context["params"].get("series_per_sheet") or HIGH_CARDINALITY_SERIES
+    if n_series <= size:
+        return [("", slice(None))]
+    return [(f" {number}", slice(start, start + size))
+            for number, start in enumerate(range(0, n_series, size), start=1)]
+
+
+def result_path() -> str:
+    """Порожній тимчасовий файл для готової книги (поруч зі спулом завантажень)"""
+    fd, path = tempfile.mkstemp(dir=UPLOAD_SPOOL_DIR, prefix="result_", suffix=".xlsx")
+    os.close(fd)
+    return path
+
+
+def output_backend(params, n_series: int) -> str:
+    """Рушій запису книги; auto — xlsxwriter, якщо ряди не вміщуються на одному аркуші"""
+    backend = params.get("output_backend", "auto")
+    if backend != "auto":
+        return backend
+    size = params.get("series_per_sheet") or HIGH_CARDINALITY_SERIES
+    return "xlsxwriter" if n_series > size else "openpyxl"
+
+
+def _book(g):
+    params = g.context["params"]
+    book = open_output_book(output_backend(params, len(g["ingest"]["headers"])), _source(g),
+                            g.context["output"], params.get("compression_level", 6))
+    return {"book": book}
+
+
+def _sheet(render):
+    def stage(g):
+        params = g["ingest"]["params"]
+        result = collect_result(g)
+        for suffix, columns in g["chunks"]:
+            render(g["book"]["book"],
+                   {**params, "input_headers": params["input_headers"][columns], "sheet_suffix": suffix},
+                   result.select(columns))
+    return stage
+
+
+def _visualization(g):
+    data = g["ingest"]
+    params = g.context["params"]
+    create_visualization_sheets(
+        book=g["book"]["book"],
+        years=data["years"],
+        months=data["months"],
+        result=collect_result(g),
+        column_headers=data["headers"],
+        model_year=data["model_year"],
+        chart_budget=params.get("chart_budget", 0),
+        chart_rank=params.get("chart_rank", "volume"),
+        charts_per_sheet=params.get("charts_per_sheet") or params.get("series_per_sheet") or HIGH_CARDINALITY_SERIES,
+    )
+
+
+def _render(g):
+    # Архів пишеться у файл, а не в BytesIO, — серіалізована книга не лежить у пам'яті поруч з об'єктами
+    book = g["book"]
+    book.pop("book").save(g.context["output"])
+    return g.context["output"]
+
+
+# Етапи аркушів мають назви sheet_<ключ з OUTPUT_SHEETS>. Етап render залежить лише від книги:
+# process_workbook виконує вибрані аркуші (у порядку OUTPUT_SHEETS — це порядок аркушів у книзі),
+# а потім render, тому розрахунки, потрібні лише невибраним аркушам, пропускаються
+WORKBOOK_STAGES = (
+    Stage("ingest", _ingest),
+    Stage("smooth", _smooth, deps=("ingest",)),
+    Stage("seasonality", _seasonality, deps=("smooth",)),
+    Stage("trend", _trend, deps=("seasonality",)),
+    Stage("factors", _factors, deps=("ingest",)),
+    Stage("final", _final, deps=("trend", "factors")),
+
+    Stage("book", _book, deps=("ingest",)),
+    Stage("chunks", _chunks, deps=("ingest",)),
+    Stage("sheet_start_parameters",
+          lambda g: create_sheet_start_parameters(g["book"]["book"], g["ingest"]["params"]),
+          deps=("book",)),
+    Stage("sheet_smoothed", _sheet(create_sheet_smoothed_data), deps=("book", "chunks", "smooth")),
+    Stage("sheet_seasonality", _sheet(create_sheet_seasonality), deps=("book", "chunks", "seasonality")),
+    Stage("sheet_trend", _sheet(create_sheet_forecast), deps=("book", "chunks", "trend")),
+    Stage("sheet_final", _sheet(create_sheet_final_forecast), deps=("book", "chunks", "final")),
+    Stage("sheet_visualization", _visualization, deps=("book", "final")),
+    Stage("render", _render, deps=("book",)),
+)
+
+
+def process_workbook(content: bytes | str, params_dict: dict, on_stage=None,
+                     output: str | None = None) -> tuple[bytes | str, dict]:
+    """
+    Конвеєр обробки однієї книги як граф етапів:
+    ingest → smooth → seasonality → trend → factors → final → аркуші → render.
+    Будуються лише аркуші з params_dict["sheets"] і етапи, від яких вони залежать.
+    Функція верхнього рівня без стану, тому її можна виконувати в окремому процесі.
+    content — байти книги або шлях до неї (великі завантаження передаються шляхом, а не копією).
+    params_dict — провалідовані ExcelProcessParams + data_columns/filename.
+    on_stage — необов'язковий зворотний виклик прогресу (див. StageGraph).
+    output — шлях для готового .xlsx; без нього книга пишеться у тимчасовий файл
+    і повертається байтами.
+    Повертає шлях output (або байти готового .xlsx) і метрики етапів {етап: {"wall", "cpu", "peak_bytes"}}.
+    """
+    path = output or result_path()
+    graph = StageGraph(WORKBOOK_STAGES, {
+        "content": content,
+        "params": params_dict,
+        "n_forecast": params_dict.get("horizon") or params_dict["season_length"],
+        "output": path,
+    }, on_stage=on_stage)
+
+    # Пік пам'яті вимірюється лише для вибірки запитів: tracemalloc дорогий
+    trace_memory = not tracemalloc.is_tracing() and random.random() < PIPELINE_MEMORY_SAMPLE_RATE
+    if trace_memory:
+        tracemalloc.start()
+    try:
+        sheets = params_dict.get("sheets") or ",".join(OUTPUT_SHEETS)
+        graph.run(*[f"sheet_{name}" for name in sheets.split(",")], "render")
+    except BaseException:
+        if output is None:
+            os.unlink(path)
+        raise
+    finally:
+        # Книга та проміжні масиви звільняються до того, як результат (можливо) читається в пам'ять
+        graph.results.clear()
+        if trace_memory:
+            tracemalloc.stop()
+
+    logger.info("Етапи конвеєра (с): %s",
+                ", ".join(f"{name}={m['wall']:.4f}" for name, m in graph.metrics.items()))
+    if output is not None:
+        return output, graph.metrics
+    try:
+        with open(path, "rb") as f:
+            return f.read(), graph.metrics
+    finally:
+        os.unlink(path)
@@ -0,0 +1,81 @@
+# pipeline/stages.py
+import time
+import tracemalloc
+
+
+class Stage:
+    """Вузол графа: назва, залежності та функція fn(graph) → результат"""
+
+    def __init__(self, name: str, fn, deps: tuple = ()):
+        self.name = name
+        self.fn = fn
+        self.deps = tuple(deps)
+
+
+class StageGraph:
+    """
+    Явний граф етапів конвеєра.
+    Кожен етап виконується не більше одного разу на запит: результат
+    запам'ятовується і віддається всім залежним етапам. Для кожного
+    виконаного етапу записуються його власні метрики (без залежностей):
+    wall — час виконання, cpu — процесорний час, peak_bytes — пік виділеної
+    пам'яті (лише коли ввімкнено tracemalloc, інакше None).
+    on_stage(назва, виконано етапів, усього етапів) викликається перед кожним етапом
+    (прогрес фонових задач); "усього" — етапи, потрібні цілям останнього run().
+    """
+
+    def __init__(self, stages, context: dict | None = None, on_stage=None):
+        self.stages = {stage.name: stage for stage in stages}
+        self.context = context or {}
+        self.on_stage = on_stage
+        self.results = {}
+        self.metrics = {}
+        self.total = len(self.stages)
+
+    def __getitem__(self, name):
+        return self.get(name)
+
+    def get(self, name):
+        if name in self.results:
+            return self.results[name]
+
+        stage = self.stages[name]
+        for dep in stage.deps:
+            self.get(dep)
+
+        if self.on_stage is not None:
+            self.on_stage(name, len(self.results), self.total)
+
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        cpu_started = time.process_time()
+        started = time.perf_counter()
+
+        self.results[name] = stage.fn(self)
+
+        self.metrics[name] = {
+            "wall": time.perf_counter() - started,
+            "cpu": time.process_time() - cpu_started,
+            "peak_bytes": tracemalloc.get_traced_memory()[1] - base if tracing else None,
+        }
+        return self.results[name]
+
+    def required(self, *targets) -> set:
+        """Етапи, які потрібні для цілей (самі цілі та всі їх залежності)"""
+        needed, pending = set(), list(targets)
+        while pending:
+            name = pending.pop()
+            if name not in needed:
+                needed.add(name)
+                pending.extend(self.stages[name].deps)
+        return needed
+
+    def run(self, *targets):
+        """
+        Виконує цільові етапи (разом із залежностями) у заданому порядку і повертає їх результати.
+        Етапи, від яких цілі не залежать, не виконуються.
+        """
+        self.total = len(self.required(*targets) | set(self.results))
+        return [self.get(name) for name in targets]
@@ -0,0 +1,220 @@
+# pipeline/uploads.py
+import asyncio
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+
+from fastapi import HTTPException, Request
+from fastapi.routing import APIRoute
+from starlette.formparsers import MultiPartException, MultiPartParser
+
+# Налаштування через змінні оточення
+UPLOAD_MEMORY_THRESHOLD = int(os.environ.get("UPLOAD_MEMORY_THRESHOLD", 1024 * 1024))   # більше — на диск
+UPLOAD_MAX_BYTES = int(os.environ.get("UPLOAD_MAX_BYTES", 200 * 1024 * 1024))          # 0 — без обмеження
+UPLOAD_SPOOL_DIR = os.environ.get("UPLOAD_SPOOL_DIR", "") or None                     # None — системна тека
+
+
+def _too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(413, f"Файл завеликий (максимум {max_bytes / 1024 ** 2:.1f} МБ)")
+
+
+class UploadSpool:
+    """
+    Файл частини multipart-запиту для UploadFile: до порогу — у пам'яті, більший —
+    іменований файл у UPLOAD_SPOOL_DIR, який spool_upload забирає без копіювання.
+    sha256 рахується під час запису, тому файл не перечитується для ключа кешу.
+    """
+
+    def __init__(self, threshold: int = UPLOAD_MEMORY_THRESHOLD):
+        self.threshold = threshold
+        self.sha256 = hashlib.sha256()
+        self.path = None
+        self.taken = False
+        self._file = io.BytesIO()
+
+    def write(self, data: bytes) -> int:
+        self.sha256.update(data)
+        if self.path is None and self._file.tell() + len(data) > self.threshold:
+            buffer = self._file
+            self._file = tempfile.NamedTemporaryFile(dir=UPLOAD_SPOOL_DIR, prefix="upload_", suffix=".xlsx",
+                                                     delete=False)
+            self.path = self._file.name
+            self._file.write(buffer.getbuffer())
+        return self._file.write(data)
+
+    def read(self, size: int = -1) -> bytes:
+        return self._file.read(size)
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        return self._file.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._file.tell()
+
+    def take(self) -> bytes | str:
+        """Вміст для SpooledUpload: байти або шлях до файлу, який далі належить SpooledUpload"""
+        if self.path is None:
+            return self._file.getvalue()
+        self.taken = True
+        self._file.close()
+        return self.path
+
+    def close(self):
+        self._file.close()
+        if self.path is not None and not self.taken:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+
+
+class UploadParser(MultiPartParser):
+    """
+    Розбір multipart-запиту, у якому файли пишуться в UploadSpool з порогом UPLOAD_MEMORY_THRESHOLD.
+    Залежить від внутрішнього _current_part Starlette (версія закріплена в requirements.txt,
+    tests/test_uploads.py перевіряє, що розбір досі працює).
+    """
+    spool_threshold = UPLOAD_MEMORY_THRESHOLD
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.spools = []
+
+    def on_headers_finished(self):
+        super().on_headers_finished()
+        upload = self._current_part.file
+        if upload is not None:
+            upload.file.close()
+            upload.file = UploadSpool(self.spool_threshold)
+            self.spools.append(upload.file)
+
+
+class UploadRoute(APIRoute):
+    """
+    Маршрут, форма якого розбирається UploadParser: налаштування спулу
+    стосуються лише цього застосунку, клас Starlette не змінюється.
+    """
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def route_handler(request: Request):
+            if request.headers.get("content-type", "").startswith("multipart/form-data"):
+                parser = UploadParser(request.headers, request.stream())
+                try:
+                    # FastAPI далі бере вже розібрану форму з request.form()
+                    request._form = await parser.parse()
+                except BaseException as e:
+                    # Обірваний запит (зокрема 413 від UploadLimitMiddleware) не лишає файлів у спулі
+                    for spool in parser.spools:
+                        spool.close()
+                    if isinstance(e, MultiPartException):
+                        raise HTTPException(400, e.message)
+                    raise
+            return await handler(request)
+
+        return route_handler
+
+
+class SpooledUpload:
+    """
+    Завантажений файл: байти в пам'яті або тимчасовий файл на диску.
+    source — те, що приймає process_workbook (байти або шлях);
+    sha256 порахований під час завантаження, тому для ключа кешу файл не перечитується.
+    """
+
+    def __init__(self, filename: str, source: bytes | str, size: int, sha256):
+        self.filename = filename
+        self.size = size
+        self.sha256 = sha256
+        self.data = source if isinstance(source, bytes) else b""
+        self.path = source if isinstance(source, str) else None
+
+    @property
+    def source(self) -> bytes | str:
+        return self.path if self.path is not None else self.data
+
+    def save(self, path: str):
+        """Переносить вміст у path (тимчасовий файл переміщується, а не копіюється)"""
+        if self.path is None:
+            with open(path, "wb") as f:
+                f.write(self.data)
+        else:
+            shutil.move(self.path, path)
+        self.path, self.data = path, b""
+
+    def close(self):
+        if self.path is not None:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+            self.path = None
+
+
+async def spool_upload(upload, max_bytes: int = UPLOAD_MAX_BYTES) -> SpooledUpload:
+    """
+    SpooledUpload із UploadFile, розібраного UploadParser (маршрути UploadRoute):
+    байти чи вже записаний на диск файл забираються як є, без копіювання.
+    Ліміт розміру — 413 (крім того, тіло запиту обмежує UploadLimitMiddleware).
+    """
+    if max_bytes and upload.size > max_bytes:
+        raise _too_large(max_bytes)
+    source = await asyncio.to_thread(upload.file.take)
+    return SpooledUpload(upload.filename, source, upload.size, upload.file.sha256)
+
+
+class UploadLimitMiddleware:
+    """
+    ASGI-обмеження розміру тіла запиту під час завантаження:
+    Content-Length понад ліміт відхиляється одразу, а тіло без нього
+    (chunked) обривається з 413, щойно прийнято більше max_bytes.
+    """
+
+    def __init__(self, app, max_bytes: int = UPLOAD_MAX_BYTES):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.max_bytes:
+            return await self.app(scope, receive, send)
+
+        length = dict(scope["headers"]).get(b"content-length")
+        if length is not None and length.isdigit() and int(length) > self.max_bytes:
+            return await self._reject(send)
+
+        received = 0
+        started = False
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # HTTPException проходить крізь розбір форми FastAPI без змін
+                    raise _too_large(self.max_bytes)
+            return message
+
+        async def tracking_send(message):
+            nonlocal started
+            started = started or message["type"] == "http.response.start"
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except HTTPException as e:
+            if e.status_code != 413 or started:
+                raise
+            await self._reject(send)
+
+    async def _reject(self, send):
+        body = json.dumps({"detail": _too_large(self.max_bytes).detail}, ensure_ascii=False).encode("utf-8")
+        await send({"type": "http.response.start", "status": 413,
+                    "headers": [(b"content-type", b"application/json"),
+                                (b"content-length", str(len(body)).encode()),
+                                (b"connection", b"close")]})
+        await send({"type": "http.response.body", "body": body})
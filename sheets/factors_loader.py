@@ -3,15 +3,15 @@ from openpyxl.utils import column_index_from_string, get_column_letter
 
 def load_factors_data(workbook, params):
     """
-    Читає дані з аркуша "Фактори впливу"
+    Читає дані з аркуша "Фактори впливу" за один прохід (працює з read-only книгою)
     Повертає список словників:
     [
         {
             "description": "Температура",
             "type": "коефіцієнт",  # або "одиниці"
             "header": "Темп. пов.",
-            "year_col": 2023,
-            "month_col": 1,
+            "years": [2023, ...],   # рік кожного рядка даних
+            "months": [1, ...],     # місяць кожного рядка даних
             "data": [0.95, 1.02, ...]  # по місяцях
         },
         ...
@@ -19,8 +19,8 @@ def load_factors_data(workbook, params):
     """
     ws_factor = workbook[params["sheet_factor"]]
 
-    year_col_letter = params["factor_column_year"]
-    month_col_letter = params["factor_column_month"]
+    year_col = column_index_from_string(params["factor_column_year"])
+    month_col = column_index_from_string(params["factor_column_month"])
     range_str = params["factor_row_range_data"]
     desc_row = params["factor_row_description"]
     type_row = params["factor_row_type"]
@@ -31,26 +31,50 @@ def load_factors_data(workbook, params):
     start_col = column_index_from_string(range_str.split("-")[0])
     end_col = column_index_from_string(range_str.split("-")[1])
 
+    min_col = min(start_col, year_col, month_col)
+    max_col = max(end_col, year_col, month_col)
+    min_row = min(desc_row, type_row, title_row, first_data_row)
+    width = max_col - min_col + 1
+    data_slice = slice(start_col - min_col, end_col - min_col + 1)
+
+    meta = {}
+    years = []
+    months = []
+    columns = [[] for _ in range(start_col, end_col + 1)]
+
+    for row_idx, row in enumerate(ws_factor.iter_rows(min_row=min_row, max_row=last_data_row,
+                                                      min_col=min_col, max_col=max_col,
+                                                      values_only=True),
+                                  start=min_row):
+        row = tuple(row) + (None,) * (width - len(row))
+        if row_idx in (desc_row, type_row, title_row):
+            meta[row_idx] = row[data_slice]
+        if row_idx < first_data_row:
+            continue
+
+        years.append(row[year_col - min_col])
+        months.append(row[month_col - min_col])
+        for i, val in enumerate(row[data_slice]):
+            columns[i].append(float(val) if val is not None else None)
+
+    empty = (None,) * len(columns)
     factors = []
 
-    for col in range(start_col, end_col + 1):
-        description = ws_factor.cell(desc_row, col).value or ""
-        factor_type = ws_factor.cell(type_row, col).value
-        header = ws_factor.cell(title_row, col).value or f"Фактор {get_column_letter(col)}"
+    for i, col in enumerate(range(start_col, end_col + 1)):
+        description = meta.get(desc_row, empty)[i] or ""
+        factor_type = meta.get(type_row, empty)[i]
+        header = meta.get(title_row, empty)[i] or f"Фактор {get_column_letter(col)}"
 
         if not factor_type or factor_type not in ["коефіцієнт", "одиниці"]:
             continue  # або можна кидати помилку
 
-        data = []
-        for row in range(first_data_row, last_data_row + 1):
-            val = ws_factor.cell(row, col).value
-            data.append(float(val) if val is not None else None)
-
         factors.append({
             "description": str(description).strip(),
             "type": factor_type.lower(),
             "header": str(header),
-            "data": data,
+            "years": years,
+            "months": months,
+            "data": columns[i],
         })
 
-    return factors
\ No newline at end of file
+    return factors
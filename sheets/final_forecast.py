@@ -1,36 +1,20 @@
 # sheets/final_forecast.py
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
+from engine.forecast_engine import to_cells
+from sheets.periods import forecast_year, forecast_years_text, period_name
+from sheets.writer import sheet_title
 
-MONTH_NAMES = ["", "січень", "лютий", "березень", "квітень", "травень", "червень",
-               "липень", "серпень", "вересень", "жовтень", "листопад", "грудень"]
 
-
-def create_sheet_final_forecast(workbook, params):
-    sheet_name = "Фінальний прогноз"
-    if sheet_name in workbook.sheetnames:
-        workbook.remove(workbook[sheet_name])
-    ws = workbook.create_sheet(title=sheet_name)
+def create_sheet_final_forecast(book, params, result):
+    ws = book.add_sheet(sheet_title("Фінальний прогноз", params))
 
     #Параметри
     model_year         = params["model_year"]
     headers            = params["input_headers"]
-    trend_forecasts    = params["trend_forecasts"]
-    seasonal_coeffs    = params["seasonal_coeffs"]
-    factors_data       = params.get("factors_data", [])
-    range_start_col    = params["range_start_col"]
-
-    #Фактори
-    header_normalized = {h.strip().lower().replace(" ", ""): h for h in headers}
-    factors_by_header = {}
-    for f in factors_data:
-        key = f["header"].strip().lower().replace(" ", "")
-        if key in header_normalized:
-            original = header_normalized[key]
-            factors_by_header.setdefault(original, []).append({
-                "desc": f["description"],
-                "type": f["type"],
-                "values": f["data"]
-            })
+    season_length      = result.seasonal.shape[0]
+    n_forecast         = result.final.shape[0]
+
+    #Фактори, зіставлені з кожним діапазоном даних
+    factors_by_header = {header: result.factors[idx] for idx, header in enumerate(headers)}
 
     # Розміри блоків
     block_sizes_no_sep = []
@@ -52,27 +36,19 @@ def create_sheet_final_forecast(workbook, params):
     FIRST_DATA_ROW        = 5    # перший місяць (січень)
 
     # Головний заголовок
-    ws.cell(HEADER_MAIN_ROW, 1, f"Фінальний прогноз на {model_year} рік")
-    ws.merge_cells(start_row=HEADER_MAIN_ROW, start_column=1,
-                   end_row=HEADER_MAIN_ROW, end_column=total_cols)
-    ws[f"A{HEADER_MAIN_ROW}"].font = Font(bold=True, size=14)
-    ws[f"A{HEADER_MAIN_ROW}"].alignment = Alignment(horizontal="center", vertical="center")
-
-    ws.append([])  # порожній рядок
+    ws.merge(HEADER_MAIN_ROW, 1, total_cols,
+             f"Фінальний прогноз на {forecast_years_text(model_year, n_forecast, season_length)}", "title")
 
     #Рядок 3 — назви діапазонів даних (регіонів)
+    ws.write_row(REGION_HEADER_ROW, [None] * 5, style="cell_border", fit=False)
     cur_col = 6
     for idx, header in enumerate(headers):
         size = block_sizes_no_sep[idx]
-        start = cur_col
-        end   = cur_col + size - 1
-        ws.merge_cells(start_row=REGION_HEADER_ROW, start_column=start,
-                       end_row=REGION_HEADER_ROW, end_column=end)
-        cell = ws.cell(REGION_HEADER_ROW, start, header)
-        cell.font = Font(bold=True, size=12, color="FFFFFF")
-        cell.fill = PatternFill("solid", fgColor="1F4E79")
-        cell.alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
+        ws.merge(REGION_HEADER_ROW, cur_col, cur_col + size - 1, header, "header_region")
+        if idx < len(headers) - 1:
+            ws.write(REGION_HEADER_ROW, cur_col + size, None, "cell_border", fit=False)
         cur_col += size + (1 if idx < len(headers)-1 else 0)
+    ws.set_row_height(REGION_HEADER_ROW, 40)
 
     #  Рядок 4 — детальні заголовки 
     header_row = ["Рік", "Місяць", "Назва місяця", "Номер місяця", ""]
@@ -84,105 +60,51 @@ def create_sheet_final_forecast(workbook, params):
         header_row.append("Фінальний прогноз")
         if header != headers[-1]:
             header_row.append("")
-    ws.append(header_row)
 
-    # 12 місяців прогнозу
-    final_forecast_by_col = {}
-    for month_num in range(1, 13):
-        row_values = [model_year, month_num, MONTH_NAMES[month_num], month_num, ""]
+    header_styles = []
+    for col, value in enumerate(header_row, start=1):
+        if not value:
+            header_styles.append("cell_border")
+        elif col <= 5:
+            header_styles.append("header_meta_wrap")
+        elif "Тренд" in value:
+            header_styles.append("header_trend_wrap")
+        elif "сезонност" in value:
+            header_styles.append("header_seasonal_wrap")
+        elif "Фінальний" in value:
+            header_styles.append("header_final_wrap")
+        else:
+            header_styles.append("header_wrap")
+    ws.write_row(COLUMN_HEADER_ROW, header_row, style=header_styles, fit=False)
+    ws.set_row_height(COLUMN_HEADER_ROW, 100)
+
+    # Періоди горизонту прогнозу (за замовчуванням один сезон; кілька років — з роком кожного рядка)
+    for i in range(n_forecast):
+        month_num = i % season_length + 1
+        trend_vals = to_cells(result.trend_forecast[i])
+        seasonal_vals = to_cells(result.seasonal_forecast[i])
+        final_vals = to_cells(result.final[i])
+
+        row_values = [forecast_year(model_year, i, season_length), month_num, period_name(month_num, season_length), month_num, ""]
         for idx, header in enumerate(headers):
-            col_idx = range_start_col + idx
-            trend = trend_forecasts.get(col_idx, [0]*12)[month_num-1] or 0.0
-            coeff = seasonal_coeffs.get((month_num, col_idx), 1.0)
-            seasonal = round(trend * coeff, 2)
-
-            row_values += [trend, seasonal]
-
-            final_val = seasonal
+            row_values += [trend_vals[idx], seasonal_vals[idx]]
             for f in factors_by_header.get(header, []):
-                val = f["values"][month_num-1]
-                if val is not None:
-                    final_val = round(final_val * val, 2) if f["type"] == "коефіцієнт" else round(final_val + val, 2)
-                row_values += [val if val is not None else ""]
+                val = f["values"][i]
+                row_values += [float(val) if val == val else ""]
 
-            row_values += [final_val]
+            row_values += [final_vals[idx]]
             if idx < len(headers) - 1:
                 row_values += [""]
 
-            final_forecast_by_col.setdefault(col_idx, []).append(final_val)
-
-        ws.append(row_values)
-
-    # Стилі
-    bold   = Font(bold=True)
-    center = Alignment(horizontal="center", vertical="center")
-    wrap   = Alignment(horizontal="center", vertical="center", wrap_text=True)
-
-    orange    = PatternFill("solid", fgColor="FF8C00")
-    dark_blue = PatternFill("solid", fgColor="1F4E79")
-    gray      = PatternFill("solid", fgColor="D3D3D3")
-    light     = PatternFill("solid", fgColor="F0F0F0")
-    blue      = PatternFill("solid", fgColor="DDEBF7")
-
-    # Рядок діапазонів даних (регіонів)
-    for cell in ws[REGION_HEADER_ROW]:
-        if cell.value in headers:
-            cell.fill = dark_blue
-            cell.font = Font(bold=True, color="FFFFFF", size=12)
-            cell.alignment = wrap
-
-    # Детальні заголовки
-    for cell in ws[COLUMN_HEADER_ROW]:
-        if cell.value:
-            cell.font = bold
-            cell.alignment = wrap
-            if cell.column <= 5:
-                cell.fill = orange
-            elif "Тренд" in str(cell.value):
-                cell.fill = gray
-            elif "сезонност" in str(cell.value):
-                cell.fill = light
-            elif "Фінальний" in str(cell.value):
-                cell.fill = blue
-
-    ws.row_dimensions[REGION_HEADER_ROW].height   = 40
-    ws.row_dimensions[COLUMN_HEADER_ROW].height   = 100
-
-    data_start_row = FIRST_DATA_ROW
-    data_end_row   = FIRST_DATA_ROW + 11  
-
-    column_widths = {}
-    for row in ws.iter_rows(min_row=data_start_row, max_row=data_end_row):
-        for cell in row:
-            if cell.value is not None:
-                length = len(str(cell.value))
-                col = cell.column_letter
-                column_widths[col] = max(column_widths.get(col, 0), length)
-
-    for col, length in column_widths.items():
-        ws.column_dimensions[col].width = max(8, min(length + 2, 20))
+        ws.write_row(FIRST_DATA_ROW + i, row_values,
+                     style=["cell_border" if v is None else "number_border" for v in row_values],
+                     number_style="decimal_border")
+
+    # Ширина — лише за рядками даних (заголовки записані з fit=False)
+    ws.autofit(padding=2, max_width=20, min_width=8)
 
     # Фіксовані колонки A–E
-    ws.column_dimensions["A"].width = 12
-    ws.column_dimensions["B"].width = 10
-    ws.column_dimensions["C"].width = 15
-    ws.column_dimensions["D"].width = 14
-    ws.column_dimensions["E"].width = 5
-
-    # Рамки
-    thin = Side(border_style="thin")
-    border = Border(left=thin, right=thin, top=thin, bottom=thin)
-    for row in ws.iter_rows(min_row=REGION_HEADER_ROW, max_row=ws.max_row,
-                            min_col=1, max_col=total_cols):
-        for cell in row:
-            cell.border = border
-
-    # Формат чисел
-    for row in ws.iter_rows(min_row=data_start_row):
-        for cell in row:
-            if isinstance(cell.value, (int, float)):
-                cell.number_format = '#,##0.00'
-            if cell.value is not None:
-                cell.alignment = center
-
-    return {"final_forecast_by_col": final_forecast_by_col}
+    for col, width in enumerate((12, 10, 15, 14, 5), start=1):
+        ws.set_column_width(col, width)
+
+    return ws
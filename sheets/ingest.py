@@ -0,0 +1,33 @@
+# sheets/ingest.py
+from fastapi import HTTPException
+from openpyxl import load_workbook
+
+from sheets.stat_loader import load_statistics_data
+from sheets.factors_loader import load_factors_data
+
+
+def ingest_workbook(source, params):
+    """
+    Читає вхідну книгу в режимі read-only (потоково, лише значення):
+    один прохід по аркушу статистики та один — по аркушу факторів.
+    Повертає результат load_statistics_data з доданим ключем "factors".
+    """
+    workbook = load_workbook(filename=source, read_only=True, data_only=True)
+    try:
+        try:
+            stat_sheet = workbook[params["sheet_stat"]]
+        except KeyError:
+            raise HTTPException(400, f"Аркуш '{params['sheet_stat']}' не знайдено у файлі")
+
+        data = load_statistics_data(stat_sheet, params)
+        if data["last_year"] is None:
+            raise HTTPException(400, "Не знайдено жодного року у колонці з роками")
+
+        try:
+            data["factors"] = load_factors_data(workbook, params)
+        except Exception as e:
+            raise HTTPException(500, f"Помилка читання факторів впливу: {e}")
+    finally:
+        workbook.close()
+
+    return data
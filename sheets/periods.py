@@ -0,0 +1,30 @@
+# sheets/periods.py
+from engine.forecast_engine import SEASON_LENGTH
+
+MONTH_NAMES = [
+    "", "січень", "лютий", "березень", "квітень", "травень", "червень",
+    "липень", "серпень", "вересень", "жовтень", "листопад", "грудень"
+]
+
+
+def period_name(number, season_length: int = SEASON_LENGTH) -> str:
+    """Назва періоду сезону: місяць для 12, квартал для 4, тиждень для 52/53"""
+    number = int(number)
+    if season_length == 12:
+        return MONTH_NAMES[number]
+    if season_length == 4:
+        return f"{number} квартал"
+    if season_length in (52, 53):
+        return f"{number} тиждень"
+    return f"період {number}"
+
+
+def forecast_year(model_year: int, index: int, season_length: int = SEASON_LENGTH) -> int:
+    """Рік index-го (з 0) періоду горизонту прогнозу, що починається з першого періоду model_year"""
+    return model_year + index // season_length
+
+
+def forecast_years_text(model_year: int, n_forecast: int, season_length: int = SEASON_LENGTH) -> str:
+    """Роки горизонту для заголовків: "2025 рік" або "2025–2027 роки" """
+    last_year = forecast_year(model_year, n_forecast - 1, season_length)
+    return f"{model_year} рік" if last_year == model_year else f"{model_year}–{last_year} роки"
@@ -0,0 +1,88 @@
+# sheets/stat_loader.py
+import operator
+
+import numpy as np
+from openpyxl.utils import column_index_from_string, get_column_letter
+
+
+def load_statistics_data(active_sheet, params):
+    """
+    Читає аркуш статистики за один прохід, лише потрібні колонки
+    (рік, місяць, колонки даних params["data_columns"] — одного чи кількох діапазонів).
+    Працює і з read-only аркушами.
+    Рядки без року або місяця пропускаються, порожні клітинки → NaN.
+    Повертає:
+    {
+        "headers": [...],            # заголовки діапазону даних
+        "years": [...], "months": [...],
+        "values": np.ndarray,        # періоди × ряди
+        "last_year": 2024,           # останній рік у колонці років
+    }
+    """
+    data_columns = params["data_columns"]
+    year_col = column_index_from_string(params["column_year"])
+    month_col = column_index_from_string(params["column_month"])
+    row_title = params["row_title"]
+    row_first = params["row_first_data"]
+    row_last = params["row_last_data"]
+
+    min_col = min(*data_columns, year_col, month_col)
+    max_col = max(*data_columns, year_col, month_col)
+    year_idx = year_col - min_col
+    month_idx = month_col - min_col
+    n_series = len(data_columns)
+
+    # Суцільний діапазон береться зрізом, кілька діапазонів — вибіркою колонок
+    if data_columns == list(range(data_columns[0], data_columns[-1] + 1)):
+        data_slice = slice(data_columns[0] - min_col, data_columns[-1] - min_col + 1)
+        select = lambda row: row[data_slice]
+    else:
+        select = operator.itemgetter(*(c - min_col for c in data_columns))
+        if n_series == 1:
+            select = lambda row, get=select: (get(row),)
+
+    headers = [f"Колонка {get_column_letter(c)}" for c in data_columns]
+    years = []
+    months = []
+    rows = []
+    last_year = None
+
+    for row_idx, row in enumerate(active_sheet.iter_rows(min_row=min(row_title, row_first),
+                                                         max_row=row_last,
+                                                         min_col=min_col,
+                                                         max_col=max_col,
+                                                         values_only=True),
+                                  start=min(row_title, row_first)):
+        row = tuple(row) + (None,) * (max_col - min_col + 1 - len(row))
+
+        if row_idx == row_title:
+            headers = [
+                str(val).strip() if val else headers[i]
+                for i, val in enumerate(select(row))
+            ]
+        if row_idx < row_first:
+            continue
+
+        year = row[year_idx]
+        month = row[month_idx]
+        if year is not None:
+            try:
+                last_year = int(year)
+            except (ValueError, TypeError):
+                pass
+        if year is None or month is None:
+            continue
+
+        years.append(year)
+        months.append(month)
+        rows.append([float(v) if v is not None else np.nan for v in select(row)])
+
+    values = np.array(rows, dtype=float).reshape(len(rows), n_series)
+
+    return {
+        "headers": headers,
+        "years": years,
+        "months": months,
+        "values": values,
+        "last_year": last_year,
+    }
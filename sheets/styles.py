@@ -0,0 +1,71 @@
+# sheets/styles.py
+import hashlib
+
+# Реєстр іменованих стилів, спільний для всіх аркушів.
+# Словники створюються один раз на процес; книга (OpenpyxlBook/XlsxBook)
+# реєструє кожен стиль лише при першому використанні і далі лише посилається
+# на нього за назвою — без створення Font/Alignment/Border на кожну клітинку.
+# Ключі словника описані в sheets/writer.py.
+
+STYLE_PREFIX = "forecast_"
+
+CENTER = {"align": "center", "valign": "center"}
+BORDER = {"border": "thin"}
+WRAP = {**CENTER, "wrap": True}
+
+STYLES = {
+    # Заголовки аркушів і блоків
+    "title": {"bold": True, "size": 14, **CENTER},
+    "chart_title": {"bold": True, "size": 16, "color": "1F4E79", **CENTER},
+    "separator": {"fill": "1F4E79"},
+
+    # Заголовки колонок: мета-колонки (рік/місяць) — помаранчеві, дані — сірі
+    "header_meta": {"bold": True, **CENTER, "fill": "FF8C00"},
+    "header_data": {"bold": True, **CENTER, "fill": "D3D3D3"},
+    "header_border": {"bold": True, **CENTER, **BORDER},
+    "header_meta_border": {"bold": True, **CENTER, **BORDER, "fill": "FF8C00"},
+    "header_deseasoned_border": {"bold": True, **CENTER, **BORDER, "fill": "F0F0F0"},
+    "header_trend_border": {"bold": True, **CENTER, **BORDER, "fill": "D3D3D3"},
+    "header_wrap": {"bold": True, **WRAP, **BORDER},
+    "header_meta_wrap": {"bold": True, **WRAP, **BORDER, "fill": "FF8C00"},
+    "header_trend_wrap": {"bold": True, **WRAP, **BORDER, "fill": "D3D3D3"},
+    "header_seasonal_wrap": {"bold": True, **WRAP, **BORDER, "fill": "F0F0F0"},
+    "header_final_wrap": {"bold": True, **WRAP, **BORDER, "fill": "DDEBF7"},
+    "header_dark": {"bold": True, "color": "FFFFFF", "fill": "1F4E79", **WRAP},
+    "header_region": {"bold": True, "size": 12, "color": "FFFFFF", "fill": "1F4E79", **WRAP, **BORDER},
+    "coefficients": {"bold": True, "color": "FFFFFF", "fill": "1f4e79", **WRAP},
+
+    # Клітинки даних
+    "number": CENTER,
+    "cell_border": BORDER,
+    "number_border": {**CENTER, **BORDER},
+    "decimal_border": {**CENTER, **BORDER, "num_format": "#,##0.00"},
+    "forecast_text": {"color": "000080", "bold": True, **BORDER},
+    "forecast_number": {"color": "000080", "bold": True, **BORDER, **CENTER},
+
+    # Аркуш "Початкові налаштування"
+    "params_header": {"bold": True, "color": "FFFFFF", "size": 13, "fill": "1F4E79", **WRAP},
+    "params_section": {"bold": True, "color": "1F4E79", "size": 12, "fill": "DDEBF7",
+                       "align": "left", "valign": "center", "indent": 1, **BORDER},
+    "params_name": {"size": 11, "align": "left", "valign": "center", "indent": 1, **BORDER},
+    "params_value": {"size": 11, "bold": True, "color": "1F4E79", **WRAP, **BORDER},
+}
+
+_anonymous = {}
+
+
+def resolve_style(style) -> tuple[str, dict] | None:
+    """
+    Назва з реєстру або словник стилю → (назва іменованого стилю, словник).
+    Словникам поза реєстром дається стабільна назва за їх вмістом.
+    """
+    if not style:
+        return None
+    if isinstance(style, str):
+        return STYLE_PREFIX + style, STYLES[style]
+
+    key = tuple(sorted(style.items()))
+    name = _anonymous.get(key)
+    if name is None:
+        name = _anonymous[key] = STYLE_PREFIX + "custom_" + hashlib.md5(repr(key).encode()).hexdigest()[:8]
+    return name, style
@@ -1,122 +1,196 @@
 # sheets/visualization.py
-from openpyxl.chart import LineChart, Reference
-from openpyxl.utils import get_column_letter
-from openpyxl.styles import Font, Alignment, PatternFill
+import numpy as np
+
+from engine.forecast_engine import to_cells
+from sheets.periods import forecast_year, forecast_years_text
+
+
+def _display(val):
+    return f"{val:,.0f}".replace(",", " ") if isinstance(val, (int, float)) else str(val)
+
+
+def rank_series(result, by: str = "volume") -> np.ndarray:
+    """
+    Номери рядів від найважливішого до найменш важливого:
+    volume — за сумарним обсягом історії,
+    change — за модулем відносної зміни першого сезону прогнозу до останнього сезону історії
+    (по season_length періодів; для місячних даних — 12 місяців).
+    Ряди без оцінки зміни (нульовий або порожній останній сезон) — у кінці, у початковому порядку.
+    """
+    season_length = result.seasonal.shape[0]
+    if by == "change":
+        last = np.nansum(result.values[-season_length:], axis=0)
+        forecast = np.nansum(result.final[:season_length], axis=0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            score = np.abs((forecast - last) / np.abs(last))
+    else:
+        score = np.nansum(result.values, axis=0)
+    score = np.where(np.isfinite(score), score, -np.inf)
+    return np.argsort(-score, kind="stable")
+
+
+def create_visualization_sheets(
+    book,
+    years,
+    months,
+    result,
+    column_headers,
+    model_year,
+    chart_budget=0,
+    chart_rank="volume",
+    charts_per_sheet=0
+):
+    """
+    Візуалізація з бюджетом графіків.
+    chart_budget = 0 — графік для кожного ряду в початковому порядку;
+    інакше графіки лише для chart_budget найважливіших рядів (rank_series),
+    а решта рядів — одним рядком у таблиці "Зведення рядів".
+    Графіки розкладаються по аркушах "Візуалізація 1", "Візуалізація 2", ...
+    по charts_per_sheet на аркуш (0 — усі на одному).
+    """
+    n_series = len(column_headers)
+    if 0 < chart_budget < n_series:
+        order = rank_series(result, chart_rank).tolist()
+        charted, rest = order[:chart_budget], order[chart_budget:]
+    else:
+        charted, rest = list(range(n_series)), []
+
+    per_sheet = charts_per_sheet or len(charted) or 1
+    pages = [charted[start:start + per_sheet] for start in range(0, len(charted), per_sheet)]
+    for number, page in enumerate(pages, start=1):
+        create_combined_visualization_from_columns(
+            book=book,
+            years=years,
+            months=months,
+            result=result.select(page),
+            column_headers=[column_headers[i] for i in page],
+            model_year=model_year,
+            sheet_suffix=f" {number}" if len(pages) > 1 else "",
+        )
+
+    if rest:
+        create_sheet_series_summary(book, result, column_headers, rest, model_year)
+
+
+def create_sheet_series_summary(book, result, column_headers, series, model_year):
+    """Ряди без графіків: по одному рядку таблиці на ряд, у порядку важливості"""
+    ws = book.add_sheet("Зведення рядів")
+    ws.widths.fmt = _display
+
+    ws.merge(1, 1, 6, f"Ряди без графіків ({len(series)})", "chart_title")
+    ws.set_row_height(1, 30)
+    season_length = result.seasonal.shape[0]
+    years_text = forecast_years_text(model_year, result.final.shape[0], season_length)
+    ws.write_row(3, ["№", "Ряд", "Обсяг (історія)", f"Останні {season_length} пер.",
+                     f"Прогноз на {years_text.split()[0]}", "Зміна, %"], style="header_dark")
+
+    volume = np.nansum(result.values, axis=0)
+    last = np.nansum(result.values[-season_length:], axis=0)
+    forecast = np.nansum(result.final, axis=0)
+    # Зміна — перший сезон прогнозу проти останнього сезону історії
+    first_season = np.nansum(result.final[:season_length], axis=0)
+
+    for row_idx, i in enumerate(series, start=4):
+        change = round((first_season[i] - last[i]) / abs(last[i]) * 100, 1) if last[i] else None
+        ws.write_row(row_idx, [
+            row_idx - 3,
+            column_headers[i],
+            round(float(volume[i]), 2),
+            round(float(last[i]), 2),
+            round(float(forecast[i]), 2),
+            None if change is None else float(change),
+        ], style="cell_border", number_style="number_border")
+
+    ws.autofit(padding=2, max_width=40, min_width=8)
+
+    return ws
 
 
 def create_combined_visualization_from_columns(
-    workbook,
+    book,
     years,
     months,
-    raw_data_dict,
-    smoothed_dict,
-    deseasoned_dict,
-    forecast_dict,
+    result,
     column_headers,
-    model_year
+    model_year,
+    sheet_suffix=""
 ):
-    sheet_name = "Візуалізація"
-    if sheet_name in workbook.sheetnames:
-        workbook.remove(workbook[sheet_name])
-    ws = workbook.create_sheet(title=sheet_name)
+    ws = book.add_sheet("Візуалізація" + sheet_suffix)
+    ws.widths.fmt = _display   # ширина колонок — за відформатованими числами
 
-    current_row = 1
-
-    # Отримуємо правильний порядок колонок: ключі з raw_data_dict (7,8,9,10)
-    data_columns = sorted(raw_data_dict.keys())  # [7, 8, 9, 10]
-
-    for col_idx in data_columns:
-        # Знаходимо індекс у списку заголовків (0,1,2,3)
-        header_index = data_columns.index(col_idx)
-        header_name = column_headers[header_index]
+    colors = ["1F4E79", "ED7D31", "A5A5A5", "70AD47"]
 
-        raw = raw_data_dict[col_idx]
-        smooth = smoothed_dict.get(col_idx, [])
-        deseas = deseasoned_dict.get(col_idx, [])
-        final_fc = forecast_dict.get(col_idx, [])
+    n_hist = len(years)
+    periods = [f"{int(years[i])}-{int(months[i]):02d}" for i in range(n_hist)]
+    season_length = result.seasonal.shape[0]
+    forecast_periods = [f"{forecast_year(model_year, i, season_length)}-{i % season_length + 1:02d}"
+                        for i in range(result.final.shape[0])]
+    current_row = 1
 
-        n_hist = len(years)
+    for header_index, header_name in enumerate(column_headers):
+        raw = to_cells(result.values[:, header_index])
+        smooth = to_cells(result.smoothed[:, header_index])
+        deseas = to_cells(result.deseasoned[:, header_index])
+        final_fc = to_cells(result.final[:, header_index])
 
         #Заголовок
-        ws.merge_cells(start_row=current_row, start_column=1, end_row=current_row, end_column=5)
-        title_cell = ws.cell(current_row, 1, f"Динаміка та прогноз: {header_name}")
-        title_cell.font = Font(bold=True, size=16, color="1F4E79")
-        title_cell.alignment = Alignment(horizontal="center", vertical="center")
-        ws.row_dimensions[current_row].height = 45
+        ws.merge(current_row, 1, 5, f"Динаміка та прогноз: {header_name}", "chart_title")
+        ws.set_row_height(current_row, 45)
         current_row += 1
 
         # Заголовки таблиці
-        headers = ["Період", "Сирі дані", "Згладжені", "Тренд", "Фінальний прогноз"]
-        for c, h in enumerate(headers, 1):
-            cell = ws.cell(current_row, c, h)
-            cell.font = Font(bold=True, color="FFFFFF")
-            cell.fill = PatternFill("solid", fgColor="1F4E79")
-            cell.alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
+        header_row = current_row
+        ws.write_row(header_row, ["Період", "Сирі дані", "Згладжені", "Тренд", "Фінальний прогноз"],
+                     style="header_dark")
         current_row += 1
 
         # Дані
         data_start_row = current_row
         for i in range(n_hist):
-            period = f"{int(years[i])}-{int(months[i]):02d}"
-            ws.append([
-                period,
+            ws.write_row(current_row, [
+                periods[i],
                 raw[i] if i < len(raw) else None,
                 smooth[i] if i < len(smooth) else None,
                 deseas[i] if i < len(deseas) else None,
                 None
             ])
+            current_row += 1
 
-        for m in range(1, 13):
-            fc_val = final_fc[m-1] if m-1 < len(final_fc) else None
-            ws.append([f"{model_year}-{m:02d}", None, None, None, fc_val])
-
-        data_end_row = ws.max_row
+        for i, period in enumerate(forecast_periods):
+            ws.write_row(current_row, [period, None, None, None, final_fc[i]])
+            current_row += 1
 
-        # Автоширина
-        for col in range(1, 6):
-            column = get_column_letter(col)
-            max_len = 0
-            for r in range(data_start_row, data_end_row + 1):
-                val = ws.cell(r, col).value
-                if val is not None:
-                    val_str = f"{val:,.0f}".replace(",", " ") if isinstance(val, (int, float)) else str(val)
-                    max_len = max(max_len, len(val_str))
-            width = max(min(max_len + 2, 25), 10)
-            ws.column_dimensions[column].width = width
+        data_end_row = current_row - 1
 
         # Графік
-        chart = LineChart()
-        chart.title = f"Прогноз: {header_name}"
-        chart.style = 27
-        chart.height = 18
-        chart.width = 34
-        chart.x_axis.title = "Період"
-        chart.y_axis.title = "Обсяг"
-        chart.legend.position = "b"
-
-        data_ref = Reference(ws, min_col=2, max_col=5, min_row=current_row-1, max_row=data_end_row)
-        cats_ref = Reference(ws, min_col=1, min_row=data_start_row, max_row=data_end_row)
-        chart.add_data(data_ref, titles_from_data=True)
-        chart.set_categories(cats_ref)
-
-        colors = ["1F4E79", "ED7D31", "A5A5A5", "70AD47"]
-        for i, s in enumerate(chart.series):
-            s.graphicalProperties.line.solidFill = colors[i]
-            s.graphicalProperties.line.width = 28000
-            if i == 3:
-                s.graphicalProperties.line.dashStyle = "dash"
-                s.graphicalProperties.line.width = 35000
-            s.marker.symbol = "circle"
-            s.marker.size = 7
-
-        ws.add_chart(chart, f"G{data_start_row}")
+        ws.add_line_chart(
+            anchor_row=data_start_row,
+            anchor_col=7,
+            title=f"Прогноз: {header_name}",
+            categories=(1, data_start_row, data_end_row),
+            series=[
+                {
+                    "col": col,
+                    "title_row": header_row,
+                    "first_row": data_start_row,
+                    "last_row": data_end_row,
+                    "color": colors[i],
+                    "width": 2.76 if i == 3 else 2.2,
+                    "dash": i == 3,
+                }
+                for i, col in enumerate(range(2, 6))
+            ],
+            x_title="Період",
+            y_title="Обсяг",
+        )
 
         #Роздільник
         current_row = data_end_row + 5
-        ws.merge_cells(start_row=current_row, start_column=1, end_row=current_row, end_column=12)
-        sep = ws.cell(current_row, 1)
-        sep.fill = PatternFill("solid", fgColor="1F4E79")
-        ws.row_dimensions[current_row].height = 4
+        ws.merge(current_row, 1, 12, None, "separator")
+        ws.set_row_height(current_row, 4)
         current_row += 2
 
+    # Автоширина
+    ws.autofit(padding=2, max_width=25, min_width=10, max_col=5)
+
     return ws
@@ -0,0 +1,393 @@
+# sheets/writer.py
+import os
+import shutil
+from datetime import date, datetime, time, timezone
+from zipfile import ZIP_DEFLATED, ZIP_STORED, ZipFile
+
+import xlsxwriter
+from openpyxl import load_workbook
+from openpyxl.chart import LineChart, Reference
+from openpyxl.styles import Font, Alignment, PatternFill, Border, Side, NamedStyle
+from openpyxl.styles.fonts import DEFAULT_FONT
+from openpyxl.utils import get_column_letter
+from openpyxl.writer.excel import ExcelWriter
+
+from sheets.styles import resolve_style
+
+# Аркуші, які генерує сервіс (при копіюванні вхідної книги вони пропускаються).
+# При розбитті рядів на частини назви отримують номер: "Тренд 2".
+GENERATED_SHEETS = (
+    "Початкові налаштування",
+    "Згладжені дані",
+    "Виключення сезонності",
+    "Тренд",
+    "Фінальний прогноз",
+    "Візуалізація",
+    "Зведення рядів",
+)
+
+
+def sheet_title(name: str, params: dict) -> str:
+    """Назва аркуша з номером частини рядів (params["sheet_suffix"], якщо є)"""
+    return name + params.get("sheet_suffix", "")
+
+
+def is_generated_sheet(title: str) -> bool:
+    name, _, number = title.rpartition(" ")
+    return title in GENERATED_SHEETS or (number.isdigit() and name in GENERATED_SHEETS)
+
+# Рівень стиснення zip-архіву .xlsx: 0 — без стиснення (швидше, більший файл),
+# 9 — найсильніше; 6 — типовий рівень zlib, який використовують openpyxl і xlsxwriter
+DEFAULT_COMPRESSION_LEVEL = 6
+
+
+def _zip_archive(file, compression_level: int, allow_zip64: bool = True) -> ZipFile:
+    if compression_level == 0:
+        return ZipFile(file, "w", ZIP_STORED, allowZip64=allow_zip64)
+    return ZipFile(file, "w", ZIP_DEFLATED, compresslevel=compression_level, allowZip64=allow_zip64)
+
+
+def _recompress(source_path: str, output, compression_level: int):
+    """Перепаковує готовий .xlsx з іншим рівнем стиснення (записи копіюються потоково)"""
+    with ZipFile(source_path) as source, _zip_archive(output, compression_level) as target:
+        for info in source.infolist():
+            with source.open(info) as src, target.open(info.filename, "w") as dst:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+
+# Стиль клітинки — назва з реєстру sheets/styles.py або словник, однаковий для обох бекендів:
+# {"bold": True, "size": 14, "color": "FFFFFF", "fill": "1F4E79",
+#  "align": "center", "valign": "center", "wrap": True, "indent": 1,
+#  "border": "thin", "num_format": "#,##0.00"}
+# Кожен стиль реєструється в книзі один раз (NamedStyle / Format) і передається
+# під час запису клітинки — окремого проходу по аркушу для стилізації немає.
+#
+# Аркуші пишуться строго зверху вниз (рядок за рядком): цього вимагає
+# режим constant_memory у xlsxwriter, де записані рядки одразу скидаються на диск.
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class ColumnWidthTracker:
+    """
+    Найдовше значення кожної колонки, зібране під час запису клітинок.
+    Ширини відомі одразу після запису — без повторного проходу по аркушу.
+    fmt — як значення відображається (за замовчуванням str).
+    """
+
+    def __init__(self, fmt=str):
+        self.fmt = fmt
+        self.lengths = {}
+
+    def track(self, col, value):
+        if value is None or value == "":
+            return
+        length = len(self.fmt(value))
+        if length > self.lengths.get(col, -1):
+            self.lengths[col] = length
+
+    def widths(self, padding=2, min_len=0, max_width=50, empty_width=None, max_col=None, min_width=0) -> dict:
+        """
+        Ширина колонок за найдовшим значенням:
+        width = max(min_width, min(max(len, min_len) + padding, max_width)).
+        Колонки без значень (до max_col) отримують empty_width, якщо його задано.
+        """
+        widths = {}
+        for col in range(1, (max_col or max(self.lengths, default=0)) + 1):
+            length = self.lengths.get(col)
+            if length is None:
+                if empty_width is not None:
+                    widths[col] = empty_width
+                continue
+            widths[col] = max(min_width, min(max(length, min_len) + padding, max_width))
+        return widths
+
+
+class _SheetWriter:
+    """
+    Спільна частина обох бекендів. Кожна записана клітинка з fit=True
+    потрапляє в self.widths; заголовки та об'єднані клітинки за замовчуванням
+    не впливають на ширину колонок (merge(..., fit=True) — щоб впливали).
+    """
+
+    def write_row(self, row, values, start_col=1, style=None, number_style=None, fit=True):
+        """
+        Записує рядок значень. style — стиль для всіх клітинок або список по клітинках;
+        number_style (якщо задано) замінює style для числових значень.
+        """
+        for offset, value in enumerate(values):
+            cell_style = style[offset] if isinstance(style, list) else style
+            if number_style is not None and _is_number(value):
+                cell_style = number_style
+            self.write(row, start_col + offset, value, cell_style, fit)
+
+    def write_rows(self, first_row, rows, start_col=1, style=None, number_style=None, fit=True):
+        """Записує блок рядків; style (список) задає стиль кожної колонки блоку"""
+        for offset, values in enumerate(rows):
+            self.write_row(first_row + offset, values, start_col, style, number_style, fit)
+
+    def autofit(self, padding=2, min_len=0, max_width=50, empty_width=None, max_col=None, min_width=0):
+        """Ширини колонок за довжинами, зібраними під час запису (див. ColumnWidthTracker.widths)"""
+        for col, width in self.widths.widths(padding, min_len, max_width, empty_width, max_col, min_width).items():
+            self.set_column_width(col, width)
+
+
+# ---------------------------------------------------------------- openpyxl
+
+def _named_style(name, style) -> NamedStyle:
+    # Без шрифтових ключів клітинка лишається зі стандартним шрифтом книги
+    named = NamedStyle(name=name, font=DEFAULT_FONT)
+    if "bold" in style or "size" in style or "color" in style:
+        named.font = Font(bold=style.get("bold", False), size=style.get("size"), color=style.get("color"))
+    if "align" in style or "valign" in style or "wrap" in style or "indent" in style:
+        named.alignment = Alignment(horizontal=style.get("align"), vertical=style.get("valign"),
+                                    wrap_text=style.get("wrap"), indent=style.get("indent", 0))
+    if "fill" in style:
+        named.fill = PatternFill("solid", fgColor=style["fill"])
+    if "border" in style:
+        side = Side(border_style=style["border"])
+        named.border = Border(left=side, right=side, top=side, bottom=side)
+    if "num_format" in style:
+        named.number_format = style["num_format"]
+    return named
+
+
+class OpenpyxlSheetWriter(_SheetWriter):
+    def __init__(self, book, ws):
+        self.book = book
+        self.ws = ws
+        self.title = ws.title
+        self.widths = ColumnWidthTracker()
+
+    def write(self, row, col, value, style=None, fit=True):
+        cell = self.ws.cell(row, col, value)
+        if style:
+            cell.style = self.book.style(style)
+        if fit:
+            self.widths.track(col, value)
+        return cell
+
+    def merge(self, row, start_col, end_col, value=None, style=None, fit=False):
+        self.ws.merge_cells(start_row=row, start_column=start_col, end_row=row, end_column=end_col)
+        return self.write(row, start_col, value, style, fit)
+
+    def set_row_height(self, row, height):
+        self.ws.row_dimensions[row].height = height
+
+    def set_column_width(self, col, width):
+        self.ws.column_dimensions[get_column_letter(col)].width = width
+
+    def freeze_panes(self, row, col):
+        self.ws.freeze_panes = self.ws.cell(row, col).coordinate
+
+    def add_line_chart(self, anchor_row, anchor_col, title, categories, series,
+                       x_title=None, y_title=None, width=34, height=18):
+        """
+        categories = (col, first_row, last_row);
+        series = [{"col", "title_row", "first_row", "last_row", "color", "width", "dash"}, ...]
+        width/height — у сантиметрах.
+        """
+        chart = LineChart()
+        chart.title = title
+        chart.style = 27
+        chart.height = height
+        chart.width = width
+        chart.x_axis.title = x_title
+        chart.y_axis.title = y_title
+        chart.legend.position = "b"
+
+        for s in series:
+            data_ref = Reference(self.ws, min_col=s["col"], min_row=s["title_row"], max_row=s["last_row"])
+            chart.add_data(data_ref, titles_from_data=True)
+        col, first_row, last_row = categories
+        chart.set_categories(Reference(self.ws, min_col=col, min_row=first_row, max_row=last_row))
+
+        for s, chart_series in zip(series, chart.series):
+            chart_series.graphicalProperties.line.solidFill = s["color"]
+            chart_series.graphicalProperties.line.width = int(s.get("width", 2.2) * 12700)
+            if s.get("dash"):
+                chart_series.graphicalProperties.line.dashStyle = "dash"
+            chart_series.marker.symbol = "circle"
+            chart_series.marker.size = 7
+
+        self.ws.add_chart(chart, f"{get_column_letter(anchor_col)}{anchor_row}")
+
+
+class OpenpyxlBook:
+    """Запис результатів у вхідну книгу openpyxl (оригінальні аркуші зберігаються як є)"""
+
+    def __init__(self, source, compression_level=DEFAULT_COMPRESSION_LEVEL):
+        self.workbook = load_workbook(filename=source)
+        # Вхідна книга може бути результатом попереднього запуску: старі аркуші результату
+        # (зокрема пронумеровані "Тренд 2", яких новий запуск може й не створити) видаляються
+        for title in self.workbook.sheetnames:
+            if is_generated_sheet(title):
+                self.workbook.remove(self.workbook[title])
+        self.compression_level = compression_level
+        self._styles = {}
+
+    def style(self, style) -> str | None:
+        """Назва іменованого стилю (NamedStyle реєструється в книзі при першому використанні)"""
+        key = style if isinstance(style, str) else tuple(sorted(style.items()))
+        name = self._styles.get(key)
+        if name is None:
+            name, props = resolve_style(style)
+            if name not in self.workbook.named_styles:
+                self.workbook.add_named_style(_named_style(name, props))
+            self._styles[key] = name
+        return name
+
+    def add_sheet(self, title):
+        if title in self.workbook.sheetnames:
+            self.workbook.remove(self.workbook[title])
+        return OpenpyxlSheetWriter(self, self.workbook.create_sheet(title=title))
+
+    def save(self, output):
+        # Те саме, що Workbook.save, але з вибраним рівнем стиснення архіву
+        archive = _zip_archive(output, self.compression_level)
+        self.workbook.properties.modified = datetime.now(tz=timezone.utc).replace(tzinfo=None)
+        ExcelWriter(self.workbook, archive).save()
+
+
+# -------------------------------------------------------------- xlsxwriter
+
+class XlsxSheetWriter(_SheetWriter):
+    def __init__(self, book, ws, title):
+        self.book = book
+        self.ws = ws
+        self.title = title
+        self.widths = ColumnWidthTracker()
+
+    def write(self, row, col, value, style=None, fit=True):
+        fmt = self.book.format(style)
+        if value is None or value == "":
+            if fmt is not None:
+                self.ws.write_blank(row - 1, col - 1, None, fmt)
+            return
+        if fit:
+            self.widths.track(col, value)
+        if isinstance(value, (datetime, date, time)):
+            self.ws.write_datetime(row - 1, col - 1, value, fmt or self.book.format({"num_format": "yyyy-mm-dd"}))
+        else:
+            self.ws.write(row - 1, col - 1, value, fmt)
+
+    def merge(self, row, start_col, end_col, value=None, style=None, fit=False):
+        if fit:
+            self.widths.track(start_col, value)
+        self.ws.merge_range(row - 1, start_col - 1, row - 1, end_col - 1,
+                            "" if value is None else value, self.book.format(style))
+
+    def set_row_height(self, row, height):
+        self.ws.set_row(row - 1, height)
+
+    def set_column_width(self, col, width):
+        self.ws.set_column(col - 1, col - 1, width)
+
+    def freeze_panes(self, row, col):
+        self.ws.freeze_panes(row - 1, col - 1)
+
+    def add_line_chart(self, anchor_row, anchor_col, title, categories, series,
+                       x_title=None, y_title=None, width=34, height=18):
+        chart = self.book.workbook.add_chart({"type": "line"})
+        col, first_row, last_row = categories
+        for s in series:
+            line = {"color": f"#{s['color']}", "width": s.get("width", 2.2)}
+            if s.get("dash"):
+                line["dash_type"] = "dash"
+            chart.add_series({
+                "name": [self.title, s["title_row"] - 1, s["col"] - 1],
+                "categories": [self.title, first_row - 1, col - 1, last_row - 1, col - 1],
+                "values": [self.title, s["first_row"] - 1, s["col"] - 1, s["last_row"] - 1, s["col"] - 1],
+                "line": line,
+                "marker": {"type": "circle", "size": 7},
+            })
+        chart.set_title({"name": title})
+        chart.set_x_axis({"name": x_title})
+        chart.set_y_axis({"name": y_title})
+        chart.set_legend({"position": "bottom"})
+        chart.set_size({"width": width * 37.8, "height": height * 37.8})
+        self.ws.insert_chart(anchor_row - 1, anchor_col - 1, chart)
+
+
+class XlsxBook:
+    """
+    Потоковий запис результатів через xlsxwriter у режимі constant_memory.
+    Вхідні аркуші переносяться лише як значення (без форматування та об'єднань).
+    xlsxwriter завжди стискає архів типовим рівнем zlib, тому для іншого
+    compression_level книга пишеться в проміжний файл поруч з output
+    і перепаковується в save().
+    """
+
+    def __init__(self, source, output, compression_level=DEFAULT_COMPRESSION_LEVEL):
+        self.source = source
+        self.output = output
+        self.compression_level = compression_level
+        self._staging = None if compression_level == DEFAULT_COMPRESSION_LEVEL else f"{output}.staging"
+        self.workbook = xlsxwriter.Workbook(self._staging or output, {"constant_memory": True, "in_memory": False})
+        self._formats = {}
+        self._copy_input_sheets()
+
+    def format(self, style):
+        if not style:
+            return None
+        key = style if isinstance(style, str) else tuple(sorted(style.items()))
+        if key not in self._formats:
+            style = resolve_style(style)[1]
+            props = {}
+            if "bold" in style:
+                props["bold"] = style["bold"]
+            if "size" in style:
+                props["font_size"] = style["size"]
+            if "color" in style:
+                props["font_color"] = f"#{style['color']}"
+            if "fill" in style:
+                props["pattern"] = 1
+                props["bg_color"] = f"#{style['fill']}"
+            if "align" in style:
+                props["align"] = style["align"]
+            if "valign" in style:
+                props["valign"] = "vcenter" if style["valign"] == "center" else style["valign"]
+            if style.get("wrap"):
+                props["text_wrap"] = True
+            if "indent" in style:
+                props["indent"] = style["indent"]
+            if "border" in style:
+                props["border"] = 1
+            if "num_format" in style:
+                props["num_format"] = style["num_format"]
+            self._formats[key] = self.workbook.add_format(props)
+        return self._formats[key]
+
+    def _copy_input_sheets(self):
+        source = load_workbook(filename=self.source, read_only=True)
+        try:
+            for ws in source.worksheets:
+                if is_generated_sheet(ws.title):
+                    continue
+                writer = XlsxSheetWriter(self, self.workbook.add_worksheet(ws.title), ws.title)
+                for row_idx, row in enumerate(ws.iter_rows(values_only=True), start=1):
+                    writer.write_row(row_idx, row, fit=False)
+        finally:
+            source.close()
+
+    def add_sheet(self, title):
+        return XlsxSheetWriter(self, self.workbook.add_worksheet(title), title)
+
+    def save(self, output=None):
+        if self._staging is None:
+            self.workbook.close()
+            return
+        try:
+            self.workbook.close()
+            _recompress(self._staging, self.output, self.compression_level)
+        finally:
+            if os.path.exists(self._staging):
+                os.unlink(self._staging)
+
+
+def open_output_book(backend, source, output, compression_level=DEFAULT_COMPRESSION_LEVEL):
+    """Книга для запису результатів вибраним бекендом"""
+    if backend == "xlsxwriter":
+        return XlsxBook(source, output, compression_level)
+    return OpenpyxlBook(source, compression_level)
@@ -0,0 +1,24 @@
+# tests/conftest.py
+from io import BytesIO
+
+import pytest
+
+from benchmarks.workbook_generator import generate_workbook
+
+
+def make_workbook(seed: int = 1, **spec) -> tuple[bytes, dict]:
+    """Синтетична книга (байти) і поля форми для неї"""
+    buffer = BytesIO()
+    form = generate_workbook(buffer, seed=seed, **spec)
+    return buffer.getvalue(), form
+
+
+@pytest.fixture(scope="session")
+def client():
+    """TestClient основного застосунку; пул процесів живе до кінця сесії тестів"""
+    from fastapi.testclient import TestClient
+
+    from main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
@@ -0,0 +1,62 @@
+# tests/test_backtest.py
+import numpy as np
+import pytest
+
+from engine.backtest import backtest, backtest_origins
+from engine.forecast_engine import ForecastEngine
+
+
+def seasonal_history(rng, n: int, season_length: int, first: int, n_series: int = 3):
+    """Ряди з трендом, сезонністю, шумом і пропусками; історія починається з періоду first"""
+    index = first - 1 + np.arange(n)
+    years = 2015 + index // season_length
+    months = index % season_length + 1
+    profile = 1 + 0.3 * np.sin(2 * np.pi * np.arange(season_length) / season_length)
+    values = (200 + 2 * np.arange(n)[:, None]) * profile[months - 1, None] + rng.normal(0, 5, (n, n_series))
+    values[rng.random(values.shape) < 0.1] = np.nan
+    return values, years, months
+
+
+@pytest.mark.parametrize("seed", range(3))
+@pytest.mark.parametrize("season_length, first, horizon", [(12, 1, 0), (12, 5, 18), (4, 3, 6), (7, 1, 0)])
+def test_backtest_matches_full_rerun_per_origin(seed, season_length, first, horizon):
+    rng = np.random.default_rng(seed)
+    n = 4 * season_length + int(rng.integers(season_length))
+    values, years, months = seasonal_history(rng, n, season_length, first)
+    k = int(rng.integers(0, 4))
+
+    result = backtest(values, years, months, k, season_length, horizon)
+
+    engine = ForecastEngine(k=k, n_forecast=horizon, season_length=season_length)
+    for o, origin in enumerate(result["origins"]):
+        rerun = engine.run(values[:origin], months[:origin])
+        # Тренд бектесту — з неокруглених десезоналізованих значень: розбіжність лише в округленні
+        np.testing.assert_allclose(result["forecast"][o], rerun.seasonal_forecast, rtol=0, atol=0.02 + 1e-9)
+
+        rows = {(y, m): i for i, (y, m) in enumerate(zip(years.tolist(), months.tolist()))}
+        offsets, periods = engine.forecast_periods(int(years[origin - 1]) + 1)
+        for h, key in enumerate(zip(offsets.tolist(), periods.tolist())):
+            expected = values[rows[key]] if key in rows else np.full(values.shape[1], np.nan)
+            np.testing.assert_array_equal(result["actual"][o, h], expected)
+
+
+@pytest.mark.parametrize("season_length, first", [(12, 1), (12, 7), (4, 2), (52, 30)])
+@pytest.mark.parametrize("min_history", [0, 1, 13, 30])
+def test_origins_fall_only_at_season_end(season_length, first, min_history):
+    n = 3 * season_length + 5
+    months = (first - 1 + np.arange(n)) % season_length + 1
+    origins = backtest_origins(months, season_length, min_history)
+
+    # Кожна точка відліку — кінець сезону, після якого є факт, і не коротша за min_history
+    expected = [t for t in range(1, n + 1)
+                if months[t - 1] == season_length and max(min_history, 2) <= t < n]
+    assert origins.tolist() == expected
+    assert all(months[t - 1] == season_length for t in origins)
+
+
+def test_backtest_uses_two_seasons_by_default():
+    rng = np.random.default_rng(0)
+    values, years, months = seasonal_history(rng, 40, 12, 1)
+    assert backtest(values, years, months, 2)["origins"].tolist() == [24, 36]
+    with pytest.raises(ValueError):
+        backtest(values[:24], years[:24], months[:24], 2)
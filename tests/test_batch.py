@@ -0,0 +1,65 @@
+# tests/test_batch.py
+import json
+import zipfile
+from io import BytesIO
+
+from openpyxl import load_workbook
+
+from tests.conftest import make_workbook
+
+
+def post_batch(client, files: list[tuple[str, bytes]], form: dict, overrides: dict):
+    response = client.post(
+        "/process-excel/batch/",
+        files=[("files", (name, content)) for name, content in files],
+        data={**{key: str(value) for key, value in form.items()}, "overrides": json.dumps(overrides)},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/zip"
+    archive = zipfile.ZipFile(BytesIO(response.content))
+    return archive, json.loads(archive.read("manifest.json"))
+
+
+def test_mixed_batch(client):
+    first, form = make_workbook(seed=101)
+    second, _ = make_workbook(seed=102)
+    files = [("a.xlsx", first), ("notes.txt", b"not a workbook"), ("b.xlsx", second), ("c.xlsx", first)]
+    overrides = {"c.xlsx": {"k": -1}}
+
+    archive, manifest = post_batch(client, files, form, overrides)
+
+    assert (manifest["total"], manifest["succeeded"], manifest["failed"]) == (4, 2, 2)
+    statuses = [(entry["filename"], entry["status"], entry["status_code"]) for entry in manifest["files"]]
+    # Маніфест — у порядку завантаження, незалежно від порядку готовності
+    assert statuses == [
+        ("a.xlsx", "ok", 200),
+        ("notes.txt", "error", 400),
+        ("b.xlsx", "ok", 200),
+        ("c.xlsx", "error", 422),
+    ]
+    assert "Підтримуються тільки файли .xlsx" in manifest["files"][1]["detail"]
+    assert "Помилка валідації" in manifest["files"][3]["detail"]
+    assert [entry.get("cached") for entry in manifest["files"]] == [False, None, False, None]
+
+    assert sorted(archive.namelist()) == ["manifest.json", "processed_a.xlsx", "processed_b.xlsx"]
+    for name in ("processed_a.xlsx", "processed_b.xlsx"):
+        book = load_workbook(BytesIO(archive.read(name)))
+        assert "Фінальний прогноз" in book.sheetnames
+
+    # Повторне завантаження тих самих книг з тими самими параметрами — з кешу, той самий результат
+    repeat, manifest = post_batch(client, files, form, overrides)
+    assert [entry.get("cached") for entry in manifest["files"]] == [True, None, True, None]
+    assert repeat.read("processed_a.xlsx") == archive.read("processed_a.xlsx")
+
+
+def test_batch_expands_zip_and_renames_duplicates(client):
+    content, form = make_workbook(seed=103)
+    bundle = BytesIO()
+    with zipfile.ZipFile(bundle, "w") as z:
+        z.writestr("x/book.xlsx", content)
+        z.writestr("__MACOSX/._book.xlsx", b"")
+        z.writestr(".hidden.xlsx", b"")
+    archive, manifest = post_batch(client, [("book.xlsx", content), ("more.zip", bundle.getvalue())], form, {})
+
+    assert [entry["filename"] for entry in manifest["files"]] == ["book.xlsx", "book.xlsx"]
+    assert sorted(archive.namelist()) == ["manifest.json", "processed_book.xlsx", "processed_book_2.xlsx"]
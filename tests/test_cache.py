@@ -0,0 +1,121 @@
+# tests/test_cache.py
+import os
+import time
+
+import pytest
+
+from main import etag_matches
+from pipeline.cache import ResultCache, result_cache_key
+from tests.conftest import make_workbook
+
+
+def age(path, seconds: float):
+    """Зсуває mtime файлу в минуле"""
+    stamp = time.time() - seconds
+    os.utime(path, (stamp, stamp))
+
+
+def test_lru_evicts_by_total_bytes():
+    cache = ResultCache(max_bytes=10)
+    cache.put("a", b"1234")
+    cache.put("b", b"1234")
+    assert cache.get("a") == b"1234"          # a стає найсвіжішим
+    cache.put("c", b"1234")                   # 12 > 10 байтів — витісняється b
+
+    assert cache.get("b") is None
+    assert cache.get("a") == b"1234" and cache.get("c") == b"1234"
+    assert cache._size == 8
+
+    cache.put("big", b"x" * 11)               # більший за весь кеш — у пам'ять не потрапляє
+    assert cache.get("big") is None
+    assert not cache.contains("big")
+
+
+def test_evicted_entries_spill_to_disk_and_come_back(tmp_path):
+    cache = ResultCache(max_bytes=10, directory=str(tmp_path), ttl=60)
+    cache.put("a", b"1234")
+    cache.put("b", b"5678")
+    cache.put("c", b"9999")                   # a витісняється на диск
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["a.xlsx"]
+
+    assert cache.contains("a")
+    assert cache.get("a") == b"1234"          # з диска назад у пам'ять
+    cache.put("big", b"x" * 11)               # завеликий — одразу на диск
+    assert cache.get("big") == b"x" * 11
+
+
+def test_disk_entries_expire_after_ttl(tmp_path):
+    cache = ResultCache(max_bytes=0, directory=str(tmp_path), ttl=60)
+    cache.put("old", b"1")
+    cache.put("new", b"2")
+    age(tmp_path / "old.xlsx", 120)
+
+    # contains/get не віддають прострочений запис і видаляють його
+    assert not cache.contains("old")
+    assert not (tmp_path / "old.xlsx").exists()
+    assert cache.get("new") == b"2"
+
+    cache.put("stale", b"3")
+    age(tmp_path / "stale.xlsx", 120)
+    cache._last_sweep = 0.0
+    cache.evict_expired()
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["new.xlsx"]
+
+
+def test_put_file(tmp_path):
+    result = tmp_path / "result.xlsx"
+    result.write_bytes(b"x" * 20)
+
+    memory = ResultCache(max_bytes=100)
+    memory.put_file("k", str(result))
+    assert memory.get("k") == b"x" * 20
+
+    spill_dir = tmp_path / "cache"
+    disk = ResultCache(max_bytes=10, directory=str(spill_dir), ttl=60)
+    disk.put_file("k", str(result))
+    assert (spill_dir / "k.xlsx").read_bytes() == b"x" * 20
+    assert result.exists()                    # джерело лишається для відповіді
+
+
+def test_cache_key_depends_on_content_and_params():
+    params = {"k": 2, "filename": "a.xlsx"}
+    assert result_cache_key(b"abc", params) == result_cache_key(b"abc", dict(reversed(params.items())))
+    assert result_cache_key(b"abc", params) != result_cache_key(b"abd", params)
+    assert result_cache_key(b"abc", params) != result_cache_key(b"abc", {**params, "k": 3})
+
+
+@pytest.mark.parametrize("header, matches", [
+    ("*", True),
+    ('"tag"', True),
+    ('W/"tag"', True),
+    ('"other", W/"tag"', True),
+    (' "other" ,"tag" ', True),
+    ('"other"', False),
+    ("tag", False),
+])
+def test_if_none_match_parsing(header, matches):
+    assert etag_matches(header, '"tag"') is matches
+
+
+def test_conditional_request_returns_304(client):
+    content, form = make_workbook(seed=201)
+    data = {key: str(value) for key, value in form.items()}
+
+    def post(**headers):
+        return client.post("/process-excel/", files={"file": ("cond.xlsx", content)}, data=data, headers=headers)
+
+    first = post()
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+
+    for header in (etag, f"W/{etag}", f'"nope", {etag}', "*"):
+        response = post(**{"If-None-Match": header})
+        assert response.status_code == 304
+        assert response.headers["etag"] == etag
+        assert response.content == b""
+
+    # Інший тег — повна відповідь, уже з кешу
+    response = post(**{"If-None-Match": '"nope"'})
+    assert response.status_code == 200
+    assert response.headers["server-timing"].startswith('cache;desc="hit"')
+    assert response.content == first.content
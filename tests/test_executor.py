@@ -0,0 +1,93 @@
+# tests/test_executor.py
+import asyncio
+import os
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from pipeline.executor import PipelineExecutor
+
+
+def answer(value: int = 42) -> int:
+    return value
+
+
+def sleep_then_answer(seconds: float) -> int:
+    time.sleep(seconds)
+    return 42
+
+
+def crash():
+    os._exit(1)
+
+
+def run(coroutine_fn):
+    """Виконує сценарій з власним циклом подій і закриває пул наприкінці"""
+    executor = PipelineExecutor(max_workers=1, max_queue=0, retry_after=7)
+
+    async def scenario():
+        try:
+            return await coroutine_fn(executor)
+        finally:
+            executor.shutdown()
+
+    return asyncio.run(scenario())
+
+
+def test_rejects_when_workers_and_queue_are_full():
+    async def scenario(executor):
+        busy = asyncio.create_task(executor.submit(sleep_then_answer, 1.0))
+        while executor.stats()["in_flight"] == 0:
+            await asyncio.sleep(0.01)
+
+        with pytest.raises(HTTPException) as rejected:
+            await executor.submit(answer)
+        assert rejected.value.status_code == 503
+        assert rejected.value.headers == {"Retry-After": "7"}
+
+        # queue=True чекає на вільний процес замість 503
+        assert await executor.submit(answer, 1, queue=True) == 1
+        assert await busy == 42
+        assert executor.stats() == {"workers": 1, "queue_limit": 0, "queue_depth": 0, "in_flight": 0}
+        assert await executor.submit(answer) == 42
+
+    run(scenario)
+
+
+def test_cancelled_waiter_keeps_slot_until_worker_finishes():
+    async def scenario(executor):
+        waiter = asyncio.create_task(executor.submit(sleep_then_answer, 1.0))
+        while executor.stats()["in_flight"] == 0:
+            await asyncio.sleep(0.01)
+        waiter.cancel()
+        await asyncio.sleep(0.05)
+
+        # Процес ще працює — слот зайнятий, новий запит не допускається
+        assert executor.stats()["in_flight"] == 1
+        with pytest.raises(HTTPException):
+            executor.admit()
+
+        while executor.stats()["in_flight"]:
+            await asyncio.sleep(0.05)
+        assert await executor.submit(answer) == 42
+
+    run(scenario)
+
+
+def test_pool_is_rebuilt_after_worker_crash():
+    async def scenario(executor):
+        assert await executor.submit(answer) == 42
+        broken = executor._pool
+
+        with pytest.raises(HTTPException) as crashed:
+            await executor.submit(crash)
+        assert crashed.value.status_code == 503
+        assert crashed.value.headers == {"Retry-After": "7"}
+        assert executor._pool is None
+
+        assert await executor.submit(answer, 5) == 5
+        assert executor._pool is not broken
+        assert executor.stats()["in_flight"] == 0
+
+    run(scenario)
@@ -0,0 +1,108 @@
+# tests/test_forecast_api.py
+import json
+
+import numpy as np
+import pytest
+
+from engine.forecast_engine import ForecastEngine, to_cells
+
+YEARS = [2021 + i // 12 for i in range(30)]
+MONTHS = [i % 12 + 1 for i in range(30)]
+SERIES = {
+    "Київ": [100 + i + 15 * (i % 12 in (5, 6)) for i in range(30)],
+    "Львів": [None if i in (3, 17) else 50 + 0.5 * i + 5 * (i % 12 == 11) for i in range(30)],
+}
+FACTORS = [
+    {"description": "Інфляція", "type": "Коефіцієнт", "header": "київ", "data": [1.01] * 12},
+    {"description": "Акція", "type": "одиниці", "header": "Львів", "data": [5.0, None, 3.0],
+     "years": [2023, 2023, 2023], "months": [7, 8, 9]},
+]
+
+
+def expected_series(series: dict, factors: list[dict], k: int = 2, horizon: int = 0) -> dict:
+    """Те саме через ForecastEngine.run"""
+    headers = list(series)
+    values = np.array([series[h] for h in headers], dtype=float).T
+    engine = ForecastEngine(k=k, n_forecast=horizon)
+    factors = [{**f, "type": f["type"].strip().lower(), "years": f.get("years"), "months": f.get("months")}
+               for f in factors]
+    result = engine.run(values, MONTHS, headers, factors, YEARS[-1] + 1)
+    return {
+        h: {
+            "smoothed": to_cells(result.smoothed[:, s]),
+            "seasonal": to_cells(result.seasonal[:, s]),
+            "trend_forecast": to_cells(result.trend_forecast[:, s]),
+            "seasonal_forecast": to_cells(result.seasonal_forecast[:, s]),
+            "final": to_cells(result.final[:, s]),
+        }
+        for s, h in enumerate(headers)
+    }
+
+
+def actual_series(payload: dict) -> dict:
+    return {
+        h: {
+            "smoothed": s["smoothed"],
+            "seasonal": s["seasonal"],
+            "trend_forecast": s["trend"]["forecast"],
+            "seasonal_forecast": s["seasonal_forecast"],
+            "final": s["final"],
+        }
+        for h, s in payload["series"].items()
+    }
+
+
+def to_csv(separator: str = ",", decimal: str = ".") -> str:
+    lines = [separator.join(["Рік", "Місяць", *SERIES])]
+    for i, (year, month) in enumerate(zip(YEARS, MONTHS)):
+        cells = ["" if SERIES[h][i] is None else str(SERIES[h][i]).replace(".", decimal) for h in SERIES]
+        lines.append(separator.join([str(year), str(month), *cells]))
+    return "\n".join(lines)
+
+
+def test_json_matches_engine(client):
+    response = client.post("/forecast", json={"years": YEARS, "months": MONTHS, "series": SERIES,
+                                              "factors": FACTORS, "horizon": 18})
+    assert response.status_code == 200
+    payload = response.json()
+    assert payload["model_year"] == 2024
+    assert len(payload["forecast_periods"]) == 18
+    assert payload["forecast_periods"][12] == {"year": 2025, "month": 1}
+    assert actual_series(payload) == expected_series(SERIES, FACTORS, horizon=18)
+    assert [f["description"] for f in payload["series"]["Київ"]["factors"]] == ["Інфляція"]
+
+
+@pytest.mark.parametrize("separator, decimal", [(",", "."), (";", ",")])
+def test_csv_body_matches_json(client, separator, decimal):
+    response = client.post("/forecast?k=2", content=to_csv(separator, decimal).encode("utf-8-sig"),
+                           headers={"content-type": "text/csv"})
+    assert response.status_code == 200
+    assert actual_series(response.json()) == expected_series(SERIES, [])
+
+
+def test_multipart_csv_matches_json(client):
+    response = client.post("/forecast", files={"file": ("history.csv", to_csv().encode())},
+                           data={"k": "3", "factors": json.dumps(FACTORS)})
+    assert response.status_code == 200
+    assert response.json()["k"] == 3
+    assert actual_series(response.json()) == expected_series(SERIES, FACTORS, k=3)
+
+
+@pytest.mark.parametrize("request_kwargs, message", [
+    ({"content": b"year,month\n2021,1\n", "headers": {"content-type": "text/csv"}}, "рядок заголовків"),
+    ({"content": "Рік,Місяць,А\n2021,1,abc\n".encode(), "headers": {"content-type": "text/csv"}},
+     "Рядок 2: некоректне число"),
+    ({"files": {"file": ("h.csv", to_csv().encode())}, "data": {"factors": "[{"}}, "Помилка валідації"),
+    ({"files": {"file": ("h.csv", to_csv().encode())}, "data": {"factors": '[{"type": "одиниці"}]'}}, "header"),
+    ({"json": {"years": YEARS, "months": MONTHS, "series": SERIES,
+               "factors": [{"type": "відсоток", "header": "Київ", "data": [1.0]}]}}, "type"),
+    ({"json": {"years": [2021, 2021, 2021], "months": [1, 2, 4], "series": {"А": [1, 2, 3]}}},
+     "очікується 2021-03, отримано 2021-04"),
+    ({"json": {"years": [2021, 2021], "months": [12, 1], "series": {"А": [1, 2]}}}, "очікується 2022-01"),
+    ({"json": {"years": [2021], "months": [13], "series": {"А": [1]}}}, "діапазоні 1–12"),
+    ({"json": {"years": [2021, 2021], "months": [1, 2], "series": {"А": [1]}}}, "1 значень замість 2"),
+])
+def test_invalid_input_is_422(client, request_kwargs, message):
+    response = client.post("/forecast", **request_kwargs)
+    assert response.status_code == 422
+    assert message in response.json()["detail"]
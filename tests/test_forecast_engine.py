@@ -0,0 +1,263 @@
+# tests/test_forecast_engine.py
+import numpy as np
+import pytest
+
+from engine.forecast_engine import (
+    apply_factors, fit_trend, match_factors, round_half_up, seasonal_coefficients, smooth, smoothing_windows,
+)
+
+
+def random_series(rng, n: int, n_series: int = 4, gaps: float = 0.2) -> np.ndarray:
+    """Випадкові ряди (n × n_series) з пропусками NaN у частці gaps періодів"""
+    values = rng.uniform(10, 1000, size=(n, n_series))
+    values[rng.random((n, n_series)) < gaps] = np.nan
+    return values
+
+
+def naive_window(n: int, k: int, i: int) -> tuple[int, int]:
+    """Вікно періоду i, як його описано в методиці: на краях симетрично звужується"""
+    if i < k:
+        return 0, min(2 * i + 1, n)
+    if i >= n - k:
+        return max(0, 2 * i - n + 1), n
+    return i - k, i + k + 1
+
+
+def naive_smooth(values: np.ndarray, k: int) -> np.ndarray:
+    """Згладжування циклом по періодах і рядах — еталон для smooth"""
+    n, n_series = values.shape
+    out = np.full((n, n_series), np.nan)
+    for j in range(n_series):
+        for i in range(n):
+            start, end = naive_window(n, k, i)
+            window = values[start:end, j]
+            window = window[~np.isnan(window)]
+            if not np.isnan(values[i, j]) and window.size:
+                out[i, j] = window.mean()
+    return out
+
+
+@pytest.mark.parametrize("n", [1, 2, 5, 12, 37])
+@pytest.mark.parametrize("k", [0, 1, 2, 3, 10, 50])
+def test_smoothing_windows_match_naive(n, k):
+    start, end = smoothing_windows(n, k)
+    assert [(int(s), int(e)) for s, e in zip(start, end)] == [naive_window(n, k, i) for i in range(n)]
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("k", [0, 1, 2, 4, 40])
+def test_smooth_matches_naive_mean(seed, k):
+    rng = np.random.default_rng(seed)
+    values = random_series(rng, int(rng.integers(1, 30)))
+    # Результат округлюється до сотих, еталон — ні
+    np.testing.assert_allclose(smooth(values, k), naive_smooth(values, k), atol=0.005 + 1e-9, equal_nan=True)
+
+
+def test_smooth_edges_and_gaps():
+    values = np.array([[np.nan], [1.0], [np.nan], [np.nan], [5.0], [np.nan]])
+    np.testing.assert_allclose(smooth(values, 1), naive_smooth(values, 1), atol=0.005 + 1e-9, equal_nan=True)
+    assert np.isnan(smooth(np.full((4, 2), np.nan), 2)).all()
+
+
+def naive_seasonal(smoothed: np.ndarray, months, season_length: int) -> tuple[np.ndarray, np.ndarray]:
+    """Сезонні коефіцієнти циклом по рядах і періодах сезону — еталон для seasonal_coefficients"""
+    months = np.asarray(months)
+    n_series = smoothed.shape[1]
+    unnormalized = np.ones((season_length, n_series))
+    normalized = np.ones((season_length, n_series))
+    for j in range(n_series):
+        column = smoothed[:, j]
+        valid = column[~np.isnan(column)]
+        overall = valid.mean() if valid.size else np.nan
+        for p in range(season_length):
+            period = column[(months == p + 1) & ~np.isnan(column)]
+            if period.size and not np.isnan(overall) and overall != 0:
+                unnormalized[p, j] = period.mean() / overall
+        total = unnormalized[:, j].sum()
+        normalized[:, j] = unnormalized[:, j] * (season_length / total if total != 0 else 1.0)
+    return unnormalized, normalized
+
+
+@pytest.mark.parametrize("seed", range(4))
+@pytest.mark.parametrize("season_length", [2, 4, 7, 12, 52])
+def test_seasonal_coefficients_match_per_season_loop(seed, season_length):
+    rng = np.random.default_rng(seed)
+    n = int(rng.integers(1, 4 * season_length))
+    # Історія може починатися з будь-якого періоду сезону й не покривати всі періоди
+    first = int(rng.integers(season_length))
+    months = (first + np.arange(n)) % season_length + 1
+    smoothed = random_series(rng, n, gaps=0.3)
+    smoothed[:, 0] = np.nan
+
+    unnormalized, normalized = seasonal_coefficients(smoothed, months, season_length)
+    expected_unnormalized, expected_normalized = naive_seasonal(smoothed, months, season_length)
+
+    assert unnormalized.shape == normalized.shape == (season_length, smoothed.shape[1])
+    np.testing.assert_allclose(unnormalized, expected_unnormalized, rtol=1e-12)
+    # Нормовані коефіцієнти округлюються до 4 знаків, еталон — ні
+    np.testing.assert_allclose(normalized, expected_normalized, atol=0.00005 + 1e-9)
+
+
+def test_seasonal_coefficients_reject_period_outside_season():
+    with pytest.raises(ValueError):
+        seasonal_coefficients(np.ones((3, 1)), [1, 2, 5], season_length=4)
+
+
+def polyfit_trend(deseasoned: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """(A, B) через numpy.polyfit по непропущених періодах; менше двох значень — нулі"""
+    x = np.arange(1, deseasoned.shape[0] + 1, dtype=float)
+    intercept, slope = np.zeros(deseasoned.shape[1]), np.zeros(deseasoned.shape[1])
+    for j in range(deseasoned.shape[1]):
+        mask = ~np.isnan(deseasoned[:, j])
+        if mask.sum() >= 2:
+            slope[j], intercept[j] = np.polyfit(x[mask], deseasoned[mask, j], 1)
+    return intercept, slope
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("n_forecast", [1, 12])
+def test_fit_trend_matches_polyfit(seed, n_forecast):
+    rng = np.random.default_rng(seed)
+    n = int(rng.integers(2, 60))
+    x = np.arange(1, n + 1)
+    deseasoned = 50 + 3 * x[:, None] + rng.normal(0, 20, size=(n, 5))
+    deseasoned[rng.random(deseasoned.shape) < 0.3] = np.nan
+    deseasoned[:, 0] = np.nan                          # лише пропуски
+    deseasoned[:, 1] = np.nan
+    deseasoned[n // 2, 1] = 42.0                       # одне значення
+
+    intercept, slope, trend_hist, trend_forecast = fit_trend(deseasoned, n_forecast)
+    expected_intercept, expected_slope = polyfit_trend(deseasoned)
+
+    np.testing.assert_allclose(intercept, expected_intercept, rtol=1e-9, atol=1e-9)
+    np.testing.assert_allclose(slope, expected_slope, rtol=1e-9, atol=1e-9)
+    x_forecast = np.arange(n + 1, n + n_forecast + 1)
+    np.testing.assert_allclose(trend_hist, expected_intercept + np.outer(x, expected_slope), atol=0.005 + 1e-6)
+    np.testing.assert_allclose(trend_forecast, expected_intercept + np.outer(x_forecast, expected_slope),
+                               atol=0.005 + 1e-6)
+    assert (intercept[:2] == 0).all() and (slope[:2] == 0).all()
+
+
+def test_fit_trend_keeps_period_numbers_after_gaps():
+    # Пропуски не стискають ряд: значення лежать рівно на прямій 10 + 2·t
+    deseasoned = np.array([[12.0], [np.nan], [np.nan], [18.0], [20.0], [np.nan]])
+    intercept, slope, _, trend_forecast = fit_trend(deseasoned, 2)
+    np.testing.assert_allclose([intercept[0], slope[0]], [10.0, 2.0])
+    np.testing.assert_allclose(trend_forecast[:, 0], [24.0, 26.0])
+
+
+def nested_loop_rows(factor: dict, periods, n_forecast: int) -> list[int | None]:
+    """Рядок таблиці фактора для кожного періоду горизонту — перебором усіх рядків"""
+    years, months = factor.get("years"), factor.get("months")
+    keyed = [(i, (int(y), int(m))) for i, (y, m) in enumerate(zip(years or [], months or []))
+             if y is not None and m is not None]
+    if not keyed:
+        return list(range(n_forecast))
+    rows = []
+    for period in zip(*(p.tolist() for p in periods)):
+        # Як і в словнику з'єднання, повторний (рік, період) бере останній рядок
+        found = [i for i, key in keyed if key == period]
+        rows.append(found[-1] if found else None)
+    return rows
+
+
+def nested_loop_factors(headers, factors_data, periods, seasonal_forecast: np.ndarray,
+                        round_each_step: bool) -> np.ndarray:
+    """
+    Фактори циклом по рядах, факторах і періодах горизонту.
+    round_each_step — колишнє послідовне застосування з округленням після кожного фактора;
+    інакше — прогноз × добуток коефіцієнтів + сума одиниць з одним округленням.
+    """
+    n_forecast = seasonal_forecast.shape[0]
+    final = seasonal_forecast.copy()
+    for s, header in enumerate(headers):
+        scale, shift = np.ones(n_forecast), np.zeros(n_forecast)
+        for f in factors_data:
+            if f["header"].strip().lower().replace(" ", "") != header.strip().lower().replace(" ", ""):
+                continue
+            for t, row in enumerate(nested_loop_rows(f, periods, n_forecast)):
+                value = f["data"][row] if row is not None and row < len(f["data"]) else None
+                if value is None or np.isnan(value):
+                    continue
+                if round_each_step:
+                    if f["type"] == "коефіцієнт":
+                        final[t, s] = round_half_up(final[t, s] * value, 2)
+                    else:
+                        final[t, s] = round_half_up(final[t, s] + value, 2)
+                elif f["type"] == "коефіцієнт":
+                    scale[t] *= value
+                else:
+                    shift[t] += value
+        if not round_each_step:
+            final[:, s] = round_half_up(seasonal_forecast[:, s] * scale + shift, 2)
+    return final
+
+
+def random_factors(rng, headers, periods, per_series: int) -> list[dict]:
+    """Фактори з таблицями за роками/періодами, що частково перекривають горизонт"""
+    years, months = periods
+    factors = []
+    for header in headers:
+        for _ in range(per_series):
+            n_rows = int(rng.integers(1, 2 * len(years)))
+            offset = int(rng.integers(-len(years), len(years)))
+            index = np.arange(offset, offset + n_rows) % (2 * len(years))
+            kind = rng.choice(["коефіцієнт", "одиниці"])
+            data = (rng.uniform(0.8, 1.2, n_rows) if kind == "коефіцієнт" else rng.uniform(-50, 50, n_rows)).round(3)
+            data = [None if rng.random() < 0.2 else float(v) for v in data]
+            factors.append({
+                "description": "",
+                "type": str(kind),
+                # Окремі (але, можливо, однакові за значенням) списки в кожного фактора
+                "header": f" {header.upper()} ",
+                "data": data,
+                "years": [int(years[0]) + int(i) // 12 for i in index],
+                "months": [int(i) % 12 + 1 for i in index],
+            })
+    # Таблиця без років/періодів — позиційно
+    factors.append({"description": "", "type": "одиниці", "header": headers[0], "data": [1.0, None, 2.0]})
+    return factors
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_factors_match_nested_loop_with_one_factor_per_series(seed):
+    rng = np.random.default_rng(seed)
+    headers = ["a", "b", "c"]
+    periods = (np.full(12, 2024), np.arange(1, 13))
+    seasonal_forecast = round_half_up(rng.uniform(100, 1000, size=(12, 3)), 2)
+    factors = [f for f in random_factors(rng, headers, periods, per_series=1) if "years" in f]
+
+    final = apply_factors(seasonal_forecast, match_factors(headers, factors, 12, periods))
+    expected = nested_loop_factors(headers, factors, periods, seasonal_forecast, round_each_step=True)
+    np.testing.assert_allclose(final, expected, rtol=0, atol=1e-9)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_factors_match_nested_loop_with_several_factors(seed):
+    rng = np.random.default_rng(seed)
+    headers = ["a", "b"]
+    years = 2024 + np.arange(18) // 12
+    periods = (years, np.arange(18) % 12 + 1)
+    seasonal_forecast = round_half_up(rng.uniform(100, 1000, size=(18, 2)), 2)
+    factors = random_factors(rng, headers, periods, per_series=3)
+
+    final = apply_factors(seasonal_forecast, match_factors(headers, factors, 18, periods))
+    expected = nested_loop_factors(headers, factors, periods, seasonal_forecast, round_each_step=False)
+    np.testing.assert_allclose(final, expected, rtol=0, atol=1e-9)
+
+
+def test_factor_join_is_keyed_by_year_and_period_values():
+    periods = (np.array([2024, 2024]), np.array([1, 2]))
+    shared = {"years": [2024, 2024], "months": [2, 1]}
+    factors = [
+        {"description": "", "type": "одиниці", "header": "a", "data": [10.0, 20.0], **shared},
+        # Ті самі роки/періоди тим самим об'єктом і рівні за значенням, але іншими списками
+        {"description": "", "type": "одиниці", "header": "a", "data": [1.0, 2.0], **shared},
+        {"description": "", "type": "одиниці", "header": "a", "data": [100.0, 200.0],
+         "years": [2024, 2024], "months": [2, 1]},
+        # Інша таблиця тієї ж довжини
+        {"description": "", "type": "одиниці", "header": "a", "data": [1000.0, 2000.0],
+         "years": [2024, 2024], "months": [1, 2]},
+    ]
+    final = apply_factors(np.zeros((2, 1)), match_factors(["a"], factors, 2, periods))
+    np.testing.assert_allclose(final[:, 0], [20 + 2 + 200 + 1000, 10 + 1 + 100 + 2000])
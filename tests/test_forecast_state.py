@@ -0,0 +1,79 @@
+# tests/test_forecast_state.py
+import numpy as np
+import pytest
+
+from engine.forecast_engine import ForecastEngine
+from engine.forecast_state import MOMENTS, build_state, state_result, update_state
+
+
+def seasonal_history(rng, n: int, season_length: int = 12, n_series: int = 3, gaps: float = 0.1):
+    """Ряди з трендом, сезонністю, шумом і пропусками NaN, починаючи з 2015-01"""
+    index = np.arange(n)
+    years = (2015 + index // season_length).tolist()
+    months = (index % season_length + 1).tolist()
+    profile = 1 + 0.3 * np.sin(2 * np.pi * np.arange(season_length) / season_length)
+    values = (200 + 2 * index[:, None]) * profile[index % season_length, None] + rng.normal(0, 5, (n, n_series))
+    values[rng.random(values.shape) < gaps] = np.nan
+    return years, months, values
+
+
+def assert_matches_full_run(state: dict, months: list[int], values: np.ndarray, horizon: int = 0):
+    """Прогноз зі стану проти ForecastEngine.run на всій історії"""
+    result = state_result(state, n_forecast=horizon)
+    engine = ForecastEngine(k=state["k"], n_forecast=horizon, season_length=state["season_length"])
+    full = engine.run(values, months, state["headers"], [], state["last_year"] + 1)
+
+    np.testing.assert_allclose(result.unnormalized, full.unnormalized, rtol=1e-9)
+    np.testing.assert_allclose(result.seasonal, full.seasonal, rtol=0, atol=1e-9)
+    # Тренд стану — з неокруглених десезоналізованих значень: розбіжність лише в округленні
+    np.testing.assert_allclose(result.trend_forecast, full.trend_forecast, rtol=0, atol=0.01 + 1e-9)
+    np.testing.assert_allclose(result.seasonal_forecast, full.seasonal_forecast, rtol=0, atol=0.02 + 1e-9)
+    np.testing.assert_allclose(result.final, full.final, rtol=0, atol=0.02 + 1e-9)
+
+
+@pytest.mark.parametrize("seed", range(3))
+@pytest.mark.parametrize("k", [1, 2, 3])
+def test_single_period_updates_match_full_rerun(seed, k):
+    rng = np.random.default_rng(seed)
+    years, months, values = seasonal_history(rng, 40)
+    headers = ["a", "b", "c"]
+
+    state = build_state(headers, years[:24], months[:24], values[:24], k)
+    assert_matches_full_run(state, months[:24], values[:24])
+    for t in range(24, 40):
+        state = update_state(state, years[t:t + 1], months[t:t + 1], values[t:t + 1])
+        assert_matches_full_run(state, months[:t + 1], values[:t + 1])
+
+
+@pytest.mark.parametrize("seed", range(3))
+@pytest.mark.parametrize("k", [1, 2, 3])
+def test_multi_period_updates_match_full_rerun(seed, k):
+    rng = np.random.default_rng(seed)
+    years, months, values = seasonal_history(rng, 60)
+    headers = ["a", "b", "c"]
+
+    state = build_state(headers, years[:13], months[:13], values[:13], k)
+    bounds = [13, 14, 17, 29, 30, 45, 60]
+    for start, end in zip(bounds, bounds[1:]):
+        state = update_state(state, years[start:end], months[start:end], values[start:end])
+        assert_matches_full_run(state, months[:end], values[:end], horizon=18)
+
+    # Інкрементний стан збігається зі станом, побудованим за всією історією одразу
+    full = build_state(headers, years, months, values, k)
+    assert state["tail"] == full["tail"]
+    assert (state["n_periods"], state["n_settled"]) == (full["n_periods"], full["n_settled"])
+    for name in MOMENTS:
+        np.testing.assert_allclose(state["moments"][name], full["moments"][name], rtol=1e-9)
+
+
+@pytest.mark.parametrize("years, months", [
+    ([2017], [3]),        # пропущено періоди
+    ([2016], [12]),       # повтор останнього періоду
+    ([2018], [1]),        # не той рік
+])
+def test_update_rejects_non_contiguous_periods(years, months):
+    rng = np.random.default_rng(0)
+    all_years, all_months, values = seasonal_history(rng, 24)
+    state = build_state(["a", "b", "c"], all_years, all_months, values, 2)
+    with pytest.raises(ValueError, match="мають починатися з періоду 2017-01"):
+        update_state(state, years, months, np.ones((1, 3)))
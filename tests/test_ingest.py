@@ -0,0 +1,66 @@
+# tests/test_ingest.py
+from io import BytesIO
+
+import numpy as np
+import pytest
+from fastapi import HTTPException
+from openpyxl import load_workbook
+
+from main import build_params
+from models.excel_params import parse_column_ranges
+from pipeline.process import HIGH_CARDINALITY_SERIES, output_backend, process_workbook
+from sheets.ingest import ingest_workbook
+from tests.conftest import make_workbook
+
+
+@pytest.mark.parametrize("range_str, expected", [
+    ("G", [7]),
+    ("G-J", [7, 8, 9, 10]),
+    ("G-J,L,N-P", [7, 8, 9, 10, 12, 14, 15, 16]),
+    ("g-h, j", [7, 8, 10]),
+    # Порядок діапазонів зберігається, повтори відкидаються
+    ("J,G-J", [10, 7, 8, 9]),
+    ("AA-AB,Z", [27, 28, 26]),
+])
+def test_parse_column_ranges(range_str, expected):
+    assert parse_column_ranges(range_str) == expected
+
+
+@pytest.mark.parametrize("range_data", ["J-G", "G-J,L-K", "G,", "G--J"])
+def test_invalid_range_data(range_data):
+    _, form = make_workbook()
+    with pytest.raises(HTTPException) as error:
+        build_params({**form, "range_data": range_data}, "test.xlsx")
+    assert error.value.status_code == 422
+
+
+def test_multi_range_ingest():
+    content, form = make_workbook(seed=3, n_series=4)
+    full = ingest_workbook(BytesIO(content), build_params(form, "test.xlsx"))
+    data = ingest_workbook(BytesIO(content), build_params({**form, "range_data": "G-H,J"}, "test.xlsx"))
+
+    assert list(data["headers"]) == ["Підрозділ 1", "Підрозділ 2", "Підрозділ 4"]
+    np.testing.assert_array_equal(data["values"], full["values"][:, [0, 1, 3]])
+    assert data["years"] == full["years"]
+    assert data["months"] == full["months"]
+
+
+def test_output_backend_auto():
+    params = {"output_backend": "auto", "series_per_sheet": 0}
+    assert output_backend(params, HIGH_CARDINALITY_SERIES) == "openpyxl"
+    assert output_backend(params, HIGH_CARDINALITY_SERIES + 1) == "xlsxwriter"
+    assert output_backend({**params, "series_per_sheet": 2}, 3) == "xlsxwriter"
+    assert output_backend({**params, "output_backend": "openpyxl"}, 10_000) == "openpyxl"
+
+
+def test_rerun_on_previous_output_drops_stale_sheets():
+    content, form = make_workbook(seed=4, n_series=4)
+    first, _ = process_workbook(content, build_params(
+        {**form, "output_backend": "openpyxl", "series_per_sheet": 2}, "test.xlsx"))
+    assert {"Тренд 1", "Тренд 2"} <= set(load_workbook(BytesIO(first), read_only=True).sheetnames)
+
+    # Результат першого запуску як вхід: усі ряди тепер на одному аркуші
+    second, _ = process_workbook(first, build_params(
+        {**form, "output_backend": "openpyxl", "sheets": "trend"}, "test.xlsx"))
+    sheetnames = load_workbook(BytesIO(second), read_only=True).sheetnames
+    assert sheetnames == ["Статистичні дані", "Фактори впливу", "Тренд"]
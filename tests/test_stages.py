@@ -0,0 +1,57 @@
+# tests/test_stages.py
+from io import BytesIO
+
+import pytest
+from fastapi import HTTPException
+from openpyxl import load_workbook
+
+from main import build_params
+from pipeline.process import process_workbook
+from tests.conftest import make_workbook
+
+INPUT_SHEETS = ["Статистичні дані", "Фактори впливу"]
+
+
+@pytest.mark.parametrize("sheets, stages, titles", [
+    ("final",
+     {"ingest", "smooth", "seasonality", "trend", "factors", "final", "book", "chunks", "sheet_final", "render"},
+     ["Фінальний прогноз"]),
+    ("trend",
+     {"ingest", "smooth", "seasonality", "trend", "book", "chunks", "sheet_trend", "render"},
+     ["Тренд"]),
+    ("start_parameters",
+     {"ingest", "book", "sheet_start_parameters", "render"},
+     ["Початкові налаштування"]),
+    ("final,smoothed",
+     {"ingest", "smooth", "seasonality", "trend", "factors", "final", "book", "chunks",
+      "sheet_smoothed", "sheet_final", "render"},
+     ["Згладжені дані", "Фінальний прогноз"]),
+])
+def test_selected_sheets_run_only_their_stages(sheets, stages, titles):
+    content, form = make_workbook(seed=5)
+    result, metrics = process_workbook(content, build_params({**form, "sheets": sheets}, "test.xlsx"))
+
+    assert set(metrics) == stages
+    assert load_workbook(BytesIO(result), read_only=True).sheetnames == INPUT_SHEETS + titles
+
+
+def test_sheets_canonical_order():
+    _, form = make_workbook()
+    params = build_params({**form, "sheets": " Final, trend ,final"}, "test.xlsx")
+    assert params["sheets"] == "trend,final"
+
+
+@pytest.mark.parametrize("sheets", ["forecast", "final,charts", "", " , "])
+def test_unknown_sheets_rejected(sheets):
+    _, form = make_workbook()
+    with pytest.raises(HTTPException) as error:
+        build_params({**form, "sheets": sheets}, "test.xlsx")
+    assert error.value.status_code == 422
+
+
+def test_unknown_sheet_endpoint(client):
+    content, form = make_workbook(seed=6)
+    response = client.post("/process-excel/", files={"file": ("test.xlsx", content)},
+                           data={**form, "sheets": "final,charts"})
+    assert response.status_code == 422
+    assert "Невідомі аркуші: charts" in response.json()["detail"]
@@ -0,0 +1,102 @@
+# tests/test_uploads.py
+import hashlib
+import os
+
+import pytest
+from fastapi import FastAPI, File, UploadFile
+from fastapi.testclient import TestClient
+from starlette.formparsers import MultiPartParser
+
+from pipeline import uploads
+from pipeline.uploads import UploadLimitMiddleware, UploadParser, UploadRoute, UploadSpool, spool_upload
+
+MAX_BYTES = 4096
+THRESHOLD = 1000
+
+
+@pytest.fixture
+def spool_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(uploads, "UPLOAD_SPOOL_DIR", str(tmp_path))
+    monkeypatch.setattr(UploadParser, "spool_threshold", THRESHOLD)
+    return tmp_path
+
+
+@pytest.fixture
+def client(spool_dir):
+    """Застосунок з тими самими маршрутом і обмеженням тіла запиту, що й main.app"""
+    app = FastAPI()
+    app.router.route_class = UploadRoute
+    app.add_middleware(UploadLimitMiddleware, max_bytes=MAX_BYTES)
+    seen = {}
+
+    @app.post("/upload")
+    async def upload(file: UploadFile = File(...)):
+        seen["spooled"] = isinstance(file.file, UploadSpool)
+        spooled = await spool_upload(file)
+        try:
+            seen["path"] = spooled.path
+            seen["on_disk"] = spooled.path is not None and os.path.exists(spooled.path)
+            data = spooled.source if spooled.path is None else open(spooled.path, "rb").read()
+            return {"size": spooled.size, "sha256": spooled.sha256.hexdigest(),
+                    "data_sha256": hashlib.sha256(data).hexdigest()}
+        finally:
+            spooled.close()
+
+    with TestClient(app) as test_client:
+        test_client.seen = seen
+        yield test_client
+
+
+def test_starlette_parser_internals_are_still_available():
+    # UploadParser підміняє файл поточної частини; зміна цих деталей Starlette має ламати тест, а не завантаження
+    parser = MultiPartParser({"content-type": "multipart/form-data; boundary=x"}, iter(()))
+    assert hasattr(parser, "_current_part") and hasattr(parser._current_part, "file")
+    assert callable(MultiPartParser.on_headers_finished)
+
+
+@pytest.mark.parametrize("size, on_disk", [(10, False), (THRESHOLD, False), (THRESHOLD + 1, True), (3000, True)])
+def test_upload_is_taken_over_without_copy(client, spool_dir, size, on_disk):
+    data = os.urandom(size)
+    response = client.post("/upload", files={"file": ("a.xlsx", data)})
+
+    assert response.status_code == 200
+    assert response.json() == {"size": size, "sha256": hashlib.sha256(data).hexdigest(),
+                               "data_sha256": hashlib.sha256(data).hexdigest()}
+    assert client.seen["spooled"]
+    assert client.seen["on_disk"] == on_disk
+    if on_disk:
+        # Файл спулу парсера і є файлом SpooledUpload — другої копії немає
+        assert os.path.dirname(client.seen["path"]) == str(spool_dir)
+    assert os.listdir(spool_dir) == []
+
+
+def test_content_length_over_limit_is_rejected(client, spool_dir):
+    response = client.post("/upload", files={"file": ("a.xlsx", b"x" * (MAX_BYTES + 1))})
+    assert response.status_code == 413
+    assert "Файл завеликий" in response.json()["detail"]
+    assert os.listdir(spool_dir) == []
+
+
+def test_chunked_body_over_limit_is_rejected_mid_stream(client, spool_dir):
+    boundary = "limit"
+    head = (f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"a.xlsx\"\r\n"
+            f"Content-Type: application/octet-stream\r\n\r\n").encode()
+
+    def body():
+        # Без Content-Length: ліміт спрацьовує під час читання тіла, коли частина файлу вже на диску
+        yield head
+        for _ in range(8):
+            yield b"x" * 1000
+        yield f"\r\n--{boundary}--\r\n".encode()
+
+    response = client.post("/upload", content=body(),
+                           headers={"content-type": f"multipart/form-data; boundary={boundary}"})
+    assert "content-length" not in response.request.headers
+    assert response.status_code == 413
+    assert os.listdir(spool_dir) == []
+
+
+def test_broken_multipart_is_bad_request(client):
+    response = client.post("/upload", content=b"--x\r\nbroken",
+                           headers={"content-type": "multipart/form-data"})
+    assert response.status_code == 400
@@ -0,0 +1,112 @@
+# tests/test_visualization.py
+from io import BytesIO
+
+import numpy as np
+import pytest
+from openpyxl import load_workbook
+
+from engine.forecast_engine import ForecastResult
+from main import build_params
+from pipeline.process import process_workbook
+from sheets.ingest import ingest_workbook
+from sheets.visualization import rank_series
+from tests.conftest import make_workbook
+
+
+def result_for(values, final, season_length):
+    values, final = np.asarray(values, dtype=float), np.asarray(final, dtype=float)
+    return ForecastResult(values=values, final=final, seasonal=np.ones((season_length, values.shape[1])))
+
+
+def test_rank_by_volume():
+    result = result_for([[1, 5, np.nan, 3],
+                         [1, 5, 4, 3]], np.ones((2, 4)), 2)
+    # 2, 10, 4, 6; NaN у сумі не враховується
+    assert rank_series(result, "volume").tolist() == [1, 3, 2, 0]
+
+
+def test_rank_by_volume_ties_keep_input_order():
+    result = result_for([[2, 1, 2, 1]], np.ones((1, 4)), 1)
+    assert rank_series(result, "volume").tolist() == [0, 2, 1, 3]
+
+
+def test_rank_by_change_uses_last_season():
+    # Сезон — 2 періоди: порівнюються останні 2 періоди історії і перші 2 прогнозу
+    values = [[1000, 1000, 1000, 10],
+              [10, 10, 0, 10],
+              [10, 10, 0, 10]]
+    final = [[10, 5, 30, 10],
+             [10, 5, 30, 10],
+             [999, 999, 999, 999]]
+    result = result_for(values, final, 2)
+    # Зміни: 0 %, -50 %, ∞ (останній сезон нульовий), 0 %
+    assert rank_series(result, "change").tolist() == [1, 0, 3, 2]
+
+
+def test_rank_by_change_quarterly():
+    values = [[100, 100], [100, 100], [100, 100], [100, 100], [1, 100]]
+    final = [[200, 100], [100, 120], [100, 100], [100, 100]]
+    result = result_for(np.vstack([np.full((3, 2), 50.0), values]), final, 4)
+    # Останні 4 періоди: 301 і 400; прогноз: 500 (+66 %) і 420 (+5 %)
+    assert rank_series(result, "change").tolist() == [0, 1]
+
+
+def summary_rows(ws):
+    return [row for row in ws.iter_rows(min_row=4, max_col=6, values_only=True) if row[0] is not None]
+
+
+@pytest.mark.parametrize("backend", ["openpyxl", "xlsxwriter"])
+def test_chart_budget(backend):
+    content, form = make_workbook(seed=8, n_series=5)
+    params = build_params({**form, "output_backend": backend, "sheets": "visualization",
+                           "chart_budget": 2, "charts_per_sheet": 1}, "test.xlsx")
+    result, _ = process_workbook(content, params)
+
+    data = ingest_workbook(BytesIO(content), params)
+    volume = np.nansum(data["values"], axis=0)
+    order = np.argsort(-volume, kind="stable").tolist()
+    headers = list(data["headers"])
+
+    wb = load_workbook(BytesIO(result))
+    assert wb.sheetnames == ["Статистичні дані", "Фактори впливу",
+                             "Візуалізація 1", "Візуалізація 2", "Зведення рядів"]
+
+    # Графіки — для двох найбільших рядів, по одному на аркуші
+    for page, i in enumerate(order[:2], start=1):
+        ws = wb[f"Візуалізація {page}"]
+        assert ws["A1"].value == f"Динаміка та прогноз: {headers[i]}"
+        assert len(ws._charts) == 1
+
+    summary = wb["Зведення рядів"]
+    assert summary["A1"].value == "Ряди без графіків (3)"
+    assert summary["D3"].value == "Останні 12 пер."
+    rows = summary_rows(summary)
+    assert [row[0] for row in rows] == [1, 2, 3]
+    assert [row[1] for row in rows] == [headers[i] for i in order[2:]]
+    assert [row[2] for row in rows] == pytest.approx([round(float(volume[i]), 2) for i in order[2:]])
+
+
+def test_chart_budget_by_change():
+    content, form = make_workbook(seed=9, n_series=6)
+    params = build_params({**form, "output_backend": "openpyxl", "sheets": "visualization",
+                           "chart_budget": 3, "chart_rank": "change"}, "test.xlsx")
+    result, _ = process_workbook(content, params)
+
+    wb = load_workbook(BytesIO(result))
+    assert wb.sheetnames[2:] == ["Візуалізація", "Зведення рядів"]
+    assert len(wb["Візуалізація"]._charts) == 3
+
+    # Зведення впорядковане за модулем зміни першого сезону прогнозу
+    changes = [abs(row[5]) for row in summary_rows(wb["Зведення рядів"])]
+    assert len(changes) == 3
+    assert changes == sorted(changes, reverse=True)
+
+
+def test_no_budget_charts_every_series():
+    content, form = make_workbook(seed=8, n_series=3)
+    params = build_params({**form, "output_backend": "openpyxl", "sheets": "visualization"}, "test.xlsx")
+    result, _ = process_workbook(content, params)
+
+    wb = load_workbook(BytesIO(result))
+    assert wb.sheetnames[2:] == ["Візуалізація"]
+    assert len(wb["Візуалізація"]._charts) == 3
@@ -0,0 +1,81 @@
+# tests/test_writer.py
+from io import BytesIO
+from zipfile import ZIP_DEFLATED, ZIP_STORED, ZipFile
+
+import pytest
+from openpyxl import load_workbook
+
+from main import build_params
+from pipeline.process import process_workbook
+from tests.conftest import make_workbook
+
+HORIZON = 15
+# Одна синтетична книга для всіх тестів модуля: (байти, поля форми)
+FIXTURE = make_workbook(seed=2, n_series=3)
+
+
+def render(form, **overrides) -> bytes:
+    content, _ = FIXTURE
+    result, _ = process_workbook(content, build_params({**form, **overrides}, "test.xlsx"))
+    return result
+
+
+def cells(workbook) -> dict:
+    """{аркуш: значення всіх рядків}"""
+    return {ws.title: [list(row) for row in ws.iter_rows(values_only=True)] for ws in workbook}
+
+
+@pytest.fixture(scope="module")
+def books():
+    _, form = FIXTURE
+    return {backend: load_workbook(BytesIO(render(form, output_backend=backend, horizon=HORIZON)))
+            for backend in ("openpyxl", "xlsxwriter")}
+
+
+def test_backends_same_sheets(books):
+    assert books["openpyxl"].sheetnames == books["xlsxwriter"].sheetnames == [
+        "Статистичні дані", "Фактори впливу", "Початкові налаштування", "Згладжені дані",
+        "Виключення сезонності", "Тренд", "Фінальний прогноз", "Візуалізація",
+    ]
+
+
+def test_backends_same_cells(books):
+    openpyxl_cells, xlsxwriter_cells = cells(books["openpyxl"]), cells(books["xlsxwriter"])
+    for title, rows in openpyxl_cells.items():
+        assert xlsxwriter_cells[title] == rows, title
+
+
+def test_backends_same_layout(books):
+    for ws in books["openpyxl"]:
+        other = books["xlsxwriter"][ws.title]
+        assert sorted(map(str, ws.merged_cells.ranges)) == sorted(map(str, other.merged_cells.ranges)), ws.title
+        assert len(ws._charts) == len(other._charts), ws.title
+
+
+@pytest.mark.parametrize("backend", ["openpyxl", "xlsxwriter"])
+def test_horizon_length(books, backend):
+    ws = books[backend]["Фінальний прогноз"]
+    periods = [(row[0], row[1]) for row in ws.iter_rows(min_row=5, max_col=2, values_only=True)
+               if row[0] is not None]
+    # Історія: 2020–2022, прогноз — з січня року моделі на HORIZON місяців
+    assert len(periods) == HORIZON
+    assert periods[0] == (2023, 1)
+    assert periods[-1] == (2024, 3)
+    assert ws["A1"].value == "Фінальний прогноз на 2023–2024 роки"
+
+
+@pytest.mark.parametrize("backend", ["openpyxl", "xlsxwriter"])
+def test_compression_level_round_trip(backend):
+    _, form = FIXTURE
+    outputs = {level: render(form, output_backend=backend, sheets="final,trend", compression_level=level)
+               for level in (0, 1, 6, 9)}
+
+    expected = cells(load_workbook(BytesIO(outputs[6])))
+    for level, output in outputs.items():
+        with ZipFile(BytesIO(output)) as archive:
+            assert archive.testzip() is None
+            types = {info.compress_type for info in archive.infolist()}
+        assert types == ({ZIP_STORED} if level == 0 else {ZIP_DEFLATED}), level
+        assert cells(load_workbook(BytesIO(output))) == expected, level
+
+    assert len(outputs[0]) > len(outputs[1]) >= len(outputs[9])